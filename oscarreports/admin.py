@@ -1,12 +1,22 @@
-from django.contrib import admin
+from __future__ import annotations
 
-from . import models
+from django.contrib import admin, messages
+from django.db.models import QuerySet
+from django.forms import ModelForm
+from django.http import FileResponse, Http404, HttpRequest
+from django.urls import URLPattern, path, reverse
+from django.utils import timezone
+from django.utils.html import format_html
+from django.utils.translation import gettext_lazy as _
+
+from . import models, profiling
+from .queueing import ReportLimitExceeded
 
 
 @admin.register(models.Report)
 class ReportAdmin(admin.ModelAdmin[models.Report]):
     search_fields = ["uuid"]
-    raw_id_fields = ["owner"]
+    raw_id_fields = ["owner", "requesters", "schedule"]
     list_display = [
         "uuid",
         "owner",
@@ -16,9 +26,10 @@ class ReportAdmin(admin.ModelAdmin[models.Report]):
         "queued_on",
         "started_on",
         "completed_on",
-        "status_name",
+        "status",
     ]
     list_filter = [
+        "status",
         "type_code",
         "created_on",
         "queued_on",
@@ -27,21 +38,198 @@ class ReportAdmin(admin.ModelAdmin[models.Report]):
     ]
     readonly_fields = [
         "uuid",
+        "status",
         "task_id",
         "created_on",
+        "cancelled_on",
+        "failed_on",
+        "retries",
+        "lane",
+        "run_after",
+        "content_encoding",
+        "file_size",
+        "row_count",
+        "sha256",
+        "shard_count",
+        "shards_completed",
+        "metrics",
+        "profile_download",
     ]
     fields = [
         "uuid",
         "content_type",
         "type_code",
         "owner",
+        "requesters",
+        "schedule",
         "description",
         "date_range",
         "task_id",
+        "status",
         "created_on",
         "queued_on",
         "started_on",
         "completed_on",
+        "cancelled_on",
+        "failed_on",
+        "retries",
+        "lane",
+        "run_after",
+        "report_format",
         "mime_type",
+        "content_encoding",
         "report_file",
+        "file_size",
+        "row_count",
+        "sha256",
+        "shard_count",
+        "shards_completed",
+        "metrics",
+        "profile_mode",
+        "profile_download",
+    ]
+    actions = ["cancel_reports", "regenerate_with_profiling"]
+
+    def get_urls(self) -> list[URLPattern]:
+        urls = [
+            path(
+                "<path:object_id>/profile/",
+                self.admin_site.admin_view(self.profile_view),
+                name="reports_dashboard_report_profile",
+            ),
+        ]
+        return urls + super().get_urls()
+
+    def profile_view(self, request: HttpRequest, object_id: str) -> FileResponse:
+        report = self.get_object(request, object_id)
+        if report is None or not report.profile_file:
+            raise Http404(_("Profile not found"))
+        if not self.has_view_permission(request, report):
+            raise Http404(_("Profile not found"))
+        return FileResponse(
+            report.profile_file.open("rb"),
+            as_attachment=True,
+            filename=f"{report.uuid}.profile.zip",
+            content_type="application/zip",
+        )
+
+    @admin.display(description=_("Profile"))
+    def profile_download(self, report: models.Report) -> str:
+        if not report.profile_file:
+            return "-"
+        url = reverse("admin:reports_dashboard_report_profile", args=[report.pk])
+        return format_html('<a href="{}">{}</a>', url, _("Download profile"))
+
+    @admin.action(description=_("Cancel selected reports"))
+    def cancel_reports(
+        self,
+        request: HttpRequest,
+        queryset: QuerySet[models.Report],
+    ) -> None:
+        cancelled = sum(report.cancel() for report in queryset)
+        self.message_user(
+            request,
+            _("Cancelled %(count)d reports") % {"count": cancelled},
+            messages.SUCCESS,
+        )
+
+    @admin.action(description=_("Regenerate selected reports with profiling"))
+    def regenerate_with_profiling(
+        self,
+        request: HttpRequest,
+        queryset: QuerySet[models.Report],
+    ) -> None:
+        queued = 0
+        for report in queryset:
+            if not report.profile_mode:
+                report.profile_mode = profiling.ALL
+                report.save(update_fields=["profile_mode"])
+            try:
+                report.queue(report.report_format)
+            except ReportLimitExceeded as e:
+                self.message_user(request, f"{report}: {e}", messages.ERROR)
+            else:
+                queued += 1
+        self.message_user(
+            request,
+            _("Queued %(count)d reports for profiling") % {"count": queued},
+            messages.SUCCESS,
+        )
+
+
+@admin.register(models.ReportSchedule)
+class ReportScheduleAdmin(admin.ModelAdmin[models.ReportSchedule]):
+    search_fields = ["name", "type_code"]
+    raw_id_fields = ["owner"]
+    list_display = [
+        "name",
+        "type_code",
+        "cadence",
+        "window_days",
+        "owner",
+        "is_active",
+        "last_run_on",
+        "next_run_on",
+    ]
+    list_filter = [
+        "is_active",
+        "type_code",
+    ]
+    readonly_fields = [
+        "created_on",
+        "last_run_on",
+        "next_run_on",
+    ]
+    fields = [
+        "name",
+        "owner",
+        "type_code",
+        "report_format",
+        "window_days",
+        "cadence",
+        "recipients",
+        "is_active",
+        "created_on",
+        "last_run_on",
+        "next_run_on",
+    ]
+
+    def save_model(
+        self,
+        request: HttpRequest,
+        obj: models.ReportSchedule,
+        form: ModelForm[models.ReportSchedule],
+        change: bool,
+    ) -> None:
+        # Reschedule from now when the cadence changes or the schedule is resumed
+        if {"cadence", "is_active"} & set(form.changed_data):
+            obj.schedule_next(timezone.now())
+        super().save_model(request, obj, form, change)
+
+
+@admin.register(models.OrderDailyRollup)
+class OrderDailyRollupAdmin(admin.ModelAdmin[models.OrderDailyRollup]):
+    list_display = [
+        "day",
+        "currency",
+        "num_orders",
+        "total_excl_tax",
+        "total_incl_tax",
+        "updated_on",
+    ]
+    list_filter = ["currency"]
+    date_hierarchy = "day"
+
+
+@admin.register(models.OfferDailyRollup)
+class OfferDailyRollupAdmin(admin.ModelAdmin[models.OfferDailyRollup]):
+    search_fields = ["offer_name"]
+    list_display = [
+        "day",
+        "offer_id",
+        "offer_name",
+        "num_orders",
+        "total_discount",
+        "updated_on",
     ]
+    date_hierarchy = "day"
@@ -8,20 +8,53 @@ class ReportsDashboardConfig(apps.ReportsDashboardConfig):
 
     def ready(self) -> None:
         super().ready()
-        from . import handlers, views  # NOQA
+        from . import checks, handlers, rollups, views  # NOQA
+        from .generators import (
+            OfferSummaryReportGenerator,
+            OrderSummaryReportGenerator,
+        )
+        from .utils import GeneratorRepository
+
+        if rollups.is_enabled():
+            GeneratorRepository.register(OrderSummaryReportGenerator)
+            GeneratorRepository.register(OfferSummaryReportGenerator)
 
         self.index_view = views.IndexView
         self.download_view = views.ReportDownloadView
+        self.estimate_view = views.ReportEstimateView
+        self.status_view = views.ReportStatusView
+        self.status_list_view = views.ReportStatusListView
+        self.cancel_view = views.ReportCancelView
         self.delete_view = views.ReportDeleteView
 
     def get_urls(self) -> list[URLPattern | URLResolver]:
         urls: list[URLPattern | URLResolver] = [
             path("", self.index_view.as_view(), name="reports-index"),
+            path(
+                "estimate/",
+                self.estimate_view.as_view(),
+                name="reports-estimate",
+            ),
+            path(
+                "status/",
+                self.status_list_view.as_view(),
+                name="reports-status-list",
+            ),
             path(
                 "<uuid:uuid>/download/",
                 self.download_view.as_view(),
                 name="reports-download",
             ),
+            path(
+                "<uuid:uuid>/status/",
+                self.status_view.as_view(),
+                name="reports-status",
+            ),
+            path(
+                "<uuid:uuid>/cancel/",
+                self.cancel_view.as_view(),
+                name="reports-cancel",
+            ),
             path(
                 "<uuid:uuid>/delete/",
                 self.delete_view.as_view(),
@@ -0,0 +1,216 @@
+from __future__ import annotations
+
+from collections.abc import Iterable, Iterator, Sequence
+from datetime import timedelta
+from decimal import Decimal as D
+from typing import Any
+import platform
+import time
+import tracemalloc
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection, transaction
+from django.utils import timezone
+from oscar.core.loading import get_model
+import django
+import oscar
+
+from .formats import FORMAT_CHOICES
+from .models import Report
+from .utils import GeneratorRepository
+
+try:
+    try:
+        from psycopg.types.range import Range as DateTimeTZRange
+    except ImportError:
+        from psycopg2.extras import DateTimeTZRange
+except ImportError:
+    raise ImproperlyConfigured("Error loading psycopg2 or psycopg module")
+
+Order = get_model("order", "Order")
+Line = get_model("order", "Line")
+OrderDiscount = get_model("order", "OrderDiscount")
+
+# Prefix of the usernames and order numbers of seeded benchmark data
+SEED_PREFIX = "oscarreports-bench-"
+
+
+def _batches(count: int, batch_size: int) -> Iterator[range]:
+    for start in range(0, count, batch_size):
+        yield range(start, min(start + batch_size, count))
+
+
+def seed_orders(
+    count: int,
+    lines_per_order: int = 2,
+    discount_every: int = 4,
+    num_offers: int = 10,
+    days: int = 30,
+    batch_size: int = 5000,
+) -> dict[str, int]:
+    """
+    Bulk insert ``count`` synthetic orders placed over the last ``days`` days,
+    each with ``lines_per_order`` lines. Every ``discount_every``th order has
+    an offer applied, spread over ``num_offers`` offers. Returns the number of
+    rows created per model.
+    """
+    User = get_user_model()
+    run = uuid.uuid4().hex[:8]
+    now = timezone.now()
+    num_users = min(max(count // 10, 1), 10000)
+    users = []
+    for batch in _batches(num_users, batch_size):
+        users += User.objects.bulk_create(
+            User(
+                username=f"{SEED_PREFIX}{run}-{i}",
+                email=f"{SEED_PREFIX}{run}-{i}@example.com",
+            )
+            for i in batch
+        )
+    created = {"users": len(users), "orders": 0, "lines": 0, "discounts": 0}
+    seconds = days * 24 * 60 * 60
+    for batch in _batches(count, batch_size):
+        with transaction.atomic():
+            orders = Order.objects.bulk_create(
+                Order(
+                    number=f"{SEED_PREFIX}{run}-{i}",
+                    user=users[i % num_users],
+                    total_incl_tax=D("12.00") * lines_per_order,
+                    total_excl_tax=D("10.00") * lines_per_order,
+                    status="Complete",
+                    date_placed=now - timedelta(seconds=(i * 7919) % seconds),
+                )
+                for i in batch
+            )
+            lines = Line.objects.bulk_create(
+                Line(
+                    order=order,
+                    partner_name="Benchmark partner",
+                    partner_sku=f"SKU-{j}",
+                    title=f"Benchmark product {j}",
+                    quantity=1,
+                    line_price_incl_tax=D("12.00"),
+                    line_price_excl_tax=D("10.00"),
+                    line_price_before_discounts_incl_tax=D("12.00"),
+                    line_price_before_discounts_excl_tax=D("10.00"),
+                    num_allocated=0,
+                )
+                for order in orders
+                for j in range(lines_per_order)
+            )
+            discounts = OrderDiscount.objects.bulk_create(
+                OrderDiscount(
+                    order=order,
+                    offer_id=i % num_offers + 1,
+                    offer_name=f"Benchmark offer {i % num_offers + 1}",
+                    frequency=1,
+                    amount=D("1.00"),
+                )
+                for i, order in zip(batch, orders)
+                if discount_every and i % discount_every == 0
+            )
+        created["orders"] += len(orders)
+        created["lines"] += len(lines)
+        created["discounts"] += len(discounts)
+    return created
+
+
+def clear_seeded_data() -> None:
+    # Lines and discounts are deleted along with their orders
+    Order.objects.filter(number__startswith=SEED_PREFIX).delete()
+    get_user_model().objects.filter(username__startswith=SEED_PREFIX).delete()
+
+
+def get_formats() -> list[str]:
+    # The formats a report can be queued in, each of which every generator
+    # supports through its CSV formatter
+    return [report_format for report_format, label in FORMAT_CHOICES]
+
+
+def benchmark_report(
+    type_code: str,
+    report_format: str,
+    days: int = 30,
+    trace_memory: bool = False,
+) -> dict[str, Any]:
+    """
+    Generate one report of the given type and format, covering the last
+    ``days`` days, and return its throughput and resource usage.
+    """
+    now = timezone.now()
+    report = Report(type_code=type_code)
+    report.date_range = DateTimeTZRange(lower=now - timedelta(days=days), upper=now)
+    report.save()
+    result: dict[str, Any] = {"type_code": type_code, "format": report_format}
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        report.generate(report_format)
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+        return result
+    finally:
+        elapsed = time.perf_counter() - start
+        if trace_memory:
+            result["peak_traced_memory"] = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        report.delete()
+    rows = report.row_count or 0
+    result.update(
+        {
+            "seconds": round(elapsed, 6),
+            "rows": rows,
+            "rows_per_second": round(rows / elapsed, 1) if elapsed else None,
+            "bytes": report.file_size,
+            "queries": report.metrics.get("queries"),
+            "peak_rss": report.metrics.get("peak_rss"),
+            "phases": report.metrics.get("phases"),
+        }
+    )
+    return result
+
+
+def run_benchmarks(
+    type_codes: Sequence[str] = (),
+    formats: Sequence[str] = (),
+    repeat: int = 1,
+    days: int = 30,
+    trace_memory: bool = False,
+) -> Iterable[dict[str, Any]]:
+    """
+    Benchmark every registered generator (or only ``type_codes``) in each of
+    its formats (or only ``formats``), ``repeat`` times each.
+    """
+    for generator_class in GeneratorRepository().get_report_generators():
+        if type_codes and generator_class.code not in type_codes:
+            continue
+        for report_format in get_formats():
+            if formats and report_format not in formats:
+                continue
+            for run in range(repeat):
+                result = benchmark_report(
+                    generator_class.code,
+                    report_format,
+                    days=days,
+                    trace_memory=trace_memory,
+                )
+                result["run"] = run
+                yield result
+
+
+def get_environment() -> dict[str, Any]:
+    return {
+        "python": platform.python_version(),
+        "django": django.get_version(),
+        "oscar": oscar.get_version(),
+        "database": "{} {}".format(
+            connection.vendor,
+            ".".join(str(part) for part in connection.get_database_version()),
+        ),
+        "orders": Order.objects.count(),
+        "lines": Line.objects.count(),
+        "discounts": OrderDiscount.objects.count(),
+    }
@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+from datetime import date
+from typing import Any
+
+from django.conf import settings
+from django.utils import timezone
+
+from .sharding import split_date_range
+
+
+def get_checkpoint_days(type_code: str) -> int | None:
+    # Number of days of a report of the given type generated between
+    # checkpoints, e.g. OSCAR_REPORTS_CHECKPOINT_DAYS = {"order_report": 7}
+    days = getattr(settings, "OSCAR_REPORTS_CHECKPOINT_DAYS", {}).get(type_code)
+    return max(int(days), 1) if days else None
+
+
+def split_by_days(
+    start_date: date, end_date: date, days: int
+) -> list[tuple[date, date]]:
+    # Split the inclusive day range into consecutive parts of about ``days`` days
+    num_days = (end_date - start_date).days + 1
+    return split_date_range(start_date, end_date, -(-num_days // days))
+
+
+def new_checkpoint(
+    report_format: str,
+    date_ranges: list[tuple[date, date]],
+) -> dict[str, Any]:
+    """
+    The state of a checkpointed generation, stored on ``Report.checkpoint``:
+    which parts of the date range have been written to storage, and how many
+    rows they contain.
+    """
+    now = timezone.now().isoformat()
+    return {
+        "report_format": report_format,
+        "date_ranges": [
+            [lower.isoformat(), upper.isoformat()] for lower, upper in date_ranges
+        ],
+        "parts": 0,
+        "rows": 0,
+        "mime_type": None,
+        "started": now,
+        "updated": now,
+    }
+
+
+def is_resumable(
+    checkpoint: dict[str, Any],
+    report_format: str,
+    date_ranges: list[tuple[date, date]],
+) -> bool:
+    # A checkpoint can only be resumed by the same generation it was made by
+    fresh = new_checkpoint(report_format, date_ranges)
+    return bool(checkpoint) and all(
+        checkpoint.get(key) == fresh[key] for key in ("report_format", "date_ranges")
+    )
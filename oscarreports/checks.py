@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+from collections.abc import Sequence
+from typing import Any
+
+from django.apps import AppConfig
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import CheckMessage, Warning, register
+from django_tasks.backends.immediate import ImmediateBackend
+
+
+@register()
+def check_progress_cache(
+    app_configs: Sequence[AppConfig] | None,
+    **kwargs: Any,
+) -> list[CheckMessage]:
+    # Progress is written to the cache by the task worker and read from it by
+    # the dashboard, so unless tasks run in the web process, they must share it
+    from . import tasks
+
+    if isinstance(tasks.generate_report.get_backend(), ImmediateBackend):
+        return []
+    cache = caches[DEFAULT_CACHE_ALIAS]
+    if not isinstance(cache, (LocMemCache, DummyCache)):
+        return []
+    return [
+        Warning(
+            "The default cache isn't shared between processes, so the progress "
+            "of running reports won't be shown on the dashboard.",
+            hint=(
+                "Use a cache shared by the web and task worker processes, such "
+                "as Redis, Memcached or the database cache."
+            ),
+            obj=type(cache).__name__,
+            id="oscarreports.W001",
+        )
+    ]
@@ -0,0 +1,275 @@
+from __future__ import annotations
+
+from collections.abc import Callable, Iterable, Sequence
+from decimal import Context, Decimal
+from types import TracebackType
+from typing import Any
+import json
+import math
+import pickle
+import tempfile
+
+from django.conf import settings
+
+from .compression import GZIP
+from .streaming import FileFormatter, ReportOutput, get_spool_size
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+COLUMNAR = "COLUMNAR"
+PARQUET_MIME_TYPE = "application/vnd.apache.parquet"
+NDJSON_MIME_TYPE = "application/x-ndjson"
+
+# Most decimal places kept by a Parquet decimal column
+MAX_DECIMAL_SCALE = 18
+
+
+def get_batch_size() -> int:
+    # Number of rows written to each Parquet row group (and held in memory
+    # while it's built), e.g. OSCAR_REPORTS_COLUMNAR_BATCH_SIZE = 50000
+    return getattr(settings, "OSCAR_REPORTS_COLUMNAR_BATCH_SIZE", 10000)
+
+
+def get_column_names(header: Iterable[Any]) -> list[str]:
+    # Column names must be unique, so repeated header cells are numbered
+    names: list[str] = []
+    for value in header:
+        name = base = str(value)
+        count = 1
+        while name in names:
+            count += 1
+            name = f"{base} ({count})"
+        names.append(name)
+    return names
+
+
+def fit_row(row: Iterable[Any], width: int) -> list[Any]:
+    # Pad or trim a data row to the width of the header row
+    values = list(row)[:width]
+    return values + [None] * (width - len(values))
+
+
+def encode_json(value: Any) -> str:
+    # JSON numbers for numbers (including Decimals, written exactly) and
+    # booleans, strings for everything else
+    if value is None or isinstance(value, bool):
+        return json.dumps(value)
+    if isinstance(value, (int, float, Decimal)) and math.isfinite(value):
+        return str(value) if isinstance(value, Decimal) else json.dumps(value)
+    return json.dumps(str(value), ensure_ascii=False)
+
+
+class NDJSONWriter:
+    """
+    Writes rows as newline delimited JSON objects, keyed by the first (header)
+    row, keeping numbers and booleans typed. The compact fallback of the
+    columnar format, when pyarrow isn't installed.
+    """
+
+    def __init__(self, output: ReportOutput) -> None:
+        self.output = output
+        self.keys: list[str] | None = None
+
+    def __enter__(self) -> NDJSONWriter:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        pass
+
+    def writerow(self, row: Iterable[Any]) -> None:
+        if self.keys is None:
+            self.keys = [encode_json(name) for name in get_column_names(row)]
+            return
+        pairs = zip(self.keys, fit_row(row, len(self.keys)))
+        line = ",".join(f"{key}:{encode_json(value)}" for key, value in pairs)
+        self.output.write(f"{{{line}}}\n".encode())
+
+
+def is_number(value: Any) -> bool:
+    return isinstance(value, (int, float, Decimal)) and not isinstance(value, bool)
+
+
+def to_spooled(value: Any) -> Any:
+    # Values other than numbers and booleans can only go in a string column,
+    # so they're spooled as the strings they'll be written as
+    if value is None or isinstance(value, bool) or is_number(value):
+        return value
+    return str(value)
+
+
+class ColumnType:
+    """
+    The narrowest Arrow type which holds every value added to a column exactly,
+    widened as values are added: integers to decimals or floats, and anything
+    to strings as a last resort.
+    """
+
+    def __init__(self) -> None:
+        self.kinds: set[type] = set()
+        # Most digits before and after the point of any integer or decimal
+        self.digits = 0
+        self.scale = 0
+        # Whether every integer fits in an int64
+        self.int64 = True
+        # Whether every integer and decimal is exactly representable as a float
+        self.float64 = True
+
+    def add(self, value: Any) -> None:
+        if value is None:
+            return
+        if isinstance(value, bool):
+            self.kinds.add(bool)
+        elif isinstance(value, int):
+            self.kinds.add(int)
+            self.digits = max(self.digits, len(str(abs(value))))
+            self.int64 = self.int64 and -(2**63) <= value < 2**63
+            self.float64 = self.float64 and abs(value) <= 2**53
+        elif isinstance(value, float):
+            self.kinds.add(float)
+        elif isinstance(value, Decimal) and value.is_finite():
+            self.kinds.add(Decimal)
+            self.digits = max(self.digits, value.adjusted() + 1)
+            self.scale = max(self.scale, -int(value.as_tuple().exponent))
+            self.float64 = self.float64 and Decimal(float(value)) == value
+        else:
+            self.kinds.add(str)
+
+    def get_arrow_type(self) -> Any:
+        if self.kinds == {bool}:
+            return pyarrow.bool_()
+        if self.kinds == {int} and self.int64:
+            return pyarrow.int64()
+        if (
+            self.kinds
+            and self.kinds <= {int, Decimal}
+            and self.scale <= MAX_DECIMAL_SCALE
+            and self.digits + self.scale <= 38
+        ):
+            return pyarrow.decimal128(38, self.scale)
+        if self.kinds and self.kinds <= {int, float, Decimal} and self.float64:
+            return pyarrow.float64()
+        return pyarrow.string()
+
+
+def get_converter(column_type: Any) -> Callable[[Any], Any]:
+    # Converts a (non-null) value to the column's type, which was chosen to
+    # hold it exactly
+    if pyarrow.types.is_decimal(column_type):
+        exponent = Decimal(1).scaleb(-column_type.scale)
+        context = Context(prec=column_type.precision)
+        return lambda value: Decimal(value).quantize(exponent, context=context)
+    if pyarrow.types.is_floating(column_type):
+        return float
+    if pyarrow.types.is_string(column_type):
+        return str
+    return lambda value: value
+
+
+class ParquetWriter:
+    """
+    Writes rows into a Parquet file, a row group of ``batch_size`` rows at a
+    time. The column names come from the first (header) row, and their types
+    from every value written, widened so that each column holds all of its
+    values exactly. Since a Parquet file's schema precedes its rows, they're
+    spooled to a temporary file until the writer is closed, a row group at a
+    time.
+    """
+
+    def __init__(self, output: ReportOutput, batch_size: int | None = None) -> None:
+        self.output = output
+        self.batch_size = batch_size or get_batch_size()
+        self.names: list[str] | None = None
+        self.column_types: list[ColumnType] = []
+        self.rows: list[list[Any]] = []
+        self.spool = tempfile.SpooledTemporaryFile(max_size=get_spool_size())
+        self.num_batches = 0
+
+    def __enter__(self) -> ParquetWriter:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        if exc_type is None:
+            self.close()
+        self.spool.close()
+
+    def writerow(self, row: Iterable[Any]) -> None:
+        if self.names is None:
+            self.names = get_column_names(row)
+            self.column_types = [ColumnType() for _ in self.names]
+            return
+        values = [to_spooled(value) for value in fit_row(row, len(self.names))]
+        for column_type, value in zip(self.column_types, values):
+            column_type.add(value)
+        self.rows.append(values)
+        if len(self.rows) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self.rows:
+            return
+        pickle.dump(self.rows, self.spool, protocol=pickle.HIGHEST_PROTOCOL)
+        self.num_batches += 1
+        self.rows = []
+
+    def get_schema(self) -> Any:
+        # No values at all makes a string column
+        return pyarrow.schema(
+            [
+                (name, column_type.get_arrow_type())
+                for name, column_type in zip(self.names or [], self.column_types)
+            ]
+        )
+
+    def close(self) -> None:
+        self.flush()
+        schema = self.get_schema()
+        converters = [get_converter(field.type) for field in schema]
+        writer = pyarrow.parquet.ParquetWriter(self.output, schema, compression="zstd")
+        self.spool.seek(0)
+        for _ in range(self.num_batches):
+            rows = pickle.load(self.spool)
+            arrays = [
+                pyarrow.array(
+                    [None if value is None else convert(value) for value in values],
+                    type=field.type,
+                )
+                for values, field, convert in zip(zip(*rows), schema, converters)
+            ]
+            writer.write_table(pyarrow.Table.from_arrays(arrays, schema=schema))
+        writer.close()
+
+
+class ParquetFormatter(FileFormatter):
+    content_type = PARQUET_MIME_TYPE
+    extension = "parquet"
+
+    def open_writer(self, output: ReportOutput) -> ParquetWriter:
+        return ParquetWriter(output)
+
+
+class NDJSONFormatter(FileFormatter):
+    content_type = NDJSON_MIME_TYPE
+    extension = "ndjson"
+    compression = GZIP
+
+    def open_writer(self, output: ReportOutput) -> NDJSONWriter:
+        return NDJSONWriter(output)
+
+
+def get_formatter_class() -> type[FileFormatter]:
+    # Parquet when pyarrow is installed, otherwise gzipped NDJSON
+    return NDJSONFormatter if pyarrow is None else ParquetFormatter
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+from collections.abc import Iterator
+from contextlib import contextmanager
+import gzip
+import zipfile
+
+from django.conf import settings
+from oscar.apps.dashboard.reports.reports import ReportGenerator
+
+from .streaming import FileFormatter, ReportOutput
+
+GZIP = "gzip"
+ZIP = "zip"
+COMPRESSIONS = (GZIP, ZIP)
+ZIP_MIME_TYPE = "application/zip"
+
+
+def get_compression(generator: ReportGenerator) -> str | None:
+    # How the output of a report type is compressed, e.g.
+    # OSCAR_REPORTS_COMPRESSION = {"order_report": "gzip"}. A generator class
+    # can also set ``report_compression`` itself. File formatters (e.g. XLSX)
+    # decide how their own format is compressed.
+    if isinstance(generator.formatter, FileFormatter):
+        return generator.formatter.compression
+    compression = getattr(
+        generator,
+        "report_compression",
+        getattr(settings, "OSCAR_REPORTS_COMPRESSION", {}).get(generator.code),
+    )
+    if compression and compression not in COMPRESSIONS:
+        raise ValueError(f"Unsupported report compression: {compression}")
+    return compression or None
+
+
+def get_filename(filename: str, compression: str | None) -> str:
+    # Name of the stored file holding ``filename`` compressed
+    if compression == GZIP:
+        return f"{filename}.gz"
+    if compression == ZIP:
+        return "{}.zip".format(filename.rsplit(".", 1)[0])
+    return filename
+
+
+def get_content_encoding(compression: str | None) -> str:
+    # Gzip is also an HTTP content coding, so the file can be served as is to
+    # browsers which accept it and decompressed for those which don't. A zip
+    # file is a MIME type of its own.
+    return GZIP if compression == GZIP else ""
+
+
+@contextmanager
+def compress(
+    output: ReportOutput,
+    compression: str | None,
+    arcname: str,
+) -> Iterator[ReportOutput]:
+    """
+    Compress everything written to the yielded output into ``output``, as it is
+    written. ``output`` measures the compressed content, while the yielded
+    output measures (and counts the rows of) the uncompressed report.
+    """
+    if compression == GZIP:
+        # A fixed mtime keeps the checksum of identical reports identical
+        with gzip.GzipFile(fileobj=output, mode="wb", mtime=0) as gzip_file:
+            yield ReportOutput(gzip_file)
+    elif compression == ZIP:
+        with zipfile.ZipFile(output, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+            with zf.open(arcname, "w", force_zip64=True) as member:
+                yield ReportOutput(member)
+    else:
+        yield output
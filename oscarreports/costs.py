@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db.models.query import QuerySet
+from django.utils import timezone
+from oscar.apps.dashboard.reports.reports import ReportGenerator
+
+from .progress import estimate_count
+
+
+def estimate_rows(generator: ReportGenerator) -> int | None:
+    """
+    Estimate the number of rows a report will return, without generating it.
+
+    A generator class can provide its own, cheaper or more accurate, estimate
+    with an ``estimate_rows()`` method. Otherwise the generator's queryset is
+    estimated as set by ``OSCAR_REPORTS_PROGRESS_ESTIMATE``.
+    """
+    estimator = getattr(generator, "estimate_rows", None)
+    if estimator is not None:
+        return estimator()
+    queryset = generator.queryset
+    if isinstance(queryset, QuerySet):
+        return estimate_count(queryset)
+    return None
+
+
+def get_soft_row_limit(type_code: str) -> int | None:
+    # Reports of this type estimated at this many rows or more are held until
+    # off-peak hours, e.g. OSCAR_REPORTS_SOFT_ROW_LIMITS = {"order_report": 50000}
+    return getattr(settings, "OSCAR_REPORTS_SOFT_ROW_LIMITS", {}).get(type_code)
+
+
+def get_hard_row_limit(type_code: str) -> int | None:
+    # Reports of this type estimated at this many rows or more are refused,
+    # e.g. OSCAR_REPORTS_HARD_ROW_LIMITS = {"order_report": 1000000}
+    return getattr(settings, "OSCAR_REPORTS_HARD_ROW_LIMITS", {}).get(type_code)
+
+
+def get_off_peak_hours() -> tuple[int, int] | None:
+    # Local hours between which large reports run, e.g.
+    # OSCAR_REPORTS_OFF_PEAK_HOURS = (22, 6) for 10pm until 6am
+    hours = getattr(settings, "OSCAR_REPORTS_OFF_PEAK_HOURS", None)
+    if not hours:
+        return None
+    start, end = hours
+    return int(start), int(end)
+
+
+def get_off_peak_start(now: datetime | None = None) -> datetime | None:
+    """
+    When the next off-peak period starts, or ``None`` if it's off-peak now
+    (or no off-peak hours are set).
+    """
+    hours = get_off_peak_hours()
+    if hours is None:
+        return None
+    start, end = hours
+    now = timezone.localtime(now)
+    if start <= end:
+        off_peak = start <= now.hour < end
+    else:
+        off_peak = now.hour >= start or now.hour < end
+    if off_peak:
+        return None
+    run_after = now.replace(hour=start, minute=0, second=0, microsecond=0)
+    if run_after <= now:
+        run_after += timedelta(days=1)
+    return run_after
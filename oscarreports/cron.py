@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+from django.core.exceptions import ValidationError
+from django.utils import timezone
+
+# (name, lowest, highest) of each field of a cron expression
+FIELDS = [
+    ("minute", 0, 59),
+    ("hour", 0, 23),
+    ("day of month", 1, 31),
+    ("month", 1, 12),
+    ("day of week", 0, 7),
+]
+
+# How far ahead to look for the next match, so an expression which can never
+# match (e.g. "0 0 31 2 *") doesn't loop forever
+MAX_DAYS_AHEAD = 366 * 4
+
+
+class InvalidCronExpression(ValueError):
+    pass
+
+
+def parse_field(value: str, name: str, lowest: int, highest: int) -> set[int]:
+    # Parse one field of a cron expression, e.g. "*", "*/15", "1-5" or "0,30"
+    values: set[int] = set()
+    for part in value.split(","):
+        span, _, step_str = part.partition("/")
+        try:
+            step = int(step_str) if step_str else 1
+            if span == "*":
+                start, end = lowest, highest
+            elif "-" in span:
+                start_str, end_str = span.split("-", 1)
+                start, end = int(start_str), int(end_str)
+            else:
+                start = int(span)
+                end = highest if step_str else start
+        except ValueError:
+            raise InvalidCronExpression(f"Invalid {name}: {value!r}")
+        if step < 1 or start < lowest or end > highest or start > end:
+            raise InvalidCronExpression(f"Invalid {name}: {value!r}")
+        values.update(range(start, end + 1, step))
+    return values
+
+
+class CronSchedule:
+    """
+    A standard five field cron expression ("minute hour day-of-month month
+    day-of-week"), matched against local time.
+
+    Supports ``*``, ranges (``1-5``), steps (``*/15``, ``0-30/10``) and lists
+    (``0,30``). Sunday is day ``0`` or ``7``. As in cron, when both the day of
+    month and the day of week are restricted, a day matching either matches.
+    """
+
+    def __init__(self, expression: str) -> None:
+        self.expression = expression
+        fields = expression.split()
+        if len(fields) != len(FIELDS):
+            raise InvalidCronExpression(
+                f"Expected {len(FIELDS)} fields, got {len(fields)}: {expression!r}"
+            )
+        parsed = [
+            parse_field(value, name, lowest, highest)
+            for value, (name, lowest, highest) in zip(fields, FIELDS)
+        ]
+        self.minutes, self.hours, self.days, self.months, weekdays = parsed
+        # Sunday is both 0 and 7
+        self.weekdays = {day % 7 for day in weekdays}
+        self.any_day = fields[2] == "*"
+        self.any_weekday = fields[4] == "*"
+
+    def __str__(self) -> str:
+        return self.expression
+
+    def matches_day(self, dt: datetime) -> bool:
+        if dt.month not in self.months:
+            return False
+        day_matches = dt.day in self.days
+        # Python counts Monday as 0, cron counts Sunday as 0
+        weekday_matches = (dt.weekday() + 1) % 7 in self.weekdays
+        if self.any_day or self.any_weekday:
+            return day_matches and weekday_matches
+        return day_matches or weekday_matches
+
+    def matches(self, dt: datetime) -> bool:
+        dt = timezone.localtime(dt)
+        return (
+            dt.minute in self.minutes and dt.hour in self.hours and self.matches_day(dt)
+        )
+
+    def next_after(self, dt: datetime) -> datetime | None:
+        """
+        The first matching minute after ``dt``, or ``None`` if there's none
+        within ``MAX_DAYS_AHEAD`` days.
+        """
+        local = timezone.localtime(dt).replace(tzinfo=None, second=0, microsecond=0)
+        start = local + timedelta(minutes=1)
+        day = start.replace(hour=0, minute=0)
+        for _ in range(MAX_DAYS_AHEAD):
+            if self.matches_day(day):
+                for hour in sorted(self.hours):
+                    for minute in sorted(self.minutes):
+                        candidate = day.replace(hour=hour, minute=minute)
+                        if candidate >= start:
+                            return timezone.make_aware(candidate)
+            day += timedelta(days=1)
+        return None
+
+
+def validate_cron_expression(value: str) -> None:
+    try:
+        CronSchedule(value)
+    except InvalidCronExpression as e:
+        raise ValidationError(str(e))
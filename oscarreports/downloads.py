@@ -0,0 +1,290 @@
+from __future__ import annotations
+
+from collections.abc import Iterator
+from typing import TYPE_CHECKING, Any
+import gzip
+import re
+
+from django.conf import settings
+from django.core.files import File
+from django.http import (
+    HttpRequest,
+    HttpResponse,
+    HttpResponseRedirect,
+    StreamingHttpResponse,
+)
+from django.http.response import HttpResponseBase
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import content_disposition_header, http_date, quote_etag
+from django.utils.module_loading import import_string
+
+if TYPE_CHECKING:
+    from .models import Report
+
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def get_download_strategy() -> DownloadStrategy:
+    # How report files are sent to the browser, e.g.
+    # OSCAR_REPORTS_DOWNLOAD_STRATEGY = "oscarreports.downloads.XAccelRedirectDownload"
+    path = getattr(
+        settings,
+        "OSCAR_REPORTS_DOWNLOAD_STRATEGY",
+        "oscarreports.downloads.StreamingDownload",
+    )
+    strategy_class: type[DownloadStrategy] = import_string(path)
+    return strategy_class()
+
+
+def parse_range(header: str, size: int) -> tuple[int, int] | None:
+    """
+    Parse a single byte range ``Range`` header into inclusive (first, last)
+    byte positions within a file of ``size`` bytes. Returns ``None`` when the
+    header is malformed, asks for multiple ranges, or can't be satisfied.
+    """
+    match = RANGE_RE.match(header.strip())
+    if not match or match.groups() == ("", ""):
+        return None
+    first, last = match.groups()
+    if not first:
+        # Suffix range: the final N bytes
+        length = min(int(last), size)
+        if length == 0:
+            return None
+        return size - length, size - 1
+    if int(first) >= size:
+        return None
+    if not last or int(last) >= size:
+        return int(first), size - 1
+    if int(last) < int(first):
+        return None
+    return int(first), int(last)
+
+
+def iter_file(
+    fileobj: File[Any] | gzip.GzipFile,
+    length: int | None,
+    block_size: int,
+) -> Iterator[bytes]:
+    # Read ``length`` bytes (or everything, if ``None``) from the file
+    try:
+        while length is None or length > 0:
+            data = fileobj.read(
+                block_size if length is None else min(block_size, length)
+            )
+            if not data:
+                break
+            if length is not None:
+                length -= len(data)
+            yield data
+    finally:
+        fileobj.close()
+
+
+class DownloadStrategy:
+    """
+    Sends a report's file to the browser, once the view has checked that the
+    user may download it.
+
+    Conditional requests (``If-None-Match`` / ``If-Modified-Since``) are
+    answered here, before the file is touched. Subclasses decide how the file
+    itself is served.
+    """
+
+    def accepts_encoding(self, request: HttpRequest, report: Report) -> bool:
+        # Whether the browser accepts the file in its stored content coding
+        if not report.content_encoding:
+            return True
+        pattern = r"\b{}\b".format(re.escape(report.content_encoding))
+        return bool(re.search(pattern, request.headers.get("Accept-Encoding", "")))
+
+    def get_etag(self, request: HttpRequest, report: Report) -> str | None:
+        if not report.sha256:
+            return None
+        if not self.accepts_encoding(request, report):
+            # The decoded file is a different representation of the report
+            return quote_etag(f"{report.sha256}-identity")
+        return quote_etag(report.sha256)
+
+    def get_last_modified(self, report: Report) -> int | None:
+        if report.completed_on is None:
+            return None
+        return int(report.completed_on.timestamp())
+
+    def serve(
+        self,
+        request: HttpRequest,
+        report: Report,
+        filename: str,
+    ) -> HttpResponseBase:
+        etag = self.get_etag(request, report)
+        last_modified = self.get_last_modified(report)
+        response: HttpResponseBase | None = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = self.get_response(request, report, filename)
+        if etag:
+            response.headers.setdefault("ETag", etag)
+        if last_modified is not None:
+            response.headers.setdefault("Last-Modified", http_date(last_modified))
+        if report.content_encoding:
+            patch_vary_headers(response, ["Accept-Encoding"])
+        return response
+
+    def get_response(
+        self,
+        request: HttpRequest,
+        report: Report,
+        filename: str,
+    ) -> HttpResponseBase:
+        raise NotImplementedError()
+
+    def set_file_headers(
+        self,
+        request: HttpRequest,
+        response: HttpResponseBase,
+        report: Report,
+        filename: str,
+    ) -> None:
+        response["Content-Type"] = report.mime_type or "application/octet-stream"
+        disposition = content_disposition_header(True, filename)
+        if disposition is not None:
+            response["Content-Disposition"] = disposition
+        if report.content_encoding and self.accepts_encoding(request, report):
+            response["Content-Encoding"] = report.content_encoding
+
+
+class StreamingDownload(DownloadStrategy):
+    """
+    Stream the file through Django in blocks, honouring single byte ``Range``
+    requests so that interrupted downloads can be resumed. Compressed files
+    are decompressed on the fly for browsers which don't accept them as is.
+    """
+
+    block_size = 64 * 1024
+
+    def get_response(
+        self,
+        request: HttpRequest,
+        report: Report,
+        filename: str,
+    ) -> HttpResponseBase:
+        if not self.accepts_encoding(request, report):
+            return self.get_decoded_response(request, report, filename)
+        size = report.file_size
+        if size is None:
+            size = report.report_file.size
+        first, last = 0, size - 1
+        status = 200
+        range_header = request.headers.get("Range")
+        if range_header and self.is_range_current(request, report):
+            byte_range = parse_range(range_header, size)
+            if byte_range is None:
+                error = HttpResponse(status=416)
+                error["Content-Range"] = f"bytes */{size}"
+                return error
+            first, last = byte_range
+            status = 206
+        fileobj = report.report_file.open("rb")
+        if first:
+            fileobj.seek(first)
+        length = last - first + 1 if size else 0
+        response = StreamingHttpResponse(
+            iter_file(fileobj, length, self.block_size), status=status
+        )
+        self.set_file_headers(request, response, report, filename)
+        response["Accept-Ranges"] = "bytes"
+        response["Content-Length"] = str(length)
+        if status == 206:
+            response["Content-Range"] = f"bytes {first}-{last}/{size}"
+        return response
+
+    def get_decoded_response(
+        self,
+        request: HttpRequest,
+        report: Report,
+        filename: str,
+    ) -> HttpResponseBase:
+        # The decompressed length isn't known up front, so ranges aren't offered
+        fileobj = gzip.GzipFile(fileobj=report.report_file.open("rb"), mode="rb")
+        response = StreamingHttpResponse(iter_file(fileobj, None, self.block_size))
+        self.set_file_headers(request, response, report, filename)
+        response["Accept-Ranges"] = "none"
+        return response
+
+    def is_range_current(self, request: HttpRequest, report: Report) -> bool:
+        # ``If-Range`` makes a ``Range`` request conditional on the file being
+        # unchanged. Otherwise the whole file is sent.
+        if_range = request.headers.get("If-Range")
+        if not if_range:
+            return True
+        etag = self.get_etag(request, report)
+        if if_range.startswith(('"', "W/")):
+            return etag is not None and if_range == etag
+        last_modified = self.get_last_modified(report)
+        return last_modified is not None and if_range == http_date(last_modified)
+
+
+class XAccelRedirectDownload(DownloadStrategy):
+    """
+    Hand the file over to nginx with an ``X-Accel-Redirect`` header. The
+    ``OSCAR_REPORTS_X_ACCEL_REDIRECT_PREFIX`` URL must be an ``internal``
+    nginx location serving the storage's files. Enable ``gunzip`` there to
+    decompress gzipped reports for browsers which don't accept them.
+    """
+
+    header = "X-Accel-Redirect"
+
+    def get_file_location(self, report: Report) -> str:
+        prefix = getattr(
+            settings, "OSCAR_REPORTS_X_ACCEL_REDIRECT_PREFIX", "/protected/"
+        )
+        return "{prefix}/{name}".format(
+            prefix=prefix.rstrip("/"), name=report.report_file.name
+        )
+
+    def get_response(
+        self,
+        request: HttpRequest,
+        report: Report,
+        filename: str,
+    ) -> HttpResponseBase:
+        response = HttpResponse()
+        self.set_file_headers(request, response, report, filename)
+        response[self.header] = self.get_file_location(report)
+        return response
+
+
+class XSendfileDownload(XAccelRedirectDownload):
+    """
+    Hand the file over to Apache's mod_xsendfile (or lighttpd) with an
+    ``X-Sendfile`` header. Only works with storages on the local filesystem.
+    """
+
+    header = "X-Sendfile"
+
+    def get_file_location(self, report: Report) -> str:
+        return report.report_file.path
+
+
+class SignedURLDownload(DownloadStrategy):
+    """
+    Redirect to the storage's URL for the file, for storages which sign their
+    URLs (e.g. S3 with ``querystring_auth``), so that the storage serves it.
+    """
+
+    def get_response(
+        self,
+        request: HttpRequest,
+        report: Report,
+        filename: str,
+    ) -> HttpResponseBase:
+        expire = getattr(settings, "OSCAR_REPORTS_SIGNED_URL_EXPIRE", None)
+        # Only some storages (e.g. S3) accept an expiry
+        storage: Any = report.report_file.storage
+        if expire is None:
+            url = storage.url(report.report_file.name)
+        else:
+            url = storage.url(report.report_file.name, expire=expire)
+        return HttpResponseRedirect(url)
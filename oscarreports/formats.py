@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+from django.utils.translation import gettext_lazy as _
+
+from . import columnar, xlsx
+from .streaming import FileFormatter
+
+CSV = "CSV"
+
+# Formats reports can be written in, as offered on the dashboard
+FORMAT_CHOICES = [
+    (CSV, _("CSV")),
+    (xlsx.XLSX, _("Excel (XLSX)")),
+    (columnar.COLUMNAR, _("Columnar (Parquet)")),
+]
+
+
+def get_file_formatter_class(report_format: str) -> type[FileFormatter] | None:
+    # The formatter which writes the rows of a generator's CSV formatter in
+    # the given format, for generators without a formatter of their own
+    if report_format == xlsx.XLSX:
+        return xlsx.XLSXFormatter
+    if report_format == columnar.COLUMNAR:
+        return columnar.get_formatter_class()
+    return None
+
+
+def get_extension(report_format: str) -> str:
+    # File extension of reports written in the given format
+    formatter_class = get_file_formatter_class(report_format)
+    if formatter_class is not None:
+        return formatter_class.extension
+    return report_format.lower()
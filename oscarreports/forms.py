@@ -4,9 +4,12 @@ from datetime import datetime
 from typing import Any
 
 from django import forms
+from django.utils.formats import localize
 from django.utils.translation import gettext_lazy as _
+from oscar.apps.dashboard.reports.reports import ReportGenerator
 from oscar.forms.widgets import DateTimePickerInput
 
+from . import costs, formats
 from .utils import GeneratorRepository
 
 
@@ -36,13 +39,25 @@ class ReportForm(forms.Form):
         widget=DateTimePickerInput,
     )
 
-    def __init__(self, *args: Any, **kwargs: Any) -> None:
+    report_format = forms.ChoiceField(
+        choices=formats.FORMAT_CHOICES,
+        initial=formats.CSV,
+        required=False,
+        label=_("Format"),
+    )
+
+    def __init__(self, *args: Any, preview: bool = False, **kwargs: Any) -> None:
         super().__init__(*args, **kwargs)
+        # Previews read only their first rows, so aren't limited by cost
+        self.preview = preview
         # get any newly registered generators
         type_choices = [
             ((generator.code, generator.description)) for generator in self.generators
         ]
         self.fields["report_type"].choices = type_choices  # type:ignore[attr-defined]
+        # Set by clean(), from the cost estimate of the chosen report
+        self.estimated_rows: int | None = None
+        self.run_after: datetime | None = None
 
     def clean(self) -> dict[str, str | datetime | None]:
         date_from = self.cleaned_data.get("date_from", None)
@@ -54,4 +69,53 @@ class ReportForm(forms.Form):
             raise forms.ValidationError(
                 _("Your start date must be before your end date")
             )
+        if "report_type" in self.cleaned_data and not self.preview:
+            self.check_cost(self.cleaned_data["report_type"], date_from, date_to)
         return self.cleaned_data
+
+    def check_cost(
+        self,
+        type_code: str,
+        date_from: datetime | None,
+        date_to: datetime | None,
+    ) -> None:
+        # Refuse reports estimated over their type's hard row limit, and hold
+        # those over the soft limit until off-peak hours
+        generator = self.get_generator(type_code, date_from, date_to)
+        if generator is None:
+            return
+        self.estimated_rows = costs.estimate_rows(generator)
+        if self.estimated_rows is None:
+            return
+        hard_limit = costs.get_hard_row_limit(type_code)
+        if hard_limit is not None and self.estimated_rows >= hard_limit:
+            raise forms.ValidationError(
+                _(
+                    "This report is estimated to return about %(rows)s rows, "
+                    "over the limit of %(limit)s. Please choose a shorter "
+                    "date range."
+                )
+                % {
+                    "rows": localize(self.estimated_rows),
+                    "limit": localize(hard_limit),
+                }
+            )
+        soft_limit = costs.get_soft_row_limit(type_code)
+        if soft_limit is not None and self.estimated_rows >= soft_limit:
+            self.run_after = costs.get_off_peak_start()
+
+    def get_generator(
+        self,
+        type_code: str,
+        date_from: datetime | None,
+        date_to: datetime | None,
+    ) -> ReportGenerator | None:
+        # The chosen report's generator, with its CSV formatter
+        generator_class = GeneratorRepository().get_generator(type_code)
+        if not generator_class:
+            return None
+        return generator_class(
+            start_date=date_from,
+            end_date=date_to,
+            formatter=formats.CSV,
+        )
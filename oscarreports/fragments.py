@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+from collections.abc import Callable, Iterator
+from datetime import date, timedelta
+from typing import IO, Any
+import tempfile
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import Storage
+from django.db.models import Count, Max
+from django.db.models.functions import TruncDate
+from django.db.models.query import QuerySet
+from django.utils import timezone
+from oscar.apps.dashboard.reports.reports import ReportGenerator
+
+from . import sharding, streaming
+from .streaming import ReportOutput
+
+
+def is_enabled(type_code: str) -> bool:
+    # Report types whose output is cached per day, e.g.
+    # OSCAR_REPORTS_FRAGMENT_CACHE = ["order_report"]
+    return type_code in getattr(settings, "OSCAR_REPORTS_FRAGMENT_CACHE", [])
+
+
+def get_generator_version(generator: ReportGenerator) -> str:
+    # Bump ``report_version`` on a generator class to invalidate its fragments
+    return str(getattr(generator, "report_version", "1"))
+
+
+def get_fragment_dir(generator: ReportGenerator, report_format: str, day: date) -> str:
+    prefix = getattr(settings, "OSCAR_REPORTS_UPLOAD_PREFIX", "oscar-reports")
+    return "{prefix}/fragments/{code}/{version}/{format}/{day}".format(
+        prefix=prefix,
+        code=generator.code,
+        version=get_generator_version(generator),
+        format=report_format.lower(),
+        day=day.isoformat(),
+    )
+
+
+def get_day_fingerprints(generator: ReportGenerator) -> dict[date, tuple[int, Any]]:
+    """
+    Summarise the rows of each day in the generator's date range as a tuple of
+    (row count, highest primary key), so that a cached fragment is only reused
+    while its day's rows are unchanged.
+    """
+    queryset = generator.queryset
+    if not isinstance(queryset, QuerySet) or not generator.date_range_field_name:
+        return {}
+    rows = (
+        queryset.order_by()
+        .annotate(report_day=TruncDate(generator.date_range_field_name))
+        .values("report_day")
+        .annotate(num_rows=Count("pk"), max_pk=Max("pk"))
+    )
+    return {row["report_day"]: (row["num_rows"], row["max_pk"]) for row in rows}
+
+
+def _delete_stale_fragments(storage: Storage, dirname: str, keep: str) -> None:
+    try:
+        _, filenames = storage.listdir(dirname)
+    except (NotImplementedError, FileNotFoundError):
+        return
+    for filename in filenames:
+        name = f"{dirname}/{filename}"
+        if name != keep:
+            storage.delete(name)
+
+
+def write_report(
+    generator: ReportGenerator,
+    start_date: date,
+    end_date: date,
+    get_day_generator: Callable[[date], ReportGenerator],
+    report_format: str,
+    output: ReportOutput,
+    storage: Storage,
+) -> str:
+    """
+    Write the report for ``generator``'s (inclusive) date range ``start_date``
+    to ``end_date`` into ``output``, one day at a time. Days before today are
+    stored as fragments and reused by later reports covering the same day, as
+    long as the day's rows haven't changed.
+    Returns the MIME type of the written content.
+    """
+    today = timezone.localdate()
+    fingerprints = get_day_fingerprints(generator)
+    days = [
+        start_date + timedelta(days=i) for i in range((end_date - start_date).days + 1)
+    ]
+    if sharding.is_ordered_by_date_descending(generator):
+        days.reverse()
+    mime_types: list[str] = []
+
+    def iter_parts() -> Iterator[IO[bytes]]:
+        for day in days:
+            dirname = get_fragment_dir(generator, report_format, day)
+            num_rows, max_pk = fingerprints.get(day, (0, None))
+            name = "{dir}/{num_rows}-{max_pk}.{ext}".format(
+                dir=dirname,
+                num_rows=num_rows,
+                max_pk=max_pk,
+                ext=report_format.lower(),
+            )
+            cacheable = day < today
+            if cacheable and storage.exists(name):
+                output.add_rows(num_rows)
+                with storage.open(name, "rb") as fragment:
+                    yield fragment
+                continue
+            with tempfile.SpooledTemporaryFile(
+                max_size=streaming.get_spool_size()
+            ) as content:
+                day_output = ReportOutput(content)
+                mime_types.append(
+                    streaming.write_report(get_day_generator(day), day_output)
+                )
+                output.add_rows(day_output.row_count or 0)
+                output.add_timings(day_output)
+                if cacheable:
+                    content.seek(0)
+                    # If another worker stored the same fragment concurrently,
+                    # the copy saved here under an alternate name is removed.
+                    storage.save(name, File(content))
+                    _delete_stale_fragments(storage, dirname, keep=name)
+                content.seek(0)
+                yield content
+
+    sharding.concatenate(iter_parts(), output)
+    if mime_types:
+        return mime_types[0]
+    return getattr(generator, "content_type", "text/csv")
@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+from typing import Any
+
+from django.db.models import Max, QuerySet, Sum
+from django.http import HttpResponse
+from django.utils.translation import gettext_lazy as _
+from oscar.apps.dashboard.reports.reports import (
+    ReportCSVFormatter,
+    ReportGenerator,
+    ReportHTMLFormatter,
+)
+
+from .models import OfferDailyRollup, OrderDailyRollup
+
+
+class OrderSummaryReportCSVFormatter(ReportCSVFormatter):
+    filename_template = "order-summary-%s-to-%s.csv"
+
+    def generate_csv(self, response: HttpResponse, rollups: Any) -> None:
+        writer = self.get_csv_writer(response)
+        writer.writerow(
+            [
+                _("Date"),
+                _("Currency"),
+                _("Number of orders"),
+                _("Total excl. tax"),
+                _("Total incl. tax"),
+            ]
+        )
+        for rollup in rollups:
+            writer.writerow(
+                [
+                    rollup.day.isoformat(),
+                    rollup.currency,
+                    rollup.num_orders,
+                    rollup.total_excl_tax,
+                    rollup.total_incl_tax,
+                ]
+            )
+
+    def filename(self, **kwargs: Any) -> str:
+        return self.filename_template % (kwargs["start_date"], kwargs["end_date"])
+
+
+class OrderSummaryReportGenerator(ReportGenerator):
+    """
+    Order totals per day and currency, read from the daily rollups instead of
+    the order table. Only registered when ``OSCAR_REPORTS_ROLLUPS`` is set.
+    """
+
+    code = "order_summary"
+    description = _("Daily order totals")
+    date_range_field_name = "day"
+    model_class = OrderDailyRollup
+
+    formatters = {
+        "CSV_formatter": OrderSummaryReportCSVFormatter,
+        "HTML_formatter": ReportHTMLFormatter,
+    }
+
+    def get_queryset(self) -> QuerySet[Any, Any]:
+        return OrderDailyRollup.objects.order_by("day", "currency")
+
+    def generate(self) -> Any:
+        additional_data = {"start_date": self.start_date, "end_date": self.end_date}
+        return self.formatter.generate_response(
+            self.queryset,  # type:ignore[arg-type]
+            **additional_data,
+        )
+
+
+class OfferSummaryReportCSVFormatter(ReportCSVFormatter):
+    filename_template = "offer-summary-%s-to-%s.csv"
+
+    def generate_csv(self, response: HttpResponse, offers: Any) -> None:
+        writer = self.get_csv_writer(response)
+        writer.writerow(
+            [
+                _("Offer"),
+                _("Number of orders"),
+                _("Total discount"),
+            ]
+        )
+        for offer in offers:
+            writer.writerow(
+                [
+                    offer["name"],
+                    offer["orders"],
+                    offer["discount"],
+                ]
+            )
+
+    def filename(self, **kwargs: Any) -> str:
+        return self.filename_template % (kwargs["start_date"], kwargs["end_date"])
+
+
+class OfferSummaryReportGenerator(ReportGenerator):
+    """
+    Discount totals per offer across the whole date range, read from the daily
+    rollups instead of the order discount table. Only registered when
+    ``OSCAR_REPORTS_ROLLUPS`` is set.
+    """
+
+    code = "offer_summary"
+    description = _("Offer discount totals")
+    model_class = OfferDailyRollup
+
+    formatters = {
+        "CSV_formatter": OfferSummaryReportCSVFormatter,
+        "HTML_formatter": ReportHTMLFormatter,
+    }
+
+    # The date range is applied before the per-offer totals are summed (see
+    # ``get_queryset``), rather than through ``date_range_field_name``, so that
+    # the report isn't split into per-day parts which can't be added together.
+    def get_queryset(self) -> QuerySet[Any, Any]:
+        rollups = OfferDailyRollup.objects.all()
+        if self.start_date:
+            rollups = rollups.filter(day__gte=self.start_date)
+        if self.end_date:
+            rollups = rollups.filter(day__lte=self.end_date)
+        return (
+            rollups.values("offer_id")
+            .annotate(
+                name=Max("offer_name"),
+                orders=Sum("num_orders"),
+                discount=Sum("total_discount"),
+            )
+            .order_by("-discount", "offer_id")
+        )
+
+    def generate(self) -> Any:
+        additional_data = {"start_date": self.start_date, "end_date": self.end_date}
+        return self.formatter.generate_response(
+            self.queryset,  # type:ignore[arg-type]
+            **additional_data,
+        )
@@ -1,10 +1,14 @@
 from __future__ import annotations
 
+from functools import partial
 from typing import Any
 
+from django.db import transaction
 from django.db.models.signals import pre_delete
 from django.dispatch import receiver
+from oscar.apps.order.signals import order_placed
 
+from . import rollups
 from .models import Report
 
 
@@ -16,3 +20,16 @@ def auto_delete_report_file(
 ) -> None:
     if instance.report_file:
         instance.report_file.delete(save=False)
+    if instance.profile_file:
+        instance.profile_file.delete(save=False)
+    # Finished reports have already removed (or merged) their partial files
+    if not instance.is_finished:
+        instance.delete_shard_files()
+        instance.delete_checkpoint_files()
+
+
+@receiver(order_placed)
+def add_order_to_rollups(sender: Any, order: Any, **kwargs: Any) -> None:
+    # Count the order once it's committed, so a rolled back order never is
+    if rollups.is_enabled():
+        transaction.on_commit(partial(rollups.add_order, order.pk))
@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+from argparse import ArgumentParser
+from typing import Any
+import json
+
+from django.core.management.base import BaseCommand
+
+from ... import benchmark
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark report generation against synthetic order data, writing "
+        "the results as JSON."
+    )
+
+    def add_arguments(self, parser: ArgumentParser) -> None:
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=0,
+            metavar="ORDERS",
+            help="Insert this many synthetic orders before benchmarking",
+        )
+        parser.add_argument(
+            "--lines-per-order",
+            type=int,
+            default=2,
+            help="Number of lines on each synthetic order",
+        )
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=30,
+            help="Days over which orders are placed, and which reports cover",
+        )
+        parser.add_argument(
+            "--type",
+            action="append",
+            dest="type_codes",
+            default=[],
+            help="Only benchmark this report type (may be repeated)",
+        )
+        parser.add_argument(
+            "--format",
+            action="append",
+            dest="formats",
+            default=[],
+            help="Only benchmark this report format (may be repeated)",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=1,
+            help="Number of times to generate each report",
+        )
+        parser.add_argument(
+            "--trace-memory",
+            action="store_true",
+            help="Measure the peak memory allocated by each report (slower)",
+        )
+        parser.add_argument(
+            "--clear",
+            action="store_true",
+            help="Delete previously seeded data before seeding",
+        )
+        parser.add_argument(
+            "--output",
+            help="Write the results to this file instead of stdout",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        if options["clear"]:
+            benchmark.clear_seeded_data()
+        seeded = {}
+        if options["seed"]:
+            seeded = benchmark.seed_orders(
+                options["seed"],
+                lines_per_order=options["lines_per_order"],
+                days=options["days"],
+            )
+        results = {
+            "environment": benchmark.get_environment(),
+            "seeded": seeded,
+            "results": list(
+                benchmark.run_benchmarks(
+                    type_codes=options["type_codes"],
+                    formats=options["formats"],
+                    repeat=options["repeat"],
+                    days=options["days"],
+                    trace_memory=options["trace_memory"],
+                )
+            ),
+        }
+        output = json.dumps(results, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                f.write(output + "\n")
+        else:
+            self.stdout.write(output)
@@ -0,0 +1,20 @@
+from __future__ import annotations
+
+from typing import Any
+
+from django.core.management.base import BaseCommand
+
+from ... import reaper
+
+
+class Command(BaseCommand):
+    help = (
+        "Re-queue or fail reports whose tasks have died. Run this periodically, "
+        "e.g. from cron, or enqueue the reap_stale_reports task instead."
+    )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        reaped = reaper.reap_stale_reports()
+        self.stdout.write(
+            "Re-queued {requeued} and failed {failed} stale reports".format(**reaped)
+        )
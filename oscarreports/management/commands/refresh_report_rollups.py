@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+from datetime import date, timedelta
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandParser
+from django.utils import timezone
+
+from ... import rollups
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the daily order and offer rollups from the order tables. Run "
+        "this nightly, e.g. from cron, or enqueue the refresh_report_rollups "
+        "task instead."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=None,
+            help="Number of recent days to rebuild (default: "
+            "OSCAR_REPORTS_ROLLUP_REFRESH_DAYS)",
+        )
+        parser.add_argument(
+            "--since",
+            type=date.fromisoformat,
+            default=None,
+            help="Rebuild every day since this date (YYYY-MM-DD), e.g. to backfill",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        today = timezone.localdate()
+        if options["since"] is not None:
+            start_date = options["since"]
+        else:
+            days = options["days"]
+            if days is None:
+                days = rollups.get_refresh_days()
+            start_date = today - timedelta(days=days)
+        written = rollups.refresh(start_date, today)
+        self.stdout.write(
+            "Rebuilt {orders} order rollups and {offers} offer rollups".format(
+                **written
+            )
+        )
@@ -0,0 +1,21 @@
+from __future__ import annotations
+
+from typing import Any
+
+from django.core.management.base import BaseCommand
+
+from ... import scheduler
+
+
+class Command(BaseCommand):
+    help = (
+        "Queue the reports of schedules which are due. Run this every few "
+        "minutes, e.g. from cron, or enqueue the run_report_schedules task instead."
+    )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        ran = scheduler.run_due_schedules()
+        self.stdout.write(
+            "Queued {queued} scheduled reports, skipped {skipped} and "
+            "{failed} failed".format(**ran)
+        )
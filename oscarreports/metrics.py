@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+from collections.abc import Callable, Iterator
+from contextlib import ExitStack, contextmanager
+from typing import Any
+import sys
+import time
+
+from django.db import connections
+
+from .streaming import ReportOutput
+
+try:
+    import resource
+except ImportError:  # pragma: no cover (Windows)
+    resource = None  # type:ignore[assignment]
+
+
+def get_peak_rss() -> int | None:
+    # Peak resident set size of this process so far, in bytes
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class QueryCounter:
+    """
+    Database execute wrapper which counts the queries run through it.
+    """
+
+    def __init__(self) -> None:
+        self.count = 0
+
+    def __call__(
+        self,
+        execute: Callable[..., Any],
+        sql: str,
+        params: Any,
+        many: bool,
+        context: dict[str, Any],
+    ) -> Any:
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class ReportMetrics:
+    """
+    Per-phase durations (in seconds) and resource usage of a report's
+    generation, stored on ``Report.metrics``.
+
+    Generation is split into ``query`` (waiting for rows from the database),
+    ``write`` (encoding, compressing and buffering output) and ``format``
+    (everything else the generator and formatter do). ``upload`` is the time
+    taken saving the file to storage and ``notify`` sending the alert email.
+    """
+
+    def __init__(self) -> None:
+        self.phases: dict[str, float] = {}
+        self.queries = 0
+        self.rows: int | None = None
+        self.bytes_written: int | None = None
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+    def add_time(self, name: str, seconds: float) -> None:
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    @contextmanager
+    def count_queries(self) -> Iterator[None]:
+        counter = QueryCounter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(counter))
+            try:
+                yield
+            finally:
+                self.queries += counter.count
+
+    @contextmanager
+    def generation(self, output: ReportOutput) -> Iterator[None]:
+        # Split the time spent generating the report into ``output`` into the
+        # query, format and write phases.
+        read_time, write_time = output.read_time, output.write_time
+        start = time.perf_counter()
+        with self.count_queries():
+            try:
+                yield
+            finally:
+                elapsed = time.perf_counter() - start
+                read_time = output.read_time - read_time
+                write_time = output.write_time - write_time
+                self.add_time("query", read_time)
+                self.add_time("write", write_time)
+                self.add_time("format", max(elapsed - read_time - write_time, 0.0))
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "phases": {name: round(secs, 6) for name, secs in self.phases.items()},
+            "queries": self.queries,
+            "rows": self.rows,
+            "bytes_written": self.bytes_written,
+            "peak_rss": get_peak_rss(),
+        }
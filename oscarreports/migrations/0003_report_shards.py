@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("reports_dashboard", "0002_alter_report_task_id"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="report",
+            name="shard_count",
+            field=models.PositiveSmallIntegerField(
+                default=1, verbose_name="Shard Count"
+            ),
+        ),
+        migrations.AddField(
+            model_name="report",
+            name="shards_completed",
+            field=models.PositiveSmallIntegerField(
+                default=0, verbose_name="Shards Completed"
+            ),
+        ),
+    ]
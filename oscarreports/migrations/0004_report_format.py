@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("reports_dashboard", "0003_report_shards"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="report",
+            name="report_format",
+            field=models.CharField(
+                default="CSV", max_length=20, verbose_name="Report Format"
+            ),
+        ),
+    ]
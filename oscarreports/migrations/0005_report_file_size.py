@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("reports_dashboard", "0004_report_format"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="report",
+            name="file_size",
+            field=models.PositiveBigIntegerField(
+                blank=True, null=True, verbose_name="File Size"
+            ),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("reports_dashboard", "0005_report_file_size"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="report",
+            name="row_count",
+            field=models.PositiveBigIntegerField(
+                blank=True, null=True, verbose_name="Row Count"
+            ),
+        ),
+        migrations.AddField(
+            model_name="report",
+            name="sha256",
+            field=models.CharField(
+                blank=True, max_length=64, verbose_name="SHA-256 Checksum"
+            ),
+        ),
+    ]
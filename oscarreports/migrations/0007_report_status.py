@@ -0,0 +1,57 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:41
+
+from django.db import migrations, models
+from django.db.backends.base.schema import BaseDatabaseSchemaEditor
+from django.db.migrations.state import StateApps
+
+
+def populate_status(apps: StateApps, schema_editor: BaseDatabaseSchemaEditor) -> None:
+    Report = apps.get_model("reports_dashboard", "Report")
+    db_alias = schema_editor.connection.alias
+    reports = Report.objects.using(db_alias)
+    reports.filter(completed_on__isnull=False).update(status="completed")
+    reports.filter(completed_on__isnull=True, started_on__isnull=False).update(
+        status="in-progress"
+    )
+    reports.filter(
+        completed_on__isnull=True, started_on__isnull=True, queued_on__isnull=False
+    ).update(status="queued")
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("reports_dashboard", "0006_report_row_count_sha256"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="report",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("created", "Created"),
+                    ("queued", "Queued"),
+                    ("in-progress", "In-Progress"),
+                    ("completed", "Completed"),
+                ],
+                default="created",
+                editable=False,
+                max_length=20,
+                verbose_name="Status",
+            ),
+        ),
+        migrations.RunPython(populate_status, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="report",
+            index=models.Index(
+                fields=["-created_on", "-id"], name="reports_created_on_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="report",
+            index=models.Index(
+                fields=["status", "-created_on", "-id"],
+                name="reports_status_created_on_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("reports_dashboard", "0007_report_status"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="report",
+            name="content_encoding",
+            field=models.CharField(
+                blank=True, max_length=20, verbose_name="Content Encoding"
+            ),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("reports_dashboard", "0008_report_content_encoding"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="report",
+            name="metrics",
+            field=models.JSONField(blank=True, default=dict, verbose_name="Metrics"),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:59
+
+from django.db import migrations, models
+
+import oscarreports.models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("reports_dashboard", "0009_report_metrics"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="report",
+            name="profile_file",
+            field=models.FileField(
+                blank=True,
+                null=True,
+                upload_to=oscarreports.models.get_profile_upload_path,
+                verbose_name="Profile File",
+            ),
+        ),
+        migrations.AddField(
+            model_name="report",
+            name="profile_mode",
+            field=models.CharField(
+                blank=True,
+                choices=[
+                    ("cprofile", "cProfile"),
+                    ("tracemalloc", "tracemalloc"),
+                    ("all", "cProfile and tracemalloc"),
+                ],
+                help_text="Profile the generation of this report",
+                max_length=20,
+                verbose_name="Profile Mode",
+            ),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("reports_dashboard", "0010_report_profile"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="report",
+            name="cancelled_on",
+            field=models.DateTimeField(
+                blank=True, null=True, verbose_name="Cancelled On"
+            ),
+        ),
+        migrations.AddField(
+            model_name="report",
+            name="failed_on",
+            field=models.DateTimeField(blank=True, null=True, verbose_name="Failed On"),
+        ),
+        migrations.AddField(
+            model_name="report",
+            name="retries",
+            field=models.PositiveSmallIntegerField(default=0, verbose_name="Retries"),
+        ),
+        migrations.AlterField(
+            model_name="report",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("created", "Created"),
+                    ("queued", "Queued"),
+                    ("in-progress", "In-Progress"),
+                    ("completed", "Completed"),
+                    ("cancelled", "Cancelled"),
+                    ("failed", "Failed"),
+                ],
+                default="created",
+                editable=False,
+                max_length=20,
+                verbose_name="Status",
+            ),
+        ),
+    ]
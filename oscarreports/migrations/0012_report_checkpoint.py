@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("reports_dashboard", "0011_report_cancelled_failed"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="report",
+            name="checkpoint",
+            field=models.JSONField(blank=True, default=dict, verbose_name="Checkpoint"),
+        ),
+    ]
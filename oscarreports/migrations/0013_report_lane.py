@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("reports_dashboard", "0012_report_checkpoint"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="report",
+            name="lane",
+            field=models.CharField(blank=True, max_length=20, verbose_name="Lane"),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("reports_dashboard", "0013_report_lane"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="report",
+            name="run_after",
+            field=models.DateTimeField(blank=True, null=True, verbose_name="Run After"),
+        ),
+    ]
@@ -0,0 +1,114 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:43
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+import oscarreports.cron
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("reports_dashboard", "0014_report_run_after"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ReportSchedule",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=100, verbose_name="Name")),
+                (
+                    "type_code",
+                    models.CharField(max_length=50, verbose_name="Type Code"),
+                ),
+                (
+                    "report_format",
+                    models.CharField(
+                        default="CSV", max_length=20, verbose_name="Report Format"
+                    ),
+                ),
+                (
+                    "window_days",
+                    models.PositiveSmallIntegerField(
+                        default=1,
+                        help_text="Number of whole days to report on, up to the end of the day before each run. Zero reports on all dates.",
+                        verbose_name="Window (days)",
+                    ),
+                ),
+                (
+                    "cadence",
+                    models.CharField(
+                        help_text='A cron expression in local time, e.g. "0 5 * * 1-5" for 5am on weekdays',
+                        max_length=100,
+                        validators=[oscarreports.cron.validate_cron_expression],
+                        verbose_name="Cadence",
+                    ),
+                ),
+                (
+                    "recipients",
+                    models.TextField(
+                        blank=True,
+                        help_text="Email addresses to notify when each report is ready, in addition to the owner. Separate them with commas or new lines.",
+                        verbose_name="Recipients",
+                    ),
+                ),
+                (
+                    "is_active",
+                    models.BooleanField(default=True, verbose_name="Is Active"),
+                ),
+                (
+                    "created_on",
+                    models.DateTimeField(auto_now_add=True, verbose_name="Created On"),
+                ),
+                (
+                    "last_run_on",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="Last Run On"
+                    ),
+                ),
+                (
+                    "next_run_on",
+                    models.DateTimeField(
+                        blank=True, db_index=True, null=True, verbose_name="Next Run On"
+                    ),
+                ),
+                (
+                    "owner",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Owner",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Report schedule",
+                "verbose_name_plural": "Report schedules",
+            },
+        ),
+        migrations.AddField(
+            model_name="report",
+            name="schedule",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="reports",
+                to="reports_dashboard.reportschedule",
+                verbose_name="Schedule",
+            ),
+        ),
+    ]
@@ -0,0 +1,115 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("reports_dashboard", "0015_report_schedule"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="OfferDailyRollup",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("day", models.DateField(verbose_name="Day")),
+                ("offer_id", models.PositiveIntegerField(verbose_name="Offer ID")),
+                (
+                    "offer_name",
+                    models.CharField(
+                        blank=True, max_length=128, verbose_name="Offer name"
+                    ),
+                ),
+                (
+                    "num_orders",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Number of Orders"
+                    ),
+                ),
+                (
+                    "total_discount",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=0,
+                        max_digits=20,
+                        verbose_name="Total discount",
+                    ),
+                ),
+                (
+                    "updated_on",
+                    models.DateTimeField(auto_now=True, verbose_name="Updated On"),
+                ),
+            ],
+            options={
+                "verbose_name": "Daily offer rollup",
+                "verbose_name_plural": "Daily offer rollups",
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("day", "offer_id"), name="reports_offer_rollup_day_uniq"
+                    )
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="OrderDailyRollup",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("day", models.DateField(verbose_name="Day")),
+                ("currency", models.CharField(max_length=12, verbose_name="Currency")),
+                (
+                    "num_orders",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Number of Orders"
+                    ),
+                ),
+                (
+                    "total_incl_tax",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=0,
+                        max_digits=20,
+                        verbose_name="Total (inc. tax)",
+                    ),
+                ),
+                (
+                    "total_excl_tax",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=0,
+                        max_digits=20,
+                        verbose_name="Total (excl. tax)",
+                    ),
+                ),
+                (
+                    "updated_on",
+                    models.DateTimeField(auto_now=True, verbose_name="Updated On"),
+                ),
+            ],
+            options={
+                "verbose_name": "Daily order rollup",
+                "verbose_name_plural": "Daily order rollups",
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("day", "currency"), name="reports_order_rollup_day_uniq"
+                    )
+                ],
+            },
+        ),
+    ]
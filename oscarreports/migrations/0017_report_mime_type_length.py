@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:52
+
+from django.db import migrations
+import oscar.models.fields
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("reports_dashboard", "0016_daily_rollups"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="report",
+            name="mime_type",
+            field=oscar.models.fields.NullCharField(
+                max_length=100, verbose_name="MIME Type"
+            ),
+        ),
+    ]
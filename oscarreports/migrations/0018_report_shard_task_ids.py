@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("reports_dashboard", "0017_report_mime_type_length"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="report",
+            name="shard_task_ids",
+            field=models.JSONField(
+                blank=True,
+                default=list,
+                editable=False,
+                verbose_name="Shard Task IDs",
+            ),
+        ),
+    ]
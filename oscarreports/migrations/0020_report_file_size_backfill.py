@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:55
+
+from django.db import migrations
+from django.db.backends.base.schema import BaseDatabaseSchemaEditor
+from django.db.migrations.state import StateApps
+
+
+def populate_file_size(
+    apps: StateApps, schema_editor: BaseDatabaseSchemaEditor
+) -> None:
+    Report = apps.get_model("reports_dashboard", "Report")
+    db_alias = schema_editor.connection.alias
+    reports = (
+        Report.objects.using(db_alias)
+        .filter(status="completed", file_size__isnull=True)
+        .exclude(report_file="")
+        .only("pk", "report_file")
+    )
+    for report in reports.iterator():
+        try:
+            report.file_size = report.report_file.size
+        except OSError:
+            # The file is gone, so there's no size to show
+            continue
+        report.save(update_fields=["file_size"])
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("reports_dashboard", "0019_report_requesters"),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_file_size, migrations.RunPython.noop),
+    ]
@@ -1,17 +1,24 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
-import io
+from collections.abc import Iterable
+from datetime import date, datetime, timedelta
+from itertools import chain
+from typing import TYPE_CHECKING, Any
 import os.path
+import tempfile
 import uuid
 
 from django.conf import settings
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.postgres.fields import DateTimeRangeField
 from django.contrib.sites.models import Site
+from django.core.exceptions import ImproperlyConfigured, ValidationError
+from django.core.files import File
 from django.core.mail import EmailMultiAlternatives
-from django.db import models, transaction
-from django.http import HttpResponse
+from django.core.validators import validate_email
+from django.db import connections, models, transaction
+from django.db.models import F, Q
+from django.db.models.functions import Coalesce
 from django.template.loader import get_template
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
@@ -19,18 +26,45 @@ from django_stubs_ext import StrOrPromise
 from oscar.apps.dashboard.reports.reports import ReportGenerator
 from oscar.models.fields import NullCharField
 
-from . import tasks
+from . import (
+    checkpoints,
+    compression,
+    cron,
+    formats,
+    fragments,
+    profiling,
+    queueing,
+    routing,
+    sharding,
+    signals,
+    streaming,
+    tasks,
+)
+from .metrics import ReportMetrics
+from .progress import Progress, ProgressTracker, ReportCancelled, get_progress
 
 if TYPE_CHECKING:
     from django_tasks import TaskResult
 
 from .utils import GeneratorRepository
 
+try:
+    try:
+        from psycopg.types.range import Range as DateTimeTZRange
+    except ImportError:
+        from psycopg2.extras import DateTimeTZRange
+except ImportError:
+    raise ImproperlyConfigured("Error loading psycopg2 or psycopg module")
+
 
 def get_report_upload_path(instance: Report, filename: str) -> str:
     # Upload files to {MEDIA_ROOT}/{OSCAR_REPORTS_UPLOAD_PREFIX}/{YYYY}/{MM}/{DD}/{uuid}.{ext}
     prefix = getattr(settings, "OSCAR_REPORTS_UPLOAD_PREFIX", "oscar-reports")
-    extension = os.path.splitext(filename)[1].replace(".", "")
+    name, extension = os.path.splitext(filename)
+    if extension == ".gz":
+        # Keep the extension of the compressed file, e.g. "csv.gz"
+        extension = os.path.splitext(name)[1] + extension
+    extension = extension.lstrip(".")
     return "{prefix}/{date}/{uuid}.{ext}".format(
         prefix=prefix,
         date=instance.created_on.strftime("%Y/%m/%d"),
@@ -39,16 +73,102 @@ def get_report_upload_path(instance: Report, filename: str) -> str:
     )
 
 
+def get_profile_upload_path(instance: Report, filename: str) -> str:
+    # Store profiles next to the report file, as {uuid}.profile.zip
+    path = get_report_upload_path(instance, filename)
+    return "{}.profile.zip".format(path.rsplit(".", 1)[0])
+
+
+def get_in_flight_timeout() -> timedelta:
+    # Unfinished reports older than this are assumed to have died, and no
+    # longer stop identical reports from being queued.
+    seconds = getattr(settings, "OSCAR_REPORTS_IN_FLIGHT_TIMEOUT", 60 * 60)
+    return timedelta(seconds=seconds)
+
+
+def get_reuse_window() -> timedelta:
+    # Completed reports younger than this are reused instead of generating an
+    # identical report again.
+    seconds = getattr(settings, "OSCAR_REPORTS_REUSE_COMPLETED_WITHIN", 5 * 60)
+    return timedelta(seconds=seconds)
+
+
+class ReportQuerySet(models.QuerySet["Report"]):
+    def identical_to(
+        self,
+        type_code: str,
+        date_range: Any,
+        report_format: str,
+    ) -> ReportQuerySet:
+        qs = self.filter(type_code=type_code, report_format=report_format)
+        if date_range is None:
+            return qs.filter(date_range__isnull=True)
+        return qs.filter(date_range=date_range)
+
+    def in_flight(self) -> ReportQuerySet:
+        return self.unfinished().filter(
+            created_on__gte=timezone.now() - get_in_flight_timeout(),
+        )
+
+    def running(self) -> ReportQuerySet:
+        # Queued or in progress, however long ago, until the reaper fails them.
+        # A new report's task is enqueued on commit, so it counts from the
+        # moment it's created, unless it's never queued.
+        return self.filter(
+            Q(status__in=[self.model.STATUS_QUEUED, self.model.STATUS_IN_PROGRESS])
+            | Q(
+                status=self.model.STATUS_CREATED,
+                created_on__gte=timezone.now() - get_in_flight_timeout(),
+            )
+        )
+
+    def unfinished(self) -> ReportQuerySet:
+        return self.filter(
+            completed_on__isnull=True,
+            cancelled_on__isnull=True,
+            failed_on__isnull=True,
+        )
+
+    def recently_completed(self) -> ReportQuerySet:
+        return self.filter(completed_on__gte=timezone.now() - get_reuse_window())
+
+    def get_duplicate(
+        self,
+        type_code: str,
+        date_range: Any,
+        report_format: str,
+    ) -> Report | None:
+        """
+        Find a report identical to the one described which is either still
+        being generated, or was completed recently enough to be reused.
+
+        Must be called inside a transaction. Until the transaction ends, it
+        holds a lock which makes concurrent callers for the same report wait,
+        so that only one of them goes on to create and queue a new report.
+        """
+        key = f"oscarreports:{type_code}:{date_range}:{report_format}"
+        with connections[self.db].cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", [key])
+        qs = self.identical_to(type_code, date_range, report_format)
+        return (
+            (qs.in_flight() | qs.recently_completed()).order_by("-created_on").first()
+        )
+
+
 class Report(models.Model):
     STATUS_CREATED = "created"
     STATUS_QUEUED = "queued"
     STATUS_IN_PROGRESS = "in-progress"
     STATUS_COMPLETED = "completed"
+    STATUS_CANCELLED = "cancelled"
+    STATUS_FAILED = "failed"
     STATUS_NAMES = {
         STATUS_CREATED: _("Created"),
         STATUS_QUEUED: _("Queued"),
         STATUS_IN_PROGRESS: _("In-Progress"),
         STATUS_COMPLETED: _("Completed"),
+        STATUS_CANCELLED: _("Cancelled"),
+        STATUS_FAILED: _("Failed"),
     }
 
     # Unique ID used in URLs and filenames
@@ -74,6 +194,14 @@ class Report(models.Model):
         on_delete=models.SET_NULL,
         related_name="+",
     )
+    # Other users who asked for an identical report while this one was in
+    # flight, and are notified along with the owner when it completes
+    requesters = models.ManyToManyField(
+        settings.AUTH_USER_MODEL,
+        verbose_name=_("Requesters"),
+        blank=True,
+        related_name="+",
+    )
     type_code = models.CharField(_("Type Code"), max_length=50)
     description = models.TextField(_("Description"))
     date_range = DateTimeRangeField(  # type:ignore[misc]
@@ -92,25 +220,125 @@ class Report(models.Model):
         max_length=64,
     )
 
+    # Current status, derived from the status timestamps and stored so that
+    # reports can be filtered and sorted by it in the database.
+    status = models.CharField(
+        _("Status"),
+        max_length=20,
+        choices=list(STATUS_NAMES.items()),
+        default=STATUS_CREATED,
+        editable=False,
+    )
+
     # Status Timestamps
     created_on = models.DateTimeField(_("Created On"), auto_now_add=True)
     queued_on = models.DateTimeField(_("Queued On"), null=True, blank=True)
     started_on = models.DateTimeField(_("Started On"), null=True, blank=True)
     completed_on = models.DateTimeField(_("Completed On"), null=True, blank=True)
+    cancelled_on = models.DateTimeField(_("Cancelled On"), null=True, blank=True)
+    failed_on = models.DateTimeField(_("Failed On"), null=True, blank=True)
+
+    # Schedule which created the report, if any
+    schedule = models.ForeignKey(
+        "ReportSchedule",
+        verbose_name=_("Schedule"),
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name="reports",
+    )
+
+    # Task queue and priority lane the report was queued on
+    lane = models.CharField(_("Lane"), max_length=20, blank=True)
+    # Large reports are held until off-peak hours
+    run_after = models.DateTimeField(_("Run After"), null=True, blank=True)
+
+    # Number of times the report was queued again after its task died
+    retries = models.PositiveSmallIntegerField(_("Retries"), default=0)
 
     # Report File Output
-    mime_type = NullCharField(_("MIME Type"), max_length=20)
+    report_format = models.CharField(_("Report Format"), max_length=20, default="CSV")
+    mime_type = NullCharField(_("MIME Type"), max_length=100)
+    content_encoding = models.CharField(
+        _("Content Encoding"), max_length=20, blank=True
+    )
     report_file = models.FileField(
         _("Report File"), upload_to=get_report_upload_path, null=True, blank=True
     )
+    file_size = models.PositiveBigIntegerField(_("File Size"), null=True, blank=True)
+    row_count = models.PositiveBigIntegerField(_("Row Count"), null=True, blank=True)
+    sha256 = models.CharField(_("SHA-256 Checksum"), max_length=64, blank=True)
+
+    # Phase timings and resource usage of the report's generation
+    metrics = models.JSONField(_("Metrics"), default=dict, blank=True)
+
+    # Optional cProfile / tracemalloc capture of the report's generation
+    profile_mode = models.CharField(
+        _("Profile Mode"),
+        max_length=20,
+        blank=True,
+        choices=profiling.MODE_CHOICES,
+        help_text=_("Profile the generation of this report"),
+    )
+    profile_file = models.FileField(
+        _("Profile File"), upload_to=get_profile_upload_path, null=True, blank=True
+    )
+
+    # Progress of a checkpointed generation, from which it can be resumed
+    checkpoint = models.JSONField(_("Checkpoint"), default=dict, blank=True)
+
+    # Parallel generation of date range shards
+    shard_count = models.PositiveSmallIntegerField(_("Shard Count"), default=1)
+    shards_completed = models.PositiveSmallIntegerField(
+        _("Shards Completed"), default=0
+    )
+    # Background task IDs of the shards, which run before the merge task
+    shard_task_ids = models.JSONField(
+        _("Shard Task IDs"), default=list, blank=True, editable=False
+    )
+
+    objects = ReportQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Dashboard report list, newest first, optionally filtered by status
+            models.Index(
+                fields=["-created_on", "-id"],
+                name="reports_created_on_idx",
+            ),
+            models.Index(
+                fields=["status", "-created_on", "-id"],
+                name="reports_status_created_on_idx",
+            ),
+        ]
+
+    # Task results fetched in bulk by ``prefetch_task_results``
+    _task_result_cache: TaskResult[None] | None
+    _shard_task_results_cache: list[TaskResult[None] | None]
+    # Progress fetched in bulk by ``prefetch_progress``
+    _progress_cache: Progress | None
 
     def __str__(self) -> str:
         return str(self.uuid)
 
-    @property
-    def status(self) -> str:
+    def save(self, *args: Any, **kwargs: Any) -> None:
+        # Keep the stored status in sync with the status timestamps
+        self.status = self.get_status_from_timestamps()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and (
+            {"queued_on", "started_on", "completed_on", "cancelled_on", "failed_on"}
+            & set(update_fields)
+        ):
+            kwargs["update_fields"] = {"status", *update_fields}
+        super().save(*args, **kwargs)
+
+    def get_status_from_timestamps(self) -> str:
         if self.completed_on:
             return self.STATUS_COMPLETED
+        if self.cancelled_on:
+            return self.STATUS_CANCELLED
+        if self.failed_on:
+            return self.STATUS_FAILED
         if self.started_on:
             return self.STATUS_IN_PROGRESS
         if self.queued_on:
@@ -125,6 +353,14 @@ class Report(models.Model):
     def is_complete(self) -> bool:
         return self.status == self.STATUS_COMPLETED
 
+    @property
+    def is_finished(self) -> bool:
+        return self.status in (
+            self.STATUS_COMPLETED,
+            self.STATUS_CANCELLED,
+            self.STATUS_FAILED,
+        )
+
     @property
     def generator_class(
         self,
@@ -134,12 +370,67 @@ class Report(models.Model):
             raise ValueError("Can not queue report: no generator class was found.")
         return generator
 
+    @classmethod
+    def prefetch_task_results(cls, reports: Iterable[Report]) -> None:
+        reports = list(reports)
+        results = tasks.get_results(
+            chain(
+                (report.task_id for report in reports if report.task_id),
+                *(report.shard_task_ids for report in reports),
+            )
+        )
+        for report in reports:
+            report._task_result_cache = results.get(report.task_id or "")
+            report._shard_task_results_cache = [
+                results.get(task_id) for task_id in report.shard_task_ids
+            ]
+
+    @classmethod
+    def prefetch_progress(cls, reports: Iterable[Report]) -> None:
+        reports = list(reports)
+        progress = get_progress(
+            report.uuid for report in reports if report.status == cls.STATUS_IN_PROGRESS
+        )
+        for report in reports:
+            report._progress_cache = progress.get(str(report.uuid))
+
+    @property
+    def progress(self) -> Progress | None:
+        if self.status != self.STATUS_IN_PROGRESS:
+            return None
+        if self.shard_count > 1:
+            # Sharded reports only know how many of their shards have finished,
+            # not when, so have no ETA
+            started = self.started_on or timezone.now()
+            return Progress(self.shards_completed, self.shard_count, started, started)
+        if self.checkpoint:
+            # Checkpointed reports count the parts written so far
+            return Progress(
+                self.checkpoint["parts"],
+                len(self.checkpoint["date_ranges"]),
+                datetime.fromisoformat(self.checkpoint["started"]),
+                datetime.fromisoformat(self.checkpoint["updated"]),
+            )
+        if hasattr(self, "_progress_cache"):
+            return self._progress_cache
+        return get_progress([self.uuid]).get(str(self.uuid))
+
     @property
     def task_result(self) -> TaskResult[None] | None:
         if not self.task_id:
             return None
+        if hasattr(self, "_task_result_cache"):
+            return self._task_result_cache
         return tasks.generate_report.get_result(self.task_id)
 
+    @property
+    def shard_task_results(self) -> list[TaskResult[None] | None]:
+        # Results of the shard tasks, ``None`` for any the backend no longer has
+        if hasattr(self, "_shard_task_results_cache"):
+            return self._shard_task_results_cache
+        results = tasks.get_results(self.shard_task_ids)
+        return [results.get(task_id) for task_id in self.shard_task_ids]
+
     @property
     def task_status(self) -> str | None:
         result = self.task_result
@@ -150,65 +441,471 @@ class Report(models.Model):
     def queue(
         self,
         report_format: str = "CSV",
-    ) -> None:
-        # Reset metadata
-        generator = self.get_generator(report_format)
-        self.description = generator.report_description()
-        self.queued_on = None
-        self.started_on = None
-        self.completed_on = None
-        self.task_id = None
-        self.save(
-            update_fields=[
-                "description",
-                "queued_on",
-                "started_on",
-                "completed_on",
-                "task_id",
-            ]
-        )
+        resume: bool = False,
+        run_after: datetime | None = None,
+    ) -> datetime | None:
+        """
+        Queue the report's generation once the current transaction commits.
+        Returns when it's deferred until: ``run_after``, if the task backend
+        supports deferring tasks, otherwise ``None``.
+        """
+        with transaction.atomic():
+            # Refuse the report before touching any of its previous output
+            self.lock_limits()
+            queueing.check_limits(self)
+            # Remove the partial output of a previous run, unless it's to be resumed
+            if resume:
+                self.delete_shard_files()
+            else:
+                self.delete_partial_files()
+            # Reset metadata
+            generator = self.get_generator(report_format)
+            self.description = generator.report_description()
+            self.report_format = report_format
+            self.queued_on = None
+            self.started_on = None
+            self.completed_on = None
+            self.cancelled_on = None
+            self.failed_on = None
+            self.task_id = None
+            self.shard_count = max(len(self.get_shard_date_ranges(generator)), 1)
+            if profiling.get_mode(self):
+                # Profile the whole run in a single task
+                self.shard_count = 1
+            self.shards_completed = 0
+            self.shard_task_ids = []
+            self.row_count = None
+            self.lane = queueing.get_lane(generator)
+            self.run_after = queueing.get_run_after(
+                (
+                    tasks.generate_report_shard
+                    if self.shard_count > 1
+                    else tasks.generate_report
+                ),
+                run_after,
+            )
+            self.save(
+                update_fields=[
+                    "description",
+                    "report_format",
+                    "queued_on",
+                    "started_on",
+                    "completed_on",
+                    "cancelled_on",
+                    "failed_on",
+                    "task_id",
+                    "shard_count",
+                    "shards_completed",
+                    "shard_task_ids",
+                    "row_count",
+                    "lane",
+                    "run_after",
+                ]
+            )
 
-        # Defer enqueue AND task_id save until after commit
+        # Defer enqueue AND task_id save until after commit. The report is
+        # marked as queued first, since the task may start (or even finish)
+        # running before ``enqueue`` returns.
         def do_enqueue() -> None:
-            result = tasks.generate_report.enqueue(str(self.uuid), report_format)
             self.queued_on = timezone.now()
+            self.save(update_fields=["queued_on"])
+            if self.shard_count > 1:
+                # The final shard to complete enqueues the merge task, which
+                # then records its own task ID.
+                task = queueing.route(
+                    tasks.generate_report_shard, self.lane, self.run_after
+                )
+                self.shard_task_ids = [
+                    task.enqueue(str(self.uuid), report_format, shard_index).id
+                    for shard_index in range(self.shard_count)
+                ]
+                self.save(update_fields=["shard_task_ids"])
+                return
+            task = queueing.route(tasks.generate_report, self.lane, self.run_after)
+            result = task.enqueue(str(self.uuid), report_format)
             self.task_id = result.id
-            self.save(update_fields=["queued_on", "task_id"])
+            self.save(update_fields=["task_id"])
 
         transaction.on_commit(do_enqueue)
+        return self.run_after
 
     queue.alters_data = True  # type:ignore[attr-defined]
 
+    def lock_limits(self) -> None:
+        # Serialize queueing of reports sharing an owner or a type, while their
+        # concurrency limits are checked
+        keys = []
+        if queueing.get_owner_limit() is not None and self.owner_id is not None:
+            keys.append(f"oscarreports:owner:{self.owner_id}")
+        if queueing.get_type_limit(self.type_code) is not None:
+            keys.append(f"oscarreports:type:{self.type_code}")
+        if not keys:
+            return
+        with connections[self._state.db or "default"].cursor() as cursor:
+            for key in keys:
+                cursor.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", [key])
+
     def generate(self, report_format: str = "CSV") -> None:
+        self.check_cancelled()
         # Record start time
         self.started_on = timezone.now()
         self.save(update_fields=["started_on"])
-        # Generate report content
+        # Generate report content, streaming it through a bounded in-memory
+        # buffer (spilling over to a temporary file) and then into storage.
         generator = self.get_generator(report_format)
-        report = generator.generate()
-        if not isinstance(report, HttpResponse):
-            raise TypeError(
-                f"Expected HttpResponse from generator, got {type(report).__name__}"
-            )
-        # Save generated content
+        report_compression = compression.get_compression(generator)
         filename = self.get_filename(report_format)
-        content = io.BytesIO(report.content)
-        self.mime_type = report["content-type"]
-        self.report_file.save(filename, content)
+        report_metrics = ReportMetrics()
+        report_progress = ProgressTracker(self.uuid)
+        with tempfile.SpooledTemporaryFile(
+            max_size=streaming.get_spool_size()
+        ) as content:
+            output = streaming.ReportOutput(content)
+            with compression.compress(
+                output, report_compression, filename
+            ) as report_output:
+                report_output.progress = report_progress
+                with (
+                    report_metrics.generation(report_output),
+                    routing.report_database(),
+                ):
+                    date_ranges = self.get_checkpoint_date_ranges(generator)
+                    if date_ranges:
+                        self.mime_type = self.write_checkpointed_report(
+                            report_format, date_ranges, report_output
+                        )
+                    else:
+                        self.mime_type = self.write_report(
+                            report_format, generator, report_output
+                        )
+            with report_metrics.phase("upload"):
+                content.seek(0)
+                self.report_file.save(
+                    compression.get_filename(filename, report_compression),
+                    File(content),
+                    save=False,
+                )
+        if report_compression == compression.ZIP:
+            self.mime_type = compression.ZIP_MIME_TYPE
+        self.content_encoding = compression.get_content_encoding(report_compression)
+        self.file_size = output.size
+        self.row_count = report_output.row_count
+        self.sha256 = output.sha256
         self.completed_on = timezone.now()
         self.save(
             update_fields=[
                 "mime_type",
+                "content_encoding",
                 "report_file",
+                "file_size",
+                "row_count",
+                "sha256",
                 "completed_on",
             ]
         )
-        self.send_completed_alert()
+        self.delete_checkpoint()
+        with report_metrics.phase("notify"):
+            self.send_completed_alert()
+        report_metrics.rows = self.row_count
+        report_metrics.bytes_written = self.file_size
+        self.save_metrics(report_metrics)
+        report_progress.clear()
 
     generate.alters_data = True  # type:ignore[attr-defined]
 
+    def generate_shard(self, report_format: str, shard_index: int) -> None:
+        self.check_cancelled()
+        # Record start time of the first shard to run
+        now = timezone.now()
+        Report.objects.unfinished().filter(pk=self.pk, started_on__isnull=True).update(
+            started_on=now,
+            status=self.STATUS_IN_PROGRESS,
+        )
+        # Generate the shard's slice of the date range into a partial file
+        generator = self.get_generator(report_format)
+        start_date, end_date = self.get_shard_date_ranges(generator)[shard_index]
+        generator = self.get_generator(report_format, start_date, end_date)
+        shard_name = self.get_shard_filename(report_format, shard_index)
+        storage = self.report_file.storage
+        with tempfile.SpooledTemporaryFile(
+            max_size=streaming.get_spool_size()
+        ) as content:
+            output = streaming.ReportOutput(content)
+            # Progress is counted in shards, so only watch for cancellation
+            output.progress = ProgressTracker(self.uuid, record=False)
+            with routing.report_database():
+                mime_type = self.write_report(report_format, generator, output)
+            content.seek(0)
+            if storage.exists(shard_name):
+                storage.delete(shard_name)
+            storage.save(shard_name, File(content))
+        # Count this shard as done. The last shard to finish queues the merge.
+        with transaction.atomic():
+            Report.objects.filter(pk=self.pk).update(
+                mime_type=mime_type,
+                row_count=Coalesce(F("row_count"), 0) + (output.row_count or 0),
+                shards_completed=F("shards_completed") + 1,
+            )
+            shards_completed = (
+                Report.objects.filter(pk=self.pk)
+                .values_list("shards_completed", flat=True)
+                .get()
+            )
+            if shards_completed == self.shard_count:
+
+                def do_enqueue() -> None:
+                    task = queueing.route(tasks.merge_report_shards, self.lane)
+                    result = task.enqueue(str(self.uuid), report_format)
+                    Report.objects.filter(pk=self.pk).update(task_id=result.id)
+
+                transaction.on_commit(do_enqueue)
+
+    generate_shard.alters_data = True  # type:ignore[attr-defined]
+
+    def merge_shards(self, report_format: str) -> None:
+        self.check_cancelled()
+        # Concatenate the partial files, in report order, into the final file
+        storage = self.report_file.storage
+        generator = self.get_generator(report_format)
+        shard_names = [
+            self.get_shard_filename(report_format, shard_index)
+            for shard_index in range(self.shard_count)
+        ]
+        if sharding.is_ordered_by_date_descending(generator):
+            shard_names.reverse()
+        report_compression = compression.get_compression(generator)
+        filename = self.get_filename(report_format)
+        report_metrics = ReportMetrics()
+        with tempfile.SpooledTemporaryFile(
+            max_size=streaming.get_spool_size()
+        ) as content:
+            output = streaming.ReportOutput(content)
+            parts = [storage.open(name, "rb") for name in shard_names]
+            try:
+                with compression.compress(
+                    output, report_compression, filename
+                ) as report_output:
+                    with report_metrics.phase("write"):
+                        sharding.concatenate(parts, report_output)
+            finally:
+                for part in parts:
+                    part.close()
+            with report_metrics.phase("upload"):
+                content.seek(0)
+                self.report_file.save(
+                    compression.get_filename(filename, report_compression),
+                    File(content),
+                    save=False,
+                )
+        for name in shard_names:
+            storage.delete(name)
+        if report_compression == compression.ZIP:
+            self.mime_type = compression.ZIP_MIME_TYPE
+        self.content_encoding = compression.get_content_encoding(report_compression)
+        self.file_size = output.size
+        self.sha256 = output.sha256
+        self.completed_on = timezone.now()
+        self.save(
+            update_fields=[
+                "mime_type",
+                "content_encoding",
+                "report_file",
+                "file_size",
+                "sha256",
+                "completed_on",
+            ]
+        )
+        with report_metrics.phase("notify"):
+            self.send_completed_alert()
+        report_metrics.rows = self.row_count
+        report_metrics.bytes_written = self.file_size
+        self.save_metrics(report_metrics)
+
+    merge_shards.alters_data = True  # type:ignore[attr-defined]
+
+    def check_cancelled(self) -> None:
+        if self.cancelled_on is not None:
+            raise ReportCancelled(self.uuid)
+
+    def cancel(self) -> bool:
+        """
+        Cancel the report, if it isn't finished already. A running task stops
+        at its next progress update; a queued one as soon as it starts.
+        """
+        if self.is_finished:
+            return False
+        self.cancelled_on = timezone.now()
+        self.save(update_fields=["cancelled_on"])
+        self.delete_partial_files()
+        return True
+
+    cancel.alters_data = True  # type:ignore[attr-defined]
+
+    def fail(self) -> None:
+        self.failed_on = timezone.now()
+        self.save(update_fields=["failed_on"])
+        self.delete_partial_files()
+
+    fail.alters_data = True  # type:ignore[attr-defined]
+
+    def delete_partial_files(self) -> None:
+        # Remove the shards and checkpoint of an unfinished report
+        self.delete_shard_files()
+        self.delete_checkpoint()
+
+    delete_partial_files.alters_data = True  # type:ignore[attr-defined]
+
+    def delete_shard_files(self) -> None:
+        if self.shard_count <= 1:
+            return
+        storage = self.report_file.storage
+        for shard_index in range(self.shard_count):
+            name = self.get_shard_filename(self.report_format, shard_index)
+            if storage.exists(name):
+                storage.delete(name)
+
+    delete_shard_files.alters_data = True  # type:ignore[attr-defined]
+
+    def delete_checkpoint(self) -> None:
+        if not self.checkpoint:
+            return
+        self.delete_checkpoint_files()
+        self.checkpoint = {}
+        self.save(update_fields=["checkpoint"])
+
+    delete_checkpoint.alters_data = True  # type:ignore[attr-defined]
+
+    def delete_checkpoint_files(self) -> None:
+        if not self.checkpoint:
+            return
+        storage = self.report_file.storage
+        report_format = self.checkpoint["report_format"]
+        for index in range(len(self.checkpoint["date_ranges"])):
+            name = self.get_checkpoint_filename(report_format, index)
+            if storage.exists(name):
+                storage.delete(name)
+
+    delete_checkpoint_files.alters_data = True  # type:ignore[attr-defined]
+
+    def save_metrics(self, report_metrics: ReportMetrics) -> None:
+        self.metrics = report_metrics.as_dict()
+        self.save(update_fields=["metrics"])
+        signals.report_generated.send(sender=Report, report=self, metrics=self.metrics)
+
+    save_metrics.alters_data = True  # type:ignore[attr-defined]
+
+    def save_profile(self, capture: profiling.ProfileCapture) -> None:
+        with tempfile.SpooledTemporaryFile(
+            max_size=streaming.get_spool_size()
+        ) as content:
+            capture.write_archive(content)
+            content.seek(0)
+            if self.profile_file:
+                self.profile_file.delete(save=False)
+            self.profile_file.save(
+                f"{self.uuid}.profile.zip", File(content), save=False
+            )
+        self.save(update_fields=["profile_file"])
+
+    save_profile.alters_data = True  # type:ignore[attr-defined]
+
+    def write_report(
+        self,
+        report_format: str,
+        generator: ReportGenerator,
+        output: streaming.ReportOutput,
+    ) -> str:
+        # Reuse per-day fragments of previously generated reports, if enabled
+        date_range = self.get_splittable_date_range(generator)
+        if date_range is not None and fragments.is_enabled(self.type_code):
+            return fragments.write_report(
+                generator,
+                date_range[0],
+                date_range[1],
+                lambda day: self.get_generator(report_format, day, day),
+                report_format,
+                output,
+                self.report_file.storage,
+            )
+        return streaming.write_report(generator, output)
+
+    def write_checkpointed_report(
+        self,
+        report_format: str,
+        date_ranges: list[tuple[date, date]],
+        output: streaming.ReportOutput,
+    ) -> str:
+        """
+        Generate the report one part of its date range at a time, saving each
+        part to storage and recording it in ``checkpoint`` before moving on to
+        the next. If an earlier attempt at generating the report died, the
+        parts it already saved are reused. Finally, the parts are concatenated
+        into ``output``.
+        """
+        storage = self.report_file.storage
+        if not checkpoints.is_resumable(self.checkpoint, report_format, date_ranges):
+            self.delete_checkpoint()
+            self.checkpoint = checkpoints.new_checkpoint(report_format, date_ranges)
+            self.save(update_fields=["checkpoint"])
+        for index in range(self.checkpoint["parts"], len(date_ranges)):
+            start_date, end_date = date_ranges[index]
+            generator = self.get_generator(report_format, start_date, end_date)
+            name = self.get_checkpoint_filename(report_format, index)
+            with tempfile.SpooledTemporaryFile(
+                max_size=streaming.get_spool_size()
+            ) as content:
+                part = streaming.ReportOutput(content)
+                # Progress is counted in parts, so only watch for cancellation
+                part.progress = ProgressTracker(self.uuid, record=False)
+                mime_type = self.write_report(report_format, generator, part)
+                content.seek(0)
+                if storage.exists(name):
+                    storage.delete(name)
+                storage.save(name, File(content))
+            output.add_timings(part)
+            self.checkpoint.update(
+                parts=index + 1,
+                rows=self.checkpoint["rows"] + (part.row_count or 0),
+                mime_type=mime_type,
+                updated=timezone.now().isoformat(),
+            )
+            self.save(update_fields=["checkpoint"])
+        # Concatenate the parts, in report order, into the final file
+        names = [
+            self.get_checkpoint_filename(report_format, index)
+            for index in range(len(date_ranges))
+        ]
+        if sharding.is_ordered_by_date_descending(self.get_generator(report_format)):
+            names.reverse()
+        parts = [storage.open(name, "rb") for name in names]
+        try:
+            sharding.concatenate(parts, output)
+        finally:
+            for part_file in parts:
+                part_file.close()
+        output.add_rows(self.checkpoint["rows"])
+        return self.checkpoint["mime_type"]
+
+    write_checkpointed_report.alters_data = True  # type:ignore[attr-defined]
+
     def send_completed_alert(self) -> None:
-        if self.owner is None or not self.owner.email:
+        to_addrs = []
+        if self.owner is not None and self.owner.email:
+            to_addrs.append(self.owner.email)
+        to_addrs += [
+            email
+            for email in self.requesters.exclude(email="")
+            .values_list("email", flat=True)
+            .distinct()
+            if email not in to_addrs
+        ]
+        if self.schedule is not None:
+            to_addrs += [
+                email
+                for email in self.schedule.get_recipients()
+                if email not in to_addrs
+            ]
+        if not to_addrs:
             return
         ctx = {
             "site": Site.objects.get_current(),
@@ -224,7 +921,6 @@ class Report(models.Model):
         html = get_template(
             "oscar/dashboard/reports/emails/report_completed_alert_body.html"
         ).render(ctx)
-        to_addrs = [self.owner.email]
         msg = EmailMultiAlternatives(subject, text, settings.OSCAR_FROM_EMAIL, to_addrs)
         msg.attach_alternative(html, "text/html")
         msg.send()
@@ -234,13 +930,265 @@ class Report(models.Model):
     def get_generator(
         self,
         report_format: str,
+        start_date: date | None = None,
+        end_date: date | None = None,
     ) -> ReportGenerator:
+        if self.date_range:
+            start_date = start_date or self.date_range.lower
+            end_date = end_date or self.date_range.upper
         kwargs = {
-            "start_date": self.date_range.lower if self.date_range else None,
-            "end_date": self.date_range.upper if self.date_range else None,
+            "start_date": start_date,
+            "end_date": end_date,
             "formatter": report_format,
         }
-        return self.generator_class(**kwargs)
+        generator_class = self.generator_class
+        formatter_class = formats.get_file_formatter_class(report_format)
+        if formatter_class is not None and (
+            f"{report_format}_formatter"
+            not in getattr(generator_class, "formatters", {})
+        ):
+            # Write the rows of the generator's CSV formatter in the format
+            kwargs["formatter"] = formats.CSV
+            generator = generator_class(**kwargs)
+            generator.formatter = formatter_class(generator.formatter)
+            return generator
+        return generator_class(**kwargs)
+
+    def get_splittable_date_range(
+        self,
+        generator: ReportGenerator,
+    ) -> tuple[date, date] | None:
+        # Only a bounded, date filtered report written by a CSV formatter can
+        # be split by day and concatenated back together. Oscar filters on
+        # whole days, so the bounds are returned as (inclusive) dates.
+        if (
+            not generator.start_date
+            or not generator.end_date
+            or not generator.date_range_field_name
+            or not hasattr(generator.formatter, "generate_csv")
+        ):
+            return None
+        return (
+            sharding.as_date(generator.start_date),
+            sharding.as_date(generator.end_date),
+        )
+
+    def get_checkpoint_date_ranges(
+        self,
+        generator: ReportGenerator,
+    ) -> list[tuple[date, date]]:
+        days = checkpoints.get_checkpoint_days(self.type_code)
+        date_range = self.get_splittable_date_range(generator)
+        if days is None or date_range is None:
+            return []
+        return checkpoints.split_by_days(date_range[0], date_range[1], days)
+
+    def get_shard_date_ranges(
+        self,
+        generator: ReportGenerator,
+    ) -> list[tuple[date, date]]:
+        date_range = self.get_splittable_date_range(generator)
+        if date_range is None:
+            return []
+        return sharding.split_date_range(
+            date_range[0],
+            date_range[1],
+            sharding.get_shard_count(self.type_code),
+        )
 
     def get_filename(self, report_format: str) -> str:
-        return f"{self.uuid}.{report_format.lower()}"
+        return f"{self.uuid}.{formats.get_extension(report_format)}"
+
+    def get_checkpoint_filename(self, report_format: str, index: int) -> str:
+        prefix = getattr(settings, "OSCAR_REPORTS_UPLOAD_PREFIX", "oscar-reports")
+        return "{prefix}/checkpoints/{uuid}/{index}.{ext}".format(
+            prefix=prefix,
+            uuid=self.uuid,
+            index=index,
+            ext=formats.get_extension(report_format),
+        )
+
+    def get_shard_filename(self, report_format: str, shard_index: int) -> str:
+        prefix = getattr(settings, "OSCAR_REPORTS_UPLOAD_PREFIX", "oscar-reports")
+        return "{prefix}/shards/{uuid}/{index}.{ext}".format(
+            prefix=prefix,
+            uuid=self.uuid,
+            index=shard_index,
+            ext=formats.get_extension(report_format),
+        )
+
+
+class ReportScheduleQuerySet(models.QuerySet["ReportSchedule"]):
+    def due(self, now: datetime | None = None) -> ReportScheduleQuerySet:
+        return self.filter(
+            is_active=True,
+            next_run_on__lte=now or timezone.now(),
+        )
+
+
+class ReportSchedule(models.Model):
+    """
+    A report which is created and queued automatically, on a cron-like
+    schedule, so that it's ready before anyone asks for it.
+    """
+
+    name = models.CharField(_("Name"), max_length=100)
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        verbose_name=_("Owner"),
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name="+",
+    )
+    type_code = models.CharField(_("Type Code"), max_length=50)
+    report_format = models.CharField(_("Report Format"), max_length=20, default="CSV")
+    window_days = models.PositiveSmallIntegerField(
+        _("Window (days)"),
+        default=1,
+        help_text=_(
+            "Number of whole days to report on, up to the end of the day "
+            "before each run. Zero reports on all dates."
+        ),
+    )
+    cadence = models.CharField(
+        _("Cadence"),
+        max_length=100,
+        validators=[cron.validate_cron_expression],
+        help_text=_(
+            'A cron expression in local time, e.g. "0 5 * * 1-5" for 5am on weekdays'
+        ),
+    )
+    recipients = models.TextField(
+        _("Recipients"),
+        blank=True,
+        help_text=_(
+            "Email addresses to notify when each report is ready, in addition "
+            "to the owner. Separate them with commas or new lines."
+        ),
+    )
+    is_active = models.BooleanField(_("Is Active"), default=True)
+    created_on = models.DateTimeField(_("Created On"), auto_now_add=True)
+    last_run_on = models.DateTimeField(_("Last Run On"), null=True, blank=True)
+    next_run_on = models.DateTimeField(
+        _("Next Run On"),
+        null=True,
+        blank=True,
+        db_index=True,
+    )
+
+    objects = ReportScheduleQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = _("Report schedule")
+        verbose_name_plural = _("Report schedules")
+
+    def __str__(self) -> str:
+        return self.name
+
+    def save(self, *args: Any, **kwargs: Any) -> None:
+        if self.next_run_on is None:
+            self.schedule_next()
+        super().save(*args, **kwargs)
+
+    def clean(self) -> None:
+        if not GeneratorRepository().get_generator(self.type_code):
+            raise ValidationError(
+                {"type_code": _("No report generator has this type code")}
+            )
+        for email in self.get_recipients():
+            validate_email(email)
+
+    def get_recipients(self) -> list[str]:
+        return self.recipients.replace(",", " ").split()
+
+    def schedule_next(self, now: datetime | None = None) -> None:
+        self.next_run_on = cron.CronSchedule(self.cadence).next_after(
+            now or timezone.now()
+        )
+
+    def get_date_range(self, now: datetime | None = None) -> DateTimeTZRange | None:
+        # The ``window_days`` whole days before the day of ``now``. Oscar filters
+        # on whole days, so the range ends at the start of the last day.
+        if not self.window_days:
+            return None
+        today = timezone.localtime(now).replace(
+            hour=0, minute=0, second=0, microsecond=0
+        )
+        return DateTimeTZRange(
+            lower=today - timedelta(days=self.window_days),
+            upper=today - timedelta(days=1),
+            bounds="[]",
+        )
+
+    def create_report(self, now: datetime | None = None) -> Report:
+        report = Report()
+        report.owner = self.owner
+        report.type_code = self.type_code
+        report.date_range = self.get_date_range(now)
+        report.schedule = self
+        report.save()
+        return report
+
+    create_report.alters_data = True  # type:ignore[attr-defined]
+
+
+class OrderDailyRollup(models.Model):
+    """
+    Order totals per day (in local time) and currency, kept up to date by
+    ``oscarreports.rollups`` for the summary report generators.
+    """
+
+    day = models.DateField(_("Day"))
+    currency = models.CharField(_("Currency"), max_length=12)
+    num_orders = models.PositiveIntegerField(_("Number of Orders"), default=0)
+    total_incl_tax = models.DecimalField(
+        _("Total (inc. tax)"), max_digits=20, decimal_places=2, default=0
+    )
+    total_excl_tax = models.DecimalField(
+        _("Total (excl. tax)"), max_digits=20, decimal_places=2, default=0
+    )
+    updated_on = models.DateTimeField(_("Updated On"), auto_now=True)
+
+    class Meta:
+        verbose_name = _("Daily order rollup")
+        verbose_name_plural = _("Daily order rollups")
+        constraints = [
+            models.UniqueConstraint(
+                fields=["day", "currency"],
+                name="reports_order_rollup_day_uniq",
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.day} {self.currency}"
+
+
+class OfferDailyRollup(models.Model):
+    """
+    Offer discount totals per day (in local time) and offer, kept up to date by
+    ``oscarreports.rollups`` for the summary report generators.
+    """
+
+    day = models.DateField(_("Day"))
+    # Not a foreign key, since offers can be deleted after they're used
+    offer_id = models.PositiveIntegerField(_("Offer ID"))
+    offer_name = models.CharField(_("Offer name"), max_length=128, blank=True)
+    num_orders = models.PositiveIntegerField(_("Number of Orders"), default=0)
+    total_discount = models.DecimalField(
+        _("Total discount"), max_digits=20, decimal_places=2, default=0
+    )
+    updated_on = models.DateTimeField(_("Updated On"), auto_now=True)
+
+    class Meta:
+        verbose_name = _("Daily offer rollup")
+        verbose_name_plural = _("Daily offer rollups")
+        constraints = [
+            models.UniqueConstraint(
+                fields=["day", "offer_id"],
+                name="reports_offer_rollup_day_uniq",
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.day} {self.offer_id}"
@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any
+
+from django.db.models import Q
+from django.db.models.query import QuerySet
+from django.utils.encoding import force_str
+from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
+
+# The order in which reports are listed. The primary key breaks ties between
+# reports created at the same moment, so every report has a unique position.
+ORDERING = ("-created_on", "-id")
+
+
+def encode_cursor(obj: Any) -> str:
+    value = "{}|{}".format(obj.created_on.isoformat(), obj.pk)
+    return urlsafe_base64_encode(value.encode())
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int] | None:
+    try:
+        created_on, pk = force_str(urlsafe_base64_decode(cursor)).split("|")
+        return datetime.fromisoformat(created_on), int(pk)
+    except (TypeError, ValueError):
+        return None
+
+
+class KeysetPage:
+    """
+    A page of a queryset listed newest first, located by the position of the
+    last row of the previous page rather than by an offset.
+
+    Fetching a page only reads the rows on it, via an index on ``ORDERING``,
+    however deep into the list it is, and the total number of rows is never
+    counted.
+    """
+
+    def __init__(
+        self,
+        queryset: QuerySet[Any, Any],
+        cursor: str | None,
+        per_page: int,
+    ) -> None:
+        position = decode_cursor(cursor) if cursor else None
+        queryset = queryset.order_by(*ORDERING)
+        if position is not None:
+            created_on, pk = position
+            queryset = queryset.filter(
+                Q(created_on__lt=created_on) | Q(created_on=created_on, pk__lt=pk)
+            )
+        # Fetch one extra row to find out whether there is a next page
+        rows = list(queryset[: per_page + 1])
+        self.object_list = rows[:per_page]
+        self.is_first = position is None
+        self.has_next = len(rows) > per_page
+        self.next_cursor = (
+            encode_cursor(self.object_list[-1]) if self.has_next else None
+        )
@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from itertools import islice
+from typing import Any
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections, transaction
+from django.db.models.query import ModelIterable, QuerySet
+from oscar.apps.dashboard.reports.reports import ReportGenerator
+
+from . import routing
+from .querysets import get_prefetch_related, get_select_related
+
+# SQLSTATE of a statement cancelled by ``statement_timeout``
+QUERY_CANCELED = "57014"
+
+
+class PreviewUnavailable(Exception):
+    pass
+
+
+class PreviewTimeout(PreviewUnavailable):
+    pass
+
+
+def get_preview_rows() -> int:
+    # Most rows shown in a report preview, e.g. OSCAR_REPORTS_PREVIEW_ROWS = 50
+    return getattr(settings, "OSCAR_REPORTS_PREVIEW_ROWS", 20)
+
+
+def get_preview_timeout() -> int:
+    # Milliseconds each query of a report preview may run for before it's
+    # cancelled, e.g. OSCAR_REPORTS_PREVIEW_TIMEOUT = 2000
+    return getattr(settings, "OSCAR_REPORTS_PREVIEW_TIMEOUT", 3000)
+
+
+class Preview:
+    """
+    The header and first rows of a report, as written by its CSV formatter.
+    """
+
+    def __init__(
+        self,
+        header: list[Any],
+        rows: list[list[Any]],
+        truncated: bool,
+    ) -> None:
+        self.header = header
+        self.rows = rows
+        # Whether the report has more rows than were previewed
+        self.truncated = truncated
+
+
+class PreviewComplete(Exception):
+    # Stops the formatter once the preview has all the rows it needs
+    pass
+
+
+class PreviewWriter:
+    """
+    Collects the rows written by a CSV formatter, up to ``limit`` data rows.
+    """
+
+    def __init__(self, limit: int) -> None:
+        self.limit = limit
+        self.header: list[Any] | None = None
+        self.rows: list[list[Any]] = []
+        self.truncated = False
+
+    def writerow(self, row: Iterable[Any]) -> None:
+        if self.header is None:
+            self.header = list(row)
+            return
+        if len(self.rows) >= self.limit:
+            self.truncated = True
+            raise PreviewComplete()
+        self.rows.append(list(row))
+
+    def writerows(self, rows: Iterable[Iterable[Any]]) -> None:
+        for row in rows:
+            self.writerow(row)
+
+
+def is_query_canceled(error: OperationalError) -> bool:
+    # psycopg 3 calls it ``sqlstate``, psycopg2 ``pgcode``
+    cause = error.__cause__
+    code = getattr(cause, "sqlstate", None) or getattr(cause, "pgcode", None)
+    return code == QUERY_CANCELED
+
+
+@contextmanager
+def statement_timeout(using: str, timeout: int) -> Iterator[None]:
+    """
+    Cancel any query run on the ``using`` database within the block which takes
+    longer than ``timeout`` milliseconds. PostgreSQL only.
+    """
+    connection = connections[using]
+    if connection.vendor != "postgresql":
+        yield
+        return
+    with transaction.atomic(using=using):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT current_setting('statement_timeout')")
+            previous = cursor.fetchone()[0]
+            cursor.execute(
+                "SELECT set_config('statement_timeout', %s, true)", [str(timeout)]
+            )
+        yield
+        # Set locally, so it's reset by the end of the transaction (or the
+        # rollback of this savepoint), but the enclosing transaction may go on
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT set_config('statement_timeout', %s, true)", [previous]
+            )
+
+
+def preview_report(generator: ReportGenerator, limit: int | None = None) -> Preview:
+    """
+    Run ``generator`` (with a CSV formatter) just far enough to return its
+    first ``limit`` rows. Querysets are limited in SQL, and each query is
+    cancelled if it runs for longer than ``OSCAR_REPORTS_PREVIEW_TIMEOUT``.
+    """
+    if limit is None:
+        limit = get_preview_rows()
+    formatter = generator.formatter
+    if not hasattr(formatter, "generate_csv"):
+        raise PreviewUnavailable("Only reports with a CSV formatter can be previewed")
+    writer = PreviewWriter(limit)
+    formatter.get_csv_writer = (  # type:ignore[attr-defined]
+        lambda file_handle, **kwargs: writer
+    )
+
+    # Intercept the formatter's response building, as when streaming a report
+    def generate_response(objects: Iterable[Any], **kwargs: Any) -> None:
+        if isinstance(objects, QuerySet):
+            if issubclass(objects._iterable_class, ModelIterable):
+                objects = objects.select_related(
+                    *get_select_related(generator)
+                ).prefetch_related(*get_prefetch_related(generator))
+            # One more than the limit, to tell if there are more rows
+            objects = objects[: limit + 1]
+        else:
+            objects = islice(objects, limit + 1)
+        formatter.generate_csv(None, objects)
+
+    formatter.generate_response = generate_response  # type:ignore[method-assign]
+    using = routing.get_report_database() or DEFAULT_DB_ALIAS
+    try:
+        with (
+            routing.report_database(),
+            statement_timeout(using, get_preview_timeout()),
+        ):
+            try:
+                generator.generate()
+            except PreviewComplete:
+                pass
+    except OperationalError as e:
+        if is_query_canceled(e):
+            raise PreviewTimeout("The report preview took too long") from e
+        raise
+    return Preview(writer.header or [], writer.rows, writer.truncated)
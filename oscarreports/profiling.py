@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import IO, TYPE_CHECKING
+import cProfile
+import io
+import marshal
+import pickle
+import pstats
+import tracemalloc
+import zipfile
+
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+
+if TYPE_CHECKING:
+    from .models import Report
+
+CPROFILE = "cprofile"
+TRACEMALLOC = "tracemalloc"
+ALL = "all"
+MODE_CHOICES = [
+    (CPROFILE, _("cProfile")),
+    (TRACEMALLOC, _("tracemalloc")),
+    (ALL, _("cProfile and tracemalloc")),
+]
+
+# Number of entries in the human readable summaries
+SUMMARY_LENGTH = 100
+TRACEBACK_FRAMES = 25
+
+
+def get_mode(report: Report) -> str:
+    # Profile every report of a type, e.g.
+    # OSCAR_REPORTS_PROFILE = {"order_report": "cprofile"}
+    modes = getattr(settings, "OSCAR_REPORTS_PROFILE", {})
+    return report.profile_mode or modes.get(report.type_code, "")
+
+
+class ProfileCapture:
+    """
+    Runs cProfile and/or tracemalloc while a report is generated, and writes
+    what they captured into a zip archive:
+
+    - ``profile.prof``: cProfile stats, for ``pstats`` or snakeviz
+    - ``profile.txt``: the functions with the highest cumulative time
+    - ``tracemalloc.snapshot``: a ``tracemalloc.Snapshot.load()``-able dump
+    - ``tracemalloc.txt``: the lines which allocated the most memory
+    """
+
+    def __init__(self, mode: str) -> None:
+        self.profiler = cProfile.Profile() if mode in (CPROFILE, ALL) else None
+        self.trace_memory = mode in (TRACEMALLOC, ALL)
+        self.snapshot: tracemalloc.Snapshot | None = None
+        self._was_tracing = False
+
+    def start(self) -> None:
+        if self.trace_memory:
+            self._was_tracing = tracemalloc.is_tracing()
+            if not self._was_tracing:
+                tracemalloc.start(TRACEBACK_FRAMES)
+        if self.profiler is not None:
+            self.profiler.enable()
+
+    def stop(self) -> None:
+        if self.profiler is not None:
+            self.profiler.disable()
+        if self.trace_memory:
+            self.snapshot = tracemalloc.take_snapshot()
+            if not self._was_tracing:
+                tracemalloc.stop()
+
+    def write_archive(self, fileobj: IO[bytes]) -> None:
+        with zipfile.ZipFile(fileobj, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+            if self.profiler is not None:
+                self.profiler.create_stats()
+                zf.writestr("profile.prof", marshal.dumps(self.profiler.stats))
+                summary = io.StringIO()
+                stats = pstats.Stats(self.profiler, stream=summary)
+                stats.sort_stats("cumulative").print_stats(SUMMARY_LENGTH)
+                zf.writestr("profile.txt", summary.getvalue())
+            if self.snapshot is not None:
+                zf.writestr("tracemalloc.snapshot", pickle.dumps(self.snapshot))
+                top = self.snapshot.statistics("lineno")[:SUMMARY_LENGTH]
+                zf.writestr("tracemalloc.txt", "\n".join(str(stat) for stat in top))
+
+
+@contextmanager
+def profile_report(report: Report) -> Iterator[None]:
+    """
+    Profile the enclosed generation of ``report``, if profiling is enabled for
+    it, and attach the captured profile to it. The profile is kept even if the
+    generation fails.
+    """
+    mode = get_mode(report)
+    if not mode:
+        yield
+        return
+    capture = ProfileCapture(mode)
+    capture.start()
+    try:
+        yield
+    finally:
+        capture.stop()
+        report.save_profile(capture)
@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+from collections.abc import Iterable
+from datetime import datetime
+from typing import Any
+from uuid import UUID
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.db.models.query import QuerySet
+from django.utils import timezone
+
+PLANNER = "planner"
+COUNT = "count"
+
+
+class ReportCancelled(Exception):
+    """
+    Raised inside a report's generation once the report has been cancelled.
+    """
+
+
+def get_progress_interval() -> float:
+    # Minimum number of seconds between progress updates written to the cache
+    return getattr(settings, "OSCAR_REPORTS_PROGRESS_INTERVAL", 2.0)
+
+
+def get_cache_key(report_uuid: UUID | str) -> str:
+    return f"oscarreports:progress:{report_uuid}"
+
+
+def estimate_count(queryset: QuerySet[Any, Any]) -> int | None:
+    """
+    Estimate the number of rows ``queryset`` will return, either from the
+    PostgreSQL planner (cheap, but approximate) or by counting them (exact, but
+    an extra scan of the rows), as set by ``OSCAR_REPORTS_PROGRESS_ESTIMATE``.
+    """
+    method = getattr(settings, "OSCAR_REPORTS_PROGRESS_ESTIMATE", PLANNER)
+    if method == COUNT:
+        return queryset.count()
+    if method != PLANNER or connections[queryset.db].vendor != "postgresql":
+        return None
+    plan = json.loads(queryset.explain(format="json"))
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+class Progress:
+    """
+    How far through its rows a running report is, and when it's expected to
+    finish at the current rate.
+    """
+
+    def __init__(
+        self,
+        rows: int,
+        total: int | None,
+        started: datetime,
+        updated: datetime,
+    ) -> None:
+        self.rows = rows
+        self.total = total
+        self.started = started
+        self.updated = updated
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> Progress:
+        return cls(
+            rows=data["rows"],
+            total=data["total"],
+            started=datetime.fromisoformat(data["started"]),
+            updated=datetime.fromisoformat(data["updated"]),
+        )
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "rows": self.rows,
+            "total": self.total,
+            "started": self.started.isoformat(),
+            "updated": self.updated.isoformat(),
+        }
+
+    @property
+    def percent(self) -> float | None:
+        if not self.total:
+            return None
+        # Planner estimates can be exceeded
+        return min(100.0 * self.rows / self.total, 100.0)
+
+    @property
+    def eta(self) -> datetime | None:
+        if not self.rows or not self.total or self.rows >= self.total:
+            return None
+        if self.updated <= self.started:
+            return None
+        elapsed = self.updated - self.started
+        return self.updated + elapsed * (self.total - self.rows) / self.rows
+
+
+class ProgressTracker:
+    """
+    Records the number of rows a report has written so far in the cache, and
+    stops the generation (by raising ``ReportCancelled``) if the report has
+    been cancelled. Both are throttled to once every
+    ``OSCAR_REPORTS_PROGRESS_INTERVAL`` seconds, so tracking progress costs
+    next to nothing per row.
+    """
+
+    def __init__(
+        self,
+        report_uuid: UUID | str,
+        interval: float | None = None,
+        record: bool = True,
+    ) -> None:
+        self.report_uuid = report_uuid
+        self.key = get_cache_key(report_uuid)
+        self.interval = get_progress_interval() if interval is None else interval
+        self.record = record
+        self.rows = 0
+        self.total: int | None = None
+        self.started = timezone.now()
+        self._last_saved: float | None = None
+
+    def set_total(self, total: int | None) -> None:
+        self.total = total
+        self.save()
+
+    def update(self, rows: int) -> None:
+        self.rows = rows
+        if (
+            self._last_saved is None
+            or time.monotonic() - self._last_saved >= self.interval
+        ):
+            self.save()
+            self.check_cancelled()
+
+    def save(self) -> None:
+        from .models import get_in_flight_timeout
+
+        self._last_saved = time.monotonic()
+        if not self.record:
+            return
+        # Progress is only read while the report is in flight
+        progress = Progress(self.rows, self.total, self.started, timezone.now())
+        timeout = get_in_flight_timeout().total_seconds()
+        cache.set(self.key, progress.as_dict(), timeout=timeout)
+
+    def check_cancelled(self) -> None:
+        from .models import Report
+
+        cancelled = Report.objects.filter(
+            uuid=self.report_uuid, cancelled_on__isnull=False
+        ).exists()
+        if cancelled:
+            raise ReportCancelled(self.report_uuid)
+
+    def clear(self) -> None:
+        cache.delete(self.key)
+
+
+def get_progress(report_uuids: Iterable[UUID | str]) -> dict[str, Progress]:
+    # Fetch the progress of many reports in one cache round trip
+    keys = {
+        get_cache_key(report_uuid): str(report_uuid) for report_uuid in report_uuids
+    }
+    if not keys:
+        return {}
+    return {
+        keys[key]: Progress.from_dict(data)
+        for key, data in cache.get_many(keys).items()
+    }
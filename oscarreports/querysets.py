@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+from collections.abc import Iterable, Sequence
+from typing import Any
+
+from django.conf import settings
+from django.db.models.query import ModelIterable, QuerySet
+from oscar.apps.dashboard.reports.reports import ReportGenerator
+
+# Relations dereferenced by the stock Oscar CSV formatters, keyed by generator
+# code. Loading these alongside each chunk avoids one query per report row.
+DEFAULT_SELECT_RELATED: dict[str, Sequence[str]] = {
+    "order_report": ["user"],
+    "user_analytics": ["user"],
+    "product_analytics": ["product"],
+    "open_baskets": ["owner"],
+    "submitted_baskets": ["owner"],
+}
+DEFAULT_PREFETCH_RELATED: dict[str, Sequence[str]] = {}
+
+
+def get_chunk_size() -> int:
+    # Number of rows fetched from the database cursor at a time
+    return getattr(settings, "OSCAR_REPORTS_CHUNK_SIZE", 2000)
+
+
+def get_select_related(generator: ReportGenerator) -> Sequence[str]:
+    return getattr(
+        generator,
+        "report_select_related",
+        DEFAULT_SELECT_RELATED.get(generator.code, []),
+    )
+
+
+def get_prefetch_related(generator: ReportGenerator) -> Sequence[str]:
+    return getattr(
+        generator,
+        "report_prefetch_related",
+        DEFAULT_PREFETCH_RELATED.get(generator.code, []),
+    )
+
+
+def iterate_queryset(
+    queryset: QuerySet[Any, Any],
+    select_related: Sequence[str] = (),
+    prefetch_related: Sequence[str] = (),
+    chunk_size: int | None = None,
+) -> Iterable[Any]:
+    """
+    Iterate over a queryset without loading all of it into memory at once.
+
+    On PostgreSQL, ``QuerySet.iterator()`` reads from a server-side cursor, so
+    only ``chunk_size`` rows are held in Python at any one time. Prefetched
+    relations are loaded in one query per chunk.
+    """
+    if chunk_size is None:
+        chunk_size = get_chunk_size()
+    # Relations can only be followed when the queryset yields model instances
+    # (not ``.values()`` / ``.values_list()`` rows).
+    if issubclass(queryset._iterable_class, ModelIterable):
+        if select_related:
+            queryset = queryset.select_related(*select_related)
+        if prefetch_related:
+            queryset = queryset.prefetch_related(*prefetch_related)
+    return queryset.iterator(chunk_size=chunk_size)
+
+
+def iterate_report_objects(
+    generator: ReportGenerator,
+    objects: Iterable[Any],
+) -> Iterable[Any]:
+    """
+    Wrap the objects a generator hands to its formatter in a chunked iterator.
+    Anything other than a queryset is passed through untouched.
+    """
+    if not isinstance(objects, QuerySet):
+        return objects
+    return iterate_queryset(
+        objects,
+        select_related=get_select_related(generator),
+        prefetch_related=get_prefetch_related(generator),
+    )
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import TYPE_CHECKING, Any
+
+from django.conf import settings
+from django.db.models.query import QuerySet
+from django.utils.translation import gettext as _
+from django_tasks.base import Task
+from oscar.apps.dashboard.reports.reports import ReportGenerator
+
+from .progress import estimate_count
+
+if TYPE_CHECKING:
+    from .models import Report
+
+FAST = "fast"
+BULK = "bulk"
+
+# Small reports jump ahead of large ones on the default queue. Give a lane its
+# own ``queue_name`` (and its own workers) to keep them apart completely.
+DEFAULT_LANES: dict[str, dict[str, Any]] = {
+    FAST: {"priority": 10},
+    BULK: {"priority": -10},
+}
+
+
+class ReportLimitExceeded(Exception):
+    """
+    Raised when queueing a report would exceed a concurrency limit.
+    """
+
+
+def get_lanes() -> dict[str, dict[str, Any]]:
+    # Task options per lane, e.g.
+    # OSCAR_REPORTS_LANES = {"bulk": {"queue_name": "reports-bulk", "priority": 0}}
+    return {**DEFAULT_LANES, **getattr(settings, "OSCAR_REPORTS_LANES", {})}
+
+
+def get_bulk_lane_rows() -> int:
+    # Reports estimated to return at least this many rows go to the bulk lane
+    return getattr(settings, "OSCAR_REPORTS_BULK_LANE_ROWS", 100000)
+
+
+def get_lane(generator: ReportGenerator) -> str:
+    """
+    Choose the lane for a report, by its type (as set on the generator class's
+    ``report_lane``, or in ``OSCAR_REPORTS_TYPE_LANES``) or else by its
+    estimated number of rows.
+    """
+    lanes = getattr(settings, "OSCAR_REPORTS_TYPE_LANES", {})
+    lane = getattr(generator, "report_lane", lanes.get(generator.code))
+    if lane:
+        return str(lane)
+    queryset = generator.queryset
+    if isinstance(queryset, QuerySet):
+        rows = estimate_count(queryset)
+        if rows is not None and rows >= get_bulk_lane_rows():
+            return BULK
+    return FAST
+
+
+def get_run_after(
+    task: Task[Any, Any],
+    run_after: datetime | None,
+) -> datetime | None:
+    # The deferred start ``route`` applies to a task, which is none if its
+    # backend can't defer tasks
+    if run_after is not None and task.get_backend().supports_defer:
+        return run_after
+    return None
+
+
+def route(
+    task: Task[Any, Any],
+    lane: str,
+    run_after: datetime | None = None,
+) -> Task[Any, Any]:
+    # Apply the lane's queue and priority, and any deferred start, to a task,
+    # as far as its backend supports them
+    options = dict(get_lanes().get(lane, {}))
+    if not task.get_backend().supports_priority:
+        options.pop("priority", None)
+    run_after = get_run_after(task, run_after)
+    if run_after is not None:
+        options["run_after"] = run_after
+    return task.using(**options) if options else task
+
+
+def get_owner_limit() -> int | None:
+    # Most reports a single user may have queued or running at once
+    return getattr(settings, "OSCAR_REPORTS_MAX_CONCURRENT_PER_OWNER", None)
+
+
+def get_type_limit(type_code: str) -> int | None:
+    # Most reports of a type which may be queued or running at once, e.g.
+    # OSCAR_REPORTS_MAX_CONCURRENT_PER_TYPE = {"order_report": 2}
+    limits = getattr(settings, "OSCAR_REPORTS_MAX_CONCURRENT_PER_TYPE", {})
+    return limits.get(type_code)
+
+
+def check_limits(report: Report) -> None:
+    """
+    Raise ``ReportLimitExceeded`` if queueing ``report`` would take its owner
+    or its type over their limit of concurrently queued or running reports.
+
+    Must be called inside a transaction, which ``Report.queue()`` holds a lock
+    for, so that concurrent callers can't both slip under a limit.
+    """
+    from .models import Report
+
+    # Reports count for as long as they're queued (even if deferred) or
+    # running, however long that takes
+    running = Report.objects.running().exclude(pk=report.pk)
+    owner_limit = get_owner_limit()
+    if (
+        owner_limit is not None
+        and report.owner_id is not None
+        and running.filter(owner_id=report.owner_id).count() >= owner_limit
+    ):
+        raise ReportLimitExceeded(
+            _("You can't generate more than %(limit)d reports at once")
+            % {"limit": owner_limit}
+        )
+    type_limit = get_type_limit(report.type_code)
+    if (
+        type_limit is not None
+        and running.filter(type_code=report.type_code).count() >= type_limit
+    ):
+        raise ReportLimitExceeded(
+            _("No more than %(limit)d reports of this type can be generated at once")
+            % {"limit": type_limit}
+        )
@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+from datetime import timedelta
+import logging
+
+from django.conf import settings
+from django.utils import timezone
+from django_tasks import TaskResult, TaskResultStatus
+
+from . import tasks
+from .models import Report, get_in_flight_timeout
+from .queueing import ReportLimitExceeded
+
+logger = logging.getLogger(__name__)
+
+
+def get_timeout(type_code: str) -> timedelta:
+    # Seconds a report of this type may run before it's suspected to have
+    # died, e.g. OSCAR_REPORTS_TIMEOUTS = {"order_report": 4 * 60 * 60}
+    timeouts = getattr(settings, "OSCAR_REPORTS_TIMEOUTS", {})
+    if type_code in timeouts:
+        return timedelta(seconds=timeouts[type_code])
+    return get_in_flight_timeout()
+
+
+def get_max_retries() -> int:
+    # Times a dead report is queued again before it's marked as failed
+    return getattr(settings, "OSCAR_REPORTS_MAX_RETRIES", 1)
+
+
+def is_alive(result: TaskResult[None] | None) -> bool:
+    return result is not None and result.status in (
+        TaskResultStatus.READY,
+        TaskResultStatus.RUNNING,
+    )
+
+
+def is_dead(report: Report) -> bool:
+    """
+    Whether a report which has been running longer than its timeout has died.
+
+    It's only dead once the result of its task, or (before the merge task is
+    queued) of each of its shard tasks, shows that it has finished. A result
+    which can't be found, e.g. because it has expired, says nothing, so the
+    report is left alone rather than generated twice. Progress isn't taken
+    into account, since it may have been evicted from (or never have reached)
+    the cache.
+    """
+    if report.task_id:
+        results = [report.task_result]
+    else:
+        results = report.shard_task_results
+    if any(is_alive(result) for result in results):
+        return False
+    if not results or None in results:
+        logger.warning(
+            "Can't tell whether the task of report %s is still running", report.uuid
+        )
+        return False
+    return True
+
+
+def get_stale_reports() -> list[Report]:
+    # Unfinished reports started longer ago than their type's timeout
+    now = timezone.now()
+    timeouts = [
+        get_timeout(report_type)
+        for report_type in getattr(settings, "OSCAR_REPORTS_TIMEOUTS", {})
+    ]
+    shortest = min([get_in_flight_timeout(), *timeouts])
+    reports = [
+        report
+        for report in Report.objects.unfinished().filter(started_on__lt=now - shortest)
+        if report.started_on is not None
+        and report.started_on < now - get_timeout(report.type_code)
+    ]
+    Report.prefetch_task_results(reports)
+    return reports
+
+
+def reap_stale_reports() -> dict[str, int]:
+    """
+    Queue reports whose tasks have died again, up to
+    ``OSCAR_REPORTS_MAX_RETRIES`` times, then mark them as failed. Returns the
+    number of reports re-queued and failed. Nothing is reaped if the task
+    backend can't return task results.
+    """
+    reaped = {"requeued": 0, "failed": 0}
+    if not tasks.can_get_results():
+        logger.warning(
+            "The task backend can't tell whether reports are still running, so "
+            "stale reports aren't reaped"
+        )
+        return reaped
+    for report in get_stale_reports():
+        if not is_dead(report):
+            continue
+        if report.retries < get_max_retries():
+            # Pick up from the report's last checkpoint, if it has one
+            try:
+                report.queue(report.report_format, resume=True)
+            except ReportLimitExceeded:
+                # Try again once other reports have finished
+                continue
+            report.retries += 1
+            report.save(update_fields=["retries"])
+            reaped["requeued"] += 1
+        else:
+            report.fail()
+            reaped["failed"] += 1
+    return reaped
@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+from collections.abc import Iterable, Mapping
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Any
+
+from django.conf import settings
+from django.db import connection, models, transaction
+from django.db.models import Count, F, Max, Sum
+from django.utils import timezone
+from oscar.core.loading import get_model
+
+from .models import OfferDailyRollup, OrderDailyRollup
+
+Order = get_model("order", "Order")
+OrderDiscount = get_model("order", "OrderDiscount")
+
+# First key of the advisory locks taken on each day's rollups
+LOCK_NAMESPACE = 0x6F726570
+
+
+def is_enabled() -> bool:
+    # Maintain the daily rollup tables, and offer the summary reports which
+    # read from them, e.g. OSCAR_REPORTS_ROLLUPS = True
+    return getattr(settings, "OSCAR_REPORTS_ROLLUPS", False)
+
+
+def get_refresh_days() -> int:
+    # Number of recent days rebuilt by each nightly refresh, correcting any
+    # changes made to orders after they were placed
+    return getattr(settings, "OSCAR_REPORTS_ROLLUP_REFRESH_DAYS", 2)
+
+
+def get_day_range(day: date) -> tuple[datetime, datetime]:
+    # The start and end of a local day, so that orders can be filtered on the
+    # indexed ``date_placed`` column rather than on the date it's cast to
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    end = timezone.make_aware(datetime.combine(day + timedelta(days=1), time.min))
+    return start, end
+
+
+def lock_day(day: date) -> None:
+    # Serialise the changes to a day's rollups until the transaction ends, so
+    # that a rebuild and an order being added can't interleave
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT pg_advisory_xact_lock(%s, %s)", [LOCK_NAMESPACE, day.toordinal()]
+        )
+
+
+def refresh_day(day: date) -> dict[str, int]:
+    """
+    Rebuild the rollups of ``day`` from the order tables. Returns the number of
+    rows written to each table.
+    """
+    start, end = get_day_range(day)
+    with transaction.atomic():
+        lock_day(day)
+        OrderDailyRollup.objects.filter(day=day).delete()
+        OfferDailyRollup.objects.filter(day=day).delete()
+        orders = (
+            Order._default_manager.filter(date_placed__gte=start, date_placed__lt=end)
+            .order_by()
+            .values("currency")
+            .annotate(
+                num_orders=Count("pk"),
+                sum_incl_tax=Sum("total_incl_tax"),
+                sum_excl_tax=Sum("total_excl_tax"),
+            )
+        )
+        order_rollups = OrderDailyRollup.objects.bulk_create(
+            OrderDailyRollup(
+                day=day,
+                currency=row["currency"],
+                num_orders=row["num_orders"],
+                total_incl_tax=row["sum_incl_tax"],
+                total_excl_tax=row["sum_excl_tax"],
+            )
+            for row in orders
+        )
+        # Rows with an offer, though typed as if the offer ID could be null
+        discounts: Iterable[Mapping[str, Any]] = (
+            OrderDiscount._default_manager.filter(
+                order__date_placed__gte=start,
+                order__date_placed__lt=end,
+                offer_id__isnull=False,
+            )
+            .order_by()
+            .values("offer_id")
+            .annotate(
+                name=Max("offer_name"),
+                num_orders=Count("order", distinct=True),
+                sum_discount=Sum("amount"),
+            )
+        )
+        offer_rollups = OfferDailyRollup.objects.bulk_create(
+            OfferDailyRollup(
+                day=day,
+                offer_id=row["offer_id"],
+                offer_name=row["name"],
+                num_orders=row["num_orders"],
+                total_discount=row["sum_discount"],
+            )
+            for row in discounts
+        )
+    return {"orders": len(order_rollups), "offers": len(offer_rollups)}
+
+
+def refresh(start_date: date, end_date: date) -> dict[str, int]:
+    """
+    Rebuild the rollups of every day from ``start_date`` to ``end_date``
+    (inclusive) from the order tables, a day per transaction. Returns the
+    number of rows written to each table.
+    """
+    written = {"orders": 0, "offers": 0}
+    day = start_date
+    while day <= end_date:
+        for table, count in refresh_day(day).items():
+            written[table] += count
+        day += timedelta(days=1)
+    return written
+
+
+def refresh_recent(today: date | None = None) -> dict[str, int]:
+    # Rebuild the rollups of the last ``OSCAR_REPORTS_ROLLUP_REFRESH_DAYS`` days
+    today = today or timezone.localdate()
+    return refresh(today - timedelta(days=get_refresh_days()), today)
+
+
+def _increment(
+    model: type[models.Model],
+    keys: dict[str, Any],
+    defaults: dict[str, Any],
+    deltas: dict[str, int | Decimal],
+) -> None:
+    # Add ``deltas`` to the row with ``keys``, creating it if there's none yet.
+    # The day's lock is held, so the row can't be created concurrently.
+    rows = model._default_manager.filter(**keys)
+    if not rows.update(**{field: F(field) + delta for field, delta in deltas.items()}):
+        model._default_manager.create(**keys, **defaults, **deltas)
+
+
+def add_order(order_id: int) -> None:
+    """
+    Add a newly placed order, and its discounts, to the rollups of its day.
+    Called once the order has been committed. The totals are incremented under
+    the day's lock, so the cost doesn't grow with the day's orders, and the
+    next refresh corrects them if the day was rebuilt in the moment between the
+    order being committed and added.
+    """
+    order = (
+        Order._default_manager.filter(pk=order_id)
+        .values("date_placed", "currency", "total_incl_tax", "total_excl_tax")
+        .first()
+    )
+    if order is None:
+        return
+    day = timezone.localdate(order["date_placed"])
+    # Rows with an offer, though typed as if the offer ID could be null
+    discounts: Iterable[Mapping[str, Any]] = (
+        OrderDiscount._default_manager.filter(order_id=order_id, offer_id__isnull=False)
+        .order_by()
+        .values("offer_id")
+        .annotate(name=Max("offer_name"), sum_discount=Sum("amount"))
+    )
+    with transaction.atomic():
+        lock_day(day)
+        _increment(
+            OrderDailyRollup,
+            keys={"day": day, "currency": order["currency"]},
+            defaults={},
+            deltas={
+                "num_orders": 1,
+                "total_incl_tax": order["total_incl_tax"],
+                "total_excl_tax": order["total_excl_tax"],
+            },
+        )
+        for discount in discounts:
+            _increment(
+                OfferDailyRollup,
+                keys={"day": day, "offer_id": discount["offer_id"]},
+                defaults={"offer_name": discount["name"]},
+                deltas={"num_orders": 1, "total_discount": discount["sum_discount"]},
+            )
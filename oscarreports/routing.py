@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import Model
+
+# Database alias reads are sent to while a report is being generated
+_read_alias: ContextVar[str | None] = ContextVar(
+    "oscarreports_read_alias", default=None
+)
+
+
+def get_report_database() -> str | None:
+    # Database alias (usually a read replica) report queries are run on, e.g.
+    # OSCAR_REPORTS_DATABASE = "replica"
+    return getattr(settings, "OSCAR_REPORTS_DATABASE", None)
+
+
+@contextmanager
+def report_database() -> Iterator[str | None]:
+    """
+    Send reads to ``OSCAR_REPORTS_DATABASE`` within the block, as long as
+    ``ReportDatabaseRouter`` is in ``DATABASE_ROUTERS``.
+    """
+    token = _read_alias.set(get_report_database())
+    try:
+        yield _read_alias.get()
+    finally:
+        _read_alias.reset(token)
+
+
+def is_report_model(model: type[Model]) -> bool:
+    # A report's own rows are always read from the database they're written
+    # to, so that e.g. a cancellation is seen straight away, regardless of
+    # replication lag
+    return model._meta.app_config.name == __package__
+
+
+class ReportDatabaseRouter:
+    """
+    Routes reads made while a report is being generated (i.e. within
+    ``report_database()``) to ``OSCAR_REPORTS_DATABASE``. Everything else,
+    including all writes, is left to the other routers in
+    ``DATABASE_ROUTERS``, or the default database.
+    """
+
+    def db_for_read(self, model: type[Model], **hints: Any) -> str | None:
+        alias = _read_alias.get()
+        if alias is None or is_report_model(model):
+            return None
+        return alias
+
+    def db_for_write(self, model: type[Model], **hints: Any) -> str | None:
+        # Objects read from the replica are saved to the primary
+        instance = hints.get("instance")
+        alias = get_report_database()
+        if alias is not None and instance is not None and instance._state.db == alias:
+            return DEFAULT_DB_ALIAS
+        return None
+
+    def allow_relation(self, obj1: Model, obj2: Model, **hints: Any) -> bool | None:
+        # The replica holds the same rows as the primary
+        alias = get_report_database()
+        databases = {obj1._state.db, obj2._state.db}
+        if alias is not None and databases <= {alias, DEFAULT_DB_ALIAS}:
+            return True
+        return None
@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+from datetime import datetime
+import logging
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import ReportSchedule
+from .queueing import ReportLimitExceeded
+
+logger = logging.getLogger(__name__)
+
+
+def run_due_schedules(now: datetime | None = None) -> dict[str, int]:
+    """
+    Create and queue a report for each active schedule which is due, and work
+    out when each should next run. Returns the number of reports queued, of
+    schedules skipped because of a concurrency limit, which are tried again by
+    the next run, and of schedules which failed. A failure is logged, and the
+    schedule moves on to its next run, without stopping the others.
+    """
+    now = now or timezone.now()
+    ran = {"queued": 0, "skipped": 0, "failed": 0}
+    with transaction.atomic():
+        # Concurrent runs each take different schedules
+        schedules = ReportSchedule.objects.due(now).select_for_update(skip_locked=True)
+        for schedule in schedules:
+            try:
+                with transaction.atomic():
+                    report = schedule.create_report(now)
+                    report.queue(schedule.report_format)
+            except ReportLimitExceeded:
+                ran["skipped"] += 1
+                continue
+            except Exception:
+                logger.exception("Failed to run report schedule %s", schedule.pk)
+                ran["failed"] += 1
+            else:
+                schedule.last_run_on = now
+                ran["queued"] += 1
+            schedule.schedule_next(now)
+            schedule.save(update_fields=["last_run_on", "next_run_on"])
+    return ran
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+from collections.abc import Iterable
+from datetime import date, datetime, timedelta
+from typing import IO
+import shutil
+
+from django.conf import settings
+from django.db.models.query import QuerySet
+from oscar.apps.dashboard.reports.reports import ReportGenerator
+
+from .streaming import ReportOutput
+
+
+def get_shard_count(type_code: str) -> int:
+    # Number of parallel tasks to split a report of the given type into, e.g.
+    # OSCAR_REPORTS_SHARDS = {"order_report": 8}
+    shards = getattr(settings, "OSCAR_REPORTS_SHARDS", {})
+    return max(int(shards.get(type_code, 1)), 1)
+
+
+def as_date(value: date | datetime) -> date:
+    return value.date() if isinstance(value, datetime) else value
+
+
+def split_date_range(
+    start_date: date,
+    end_date: date,
+    count: int,
+) -> list[tuple[date, date]]:
+    """
+    Split the inclusive day range ``start_date`` to ``end_date`` into at most
+    ``count`` contiguous, non-overlapping, inclusive day ranges.
+    """
+    num_days = (end_date - start_date).days + 1
+    if num_days <= 0:
+        return []
+    count = min(count, num_days)
+    size, remainder = divmod(num_days, count)
+    ranges = []
+    lower = start_date
+    for i in range(count):
+        days = size + (1 if i < remainder else 0)
+        upper = lower + timedelta(days=days - 1)
+        ranges.append((lower, upper))
+        lower = upper + timedelta(days=1)
+    return ranges
+
+
+def is_ordered_by_date_descending(generator: ReportGenerator) -> bool:
+    """
+    Check whether the generator lists its rows newest-first, in which case
+    per-date-range output must be concatenated in reverse date order.
+    """
+    queryset = generator.queryset
+    field_name = generator.date_range_field_name
+    if not field_name or not isinstance(queryset, QuerySet):
+        return False
+    ordering = list(queryset.query.order_by)
+    if not ordering and queryset.query.default_ordering:
+        ordering = list(queryset.model._meta.ordering)
+    return bool(ordering) and ordering[0] == f"-{field_name}"
+
+
+def concatenate(parts: Iterable[IO[bytes]], output: ReportOutput) -> None:
+    """
+    Concatenate CSV output files into ``output``, keeping only the header line
+    of the first file.
+    """
+    for i, part in enumerate(parts):
+        if i > 0:
+            part.readline()
+        shutil.copyfileobj(part, output)
@@ -0,0 +1,5 @@
+from django.dispatch import Signal
+
+# Sent when a report has finished generating, with the ``report`` and its
+# ``metrics`` (see ``Report.metrics``) as arguments.
+report_generated = Signal()
@@ -0,0 +1,223 @@
+from __future__ import annotations
+
+from collections.abc import Iterable, Iterator
+from contextlib import AbstractContextManager
+from io import BytesIO
+from typing import Any, Protocol
+import hashlib
+import time
+
+from django.conf import settings
+from django.db.models.query import QuerySet
+from django.http import HttpResponse, StreamingHttpResponse
+from oscar.apps.dashboard.reports.reports import ReportFormatter, ReportGenerator
+
+from .progress import ProgressTracker, estimate_count
+from .querysets import iterate_report_objects
+
+
+def get_spool_size() -> int:
+    # Maximum number of bytes of report output held in memory before the
+    # output is spooled to a temporary file on disk.
+    return getattr(settings, "OSCAR_REPORTS_SPOOL_SIZE", 1024 * 1024)
+
+
+class WritableFile(Protocol):
+    def write(self, data: bytes, /) -> int: ...
+
+    def flush(self) -> None: ...
+
+    def close(self) -> None: ...
+
+
+class ReportOutput:
+    """
+    Binary file wrapper which measures the report content written through it:
+    its size in bytes, its SHA-256 digest and the number of data rows. It also
+    times how long is spent waiting for rows and writing the content, and
+    reports the rows written so far to ``progress``, if set.
+    """
+
+    def __init__(self, fileobj: WritableFile) -> None:
+        self.fileobj = fileobj
+        self.size = 0
+        self.row_count: int | None = None
+        self.read_time = 0.0
+        self.write_time = 0.0
+        self.progress: ProgressTracker | None = None
+        self._hash = hashlib.sha256()
+
+    @property
+    def sha256(self) -> str:
+        return self._hash.hexdigest()
+
+    def write(self, data: bytes) -> int:
+        start = time.perf_counter()
+        self._hash.update(data)
+        self.size += len(data)
+        written = self.fileobj.write(data)
+        self.write_time += time.perf_counter() - start
+        return written
+
+    def flush(self) -> None:
+        self.fileobj.flush()
+
+    def close(self) -> None:
+        self.fileobj.close()
+
+    @property
+    def closed(self) -> bool:
+        return bool(getattr(self.fileobj, "closed", False))
+
+    def add_rows(self, count: int) -> None:
+        self.row_count = (self.row_count or 0) + count
+        if self.progress is not None:
+            self.progress.update(self.row_count)
+
+    def add_timings(self, other: ReportOutput) -> None:
+        self.read_time += other.read_time
+        self.write_time += other.write_time
+
+    def count_rows(self, objects: Iterable[Any]) -> Iterator[Any]:
+        self.add_rows(0)
+        iterator = iter(objects)
+        while True:
+            start = time.perf_counter()
+            try:
+                obj = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                self.read_time += time.perf_counter() - start
+            self.add_rows(1)
+            yield obj
+
+
+class ReportStream:
+    """
+    Minimal text-mode file object which the formatters write rows into.
+
+    Each write is encoded and passed straight through to the underlying binary
+    file, so the formatter never accumulates the report body in memory.
+    """
+
+    encoding = "utf-8"
+
+    def __init__(self, output: ReportOutput) -> None:
+        self.output = output
+
+    def write(self, data: str) -> int:
+        self.output.write(data.encode(self.encoding))
+        return len(data)
+
+    def flush(self) -> None:
+        self.output.flush()
+
+
+class RowWriter(Protocol):
+    def writerow(self, row: Iterable[Any], /) -> Any: ...
+
+
+class FileFormatter(ReportFormatter):
+    """
+    Base class of formatters which write the rows of a generator's CSV
+    formatter in another file format, so that every report with a CSV
+    formatter can be written in that format too. ``Report.get_generator()``
+    wraps the CSV formatter in one, for the formats listed in
+    ``oscarreports.formats``.
+
+    Subclasses implement ``open_writer()``.
+    """
+
+    content_type = "application/octet-stream"
+    extension = ""
+    # How the file is compressed as it's written (see
+    # ``oscarreports.compression``), in place of ``OSCAR_REPORTS_COMPRESSION``.
+    # Formats compressed internally (e.g. XLSX, which is a zip file) leave
+    # this unset.
+    compression: str | None = None
+
+    def __init__(self, csv_formatter: ReportFormatter) -> None:
+        self.csv_formatter = csv_formatter
+
+    def open_writer(self, output: ReportOutput) -> AbstractContextManager[RowWriter]:
+        # Context manager yielding an object with a CSV writer's
+        # ``writerow()``, which writes the file into ``output`` on exit
+        raise NotImplementedError
+
+    def generate_file(self, output: ReportOutput, objects: Iterable[Any]) -> None:
+        with self.open_writer(output) as writer:
+            # The CSV formatter writes its rows into ``writer``
+            self.csv_formatter.get_csv_writer = (  # type:ignore[attr-defined]
+                lambda file_handle, **kwargs: writer
+            )
+            self.csv_formatter.generate_csv(None, objects)  # type:ignore[attr-defined]
+
+    def generate_response(self, objects: Iterable[Any], **kwargs: Any) -> HttpResponse:
+        # Used by Oscar's own (synchronous) report view
+        content = BytesIO()
+        self.generate_file(ReportOutput(content), objects)
+        response = HttpResponse(content.getvalue(), content_type=self.content_type)
+        response["Content-Disposition"] = "attachment; filename=%s" % self.filename(
+            **kwargs
+        )
+        return response
+
+    def filename(self, **kwargs: Any) -> str:
+        name = self.csv_formatter.filename(**kwargs)
+        return "{}.{}".format(name.rsplit(".", 1)[0], self.extension)
+
+
+def write_report(generator: ReportGenerator, output: ReportOutput) -> str:
+    """
+    Run the given report generator, writing its output to ``output``. Returns
+    the MIME type of the written content.
+
+    CSV formatters (anything with a ``generate_csv`` method, which includes all
+    of the stock Oscar formatters) write their rows directly into ``output``,
+    reading querysets in chunks from a server-side cursor.
+    ``FileFormatter`` subclasses (e.g. XLSX) do the same in their own format.
+    Any other formatter falls back to rendering an ``HttpResponse``, which is
+    then copied into ``output``.
+    """
+    formatter = generator.formatter
+    if isinstance(formatter, FileFormatter):
+        # File formatters write their file directly into ``output``, in the
+        # same way
+        def generate_file_response(objects: Iterable[Any], **kwargs: Any) -> None:
+            if output.progress is not None and isinstance(objects, QuerySet):
+                output.progress.set_total(estimate_count(objects))
+            objects = iterate_report_objects(generator, objects)
+            formatter.generate_file(output, output.count_rows(objects))
+
+        formatter.generate_response = generate_file_response  # type:ignore[assignment]
+        generator.generate()
+        return formatter.content_type
+
+    if hasattr(formatter, "generate_csv"):
+        stream = ReportStream(output)
+
+        # Intercept the formatter's response building, so that a generator's
+        # own ``generate()`` method still decides which objects are reported on.
+        def generate_response(objects: Iterable[Any], **kwargs: Any) -> None:
+            if output.progress is not None and isinstance(objects, QuerySet):
+                output.progress.set_total(estimate_count(objects))
+            objects = iterate_report_objects(generator, objects)
+            formatter.generate_csv(stream, output.count_rows(objects))
+
+        formatter.generate_response = generate_response  # type:ignore[method-assign]
+        generator.generate()
+        stream.flush()
+        return getattr(generator, "content_type", "text/csv")
+
+    report = generator.generate()
+    if isinstance(report, StreamingHttpResponse):
+        for chunk in report.streaming_content:
+            output.write(chunk)
+    elif isinstance(report, HttpResponse):
+        output.write(report.content)
+    else:
+        raise TypeError(
+            f"Expected HttpResponse from generator, got {type(report).__name__}"
+        )
+    return report["content-type"]
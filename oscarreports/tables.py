@@ -1,7 +1,11 @@
+from __future__ import annotations
+
 from django.utils.translation import gettext_lazy as _
 from django_tables2 import Column, TemplateColumn
 from oscar.apps.dashboard.tables import DashboardTable
 
+from .pagination import KeysetPage
+
 
 class ReportTable(DashboardTable):
     description = Column(accessor="description", orderable=False)
@@ -15,7 +19,10 @@ class ReportTable(DashboardTable):
         accessor="owner__get_full_name", orderable=False, verbose_name=_("Owner")
     )
     status = Column(
-        accessor="status_name", orderable=False, verbose_name=_("Report Status")
+        accessor="status_name",
+        orderable=False,
+        verbose_name=_("Report Status"),
+        attrs={"td": {"data-report-field": "status_name"}},
     )
     task_status = Column(
         accessor="task_status", orderable=False, verbose_name=_("Task Status")
@@ -25,10 +32,22 @@ class ReportTable(DashboardTable):
         verbose_name=_("File Size"),
         orderable=False,
     )
+    row_count = Column(
+        accessor="row_count",
+        orderable=False,
+        verbose_name=_("Row Count"),
+        attrs={"td": {"data-report-field": "row_count"}},
+    )
+    progress = TemplateColumn(
+        template_name="oscar/dashboard/reports/report_row_progress.html",
+        verbose_name=_("Progress"),
+        orderable=False,
+        attrs={"td": {"data-report-field": "progress"}},
+    )
 
-    queued_on = Column(accessor="queued_on")
-    started_on = Column(accessor="started_on")
-    completed_on = Column(accessor="completed_on")
+    queued_on = Column(accessor="queued_on", orderable=False)
+    started_on = Column(accessor="started_on", orderable=False)
+    completed_on = Column(accessor="completed_on", orderable=False)
 
     actions = TemplateColumn(
         template_name="oscar/dashboard/reports/report_row_actions.html",
@@ -36,5 +55,17 @@ class ReportTable(DashboardTable):
         orderable=False,
     )
 
+    # Set by the view, which pages through reports by keyset
+    keyset_page: KeysetPage | None = None
+
     class Meta(DashboardTable.Meta):
-        pass
+        template_name = "oscar/dashboard/reports/report_table.html"
+        # Identify rows to update in place from the status endpoint
+        row_attrs = {
+            "data-report-uuid": lambda record: record.uuid,
+            "data-report-status": lambda record: record.status,
+        }
+
+    def get_caption_display(self) -> str:
+        # The table isn't paginated by django-tables2, so has no row count
+        return str(self.caption)
@@ -1,13 +1,117 @@
 from __future__ import annotations
 
+from collections.abc import Iterable
+from importlib import import_module
+from typing import Any
 from uuid import UUID
 
-from django_tasks import task
+from django.apps import apps
+from django.db import models
+from django_tasks import TaskResult, task
+from django_tasks.backends.base import BaseTaskBackend
+from django_tasks.exceptions import TaskResultDoesNotExist
+
+from .progress import ReportCancelled
 
 
 @task()
 def generate_report(report_uuid: str, report_format: str) -> None:
+    from . import models, profiling
+
+    report = models.Report.objects.get(uuid=UUID(report_uuid))
+    try:
+        with profiling.profile_report(report):
+            report.generate(report_format)
+    except ReportCancelled:
+        report.delete_partial_files()
+
+
+@task()
+def generate_report_shard(
+    report_uuid: str,
+    report_format: str,
+    shard_index: int,
+) -> None:
     from . import models
 
     report = models.Report.objects.get(uuid=UUID(report_uuid))
-    report.generate(report_format)
+    try:
+        report.generate_shard(report_format, shard_index)
+    except ReportCancelled:
+        report.delete_partial_files()
+
+
+@task()
+def merge_report_shards(report_uuid: str, report_format: str) -> None:
+    from . import models
+
+    report = models.Report.objects.get(uuid=UUID(report_uuid))
+    try:
+        report.merge_shards(report_format)
+    except ReportCancelled:
+        report.delete_partial_files()
+
+
+@task()
+def reap_stale_reports() -> dict[str, int]:
+    from . import reaper
+
+    return reaper.reap_stale_reports()
+
+
+@task()
+def run_report_schedules() -> dict[str, int]:
+    from . import scheduler
+
+    return scheduler.run_due_schedules()
+
+
+@task()
+def refresh_report_rollups() -> dict[str, int]:
+    from . import rollups
+
+    return rollups.refresh_recent()
+
+
+def _get_result_model(backend: BaseTaskBackend) -> type[models.Model] | None:
+    # Database backed task backends (e.g. ``django_tasks_db``) store results
+    # in a ``DBTaskResult`` model alongside the backend class.
+    package = type(backend).__module__.rpartition(".")[0]
+    if not package or not apps.is_installed(package):
+        return None
+    try:
+        module = import_module(f"{package}.models")
+    except ImportError:
+        return None
+    return getattr(module, "DBTaskResult", None)
+
+
+def can_get_results() -> bool:
+    # Whether the task backend can say if a report's task is still running
+    return generate_report.get_backend().supports_get_result
+
+
+def get_results(result_ids: Iterable[str]) -> dict[str, TaskResult[Any]]:
+    """
+    Fetch the results of many report tasks at once, keyed by result ID.
+    Results which can't be retrieved are omitted.
+    """
+    result_ids = [result_id for result_id in result_ids if result_id]
+    if not result_ids or not can_get_results():
+        return {}
+    backend = generate_report.get_backend()
+    # One query for database backed task backends
+    model = _get_result_model(backend)
+    if model is not None:
+        return {
+            str(obj.pk): obj.task_result  # type:ignore[attr-defined]
+            for obj in model._default_manager.filter(pk__in=result_ids)
+        }
+    # Otherwise, one backend call per result
+    results = {}
+    for result_id in result_ids:
+        try:
+            results[result_id] = backend.get_result(result_id)
+        except TaskResultDoesNotExist:
+            pass
+    return results
@@ -0,0 +1,81 @@
+from io import StringIO
+import json
+
+from django.core.management import call_command
+from django.test import TestCase
+from oscar.core.loading import get_model
+
+from .. import benchmark, models
+from ..formats import FORMAT_CHOICES
+
+Order = get_model("order", "Order")
+Line = get_model("order", "Line")
+OrderDiscount = get_model("order", "OrderDiscount")
+
+
+class BenchmarkTest(TestCase):
+    def test_seed_orders(self) -> None:
+        created = benchmark.seed_orders(
+            10, lines_per_order=3, discount_every=2, batch_size=4
+        )
+        self.assertEqual(
+            created, {"users": 1, "orders": 10, "lines": 30, "discounts": 5}
+        )
+        self.assertEqual(Order.objects.count(), 10)
+        self.assertEqual(Line.objects.count(), 30)
+        self.assertEqual(OrderDiscount.objects.count(), 5)
+
+        benchmark.clear_seeded_data()
+        self.assertEqual(Order.objects.count(), 0)
+
+    def test_benchmark_command(self) -> None:
+        out = StringIO()
+        call_command(
+            "benchmark_reports",
+            "--seed=20",
+            "--type=order_report",
+            "--type=conditional-offers",
+            "--format=CSV",
+            "--repeat=2",
+            "--trace-memory",
+            stdout=out,
+        )
+        data = json.loads(out.getvalue())
+        self.assertEqual(data["seeded"]["orders"], 20)
+        self.assertEqual(data["environment"]["orders"], 20)
+        results = data["results"]
+        self.assertEqual(
+            [(r["type_code"], r["format"], r["run"]) for r in results],
+            [
+                ("order_report", "CSV", 0),
+                ("order_report", "CSV", 1),
+                ("conditional-offers", "CSV", 0),
+                ("conditional-offers", "CSV", 1),
+            ],
+        )
+        self.assertEqual(results[0]["rows"], 20)
+        # One row per offer applied to the 5 discounted orders
+        self.assertEqual(results[2]["rows"], 5)
+        for result in results:
+            self.assertNotIn("error", result)
+            self.assertGreater(result["rows_per_second"], 0)
+            self.assertGreater(result["queries"], 0)
+            self.assertGreater(result["peak_traced_memory"], 0)
+        # Benchmarked reports are cleaned up
+        self.assertEqual(models.Report.objects.count(), 0)
+
+    def test_benchmark_every_format(self) -> None:
+        benchmark.seed_orders(5)
+        results = list(benchmark.run_benchmarks(type_codes=["order_report"]))
+        self.assertEqual(
+            [result["format"] for result in results],
+            [report_format for report_format, label in FORMAT_CHOICES],
+        )
+        for result in results:
+            self.assertNotIn("error", result)
+            self.assertEqual(result["rows"], 5)
+
+    def test_benchmark_unsupported_format(self) -> None:
+        result = benchmark.benchmark_report("order_report", "HTML")
+        self.assertIn("error", result)
+        self.assertEqual(models.Report.objects.count(), 0)
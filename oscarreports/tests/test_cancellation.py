@@ -0,0 +1,273 @@
+from datetime import timedelta
+from io import StringIO
+from typing import Any
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from django_tasks import TaskResultStatus
+from oscar.test.factories import create_order
+from oscar.test.testcases import WebTestCase
+
+from .. import models, progress, reaper, tasks
+
+try:
+    # For Oscar >=4.0
+    from oscar.apps.dashboard.permissions import DashboardPermission
+
+    _permissions = DashboardPermission.get("user_record")
+except ImportError:
+    _permissions = WebTestCase.permissions
+
+try:
+    try:
+        from psycopg.types.range import Range as DateTimeTZRange
+    except ImportError:
+        from psycopg2.extras import DateTimeTZRange
+except ImportError:
+    raise ImproperlyConfigured("Error loading psycopg2 or psycopg module")
+
+
+def create_report(owner: User) -> models.Report:
+    report = models.Report()
+    report.owner = owner
+    report.type_code = "order_report"
+    report.date_range = DateTimeTZRange(
+        lower=(timezone.now() - timedelta(days=2)), upper=(timezone.now())
+    )
+    report.save()
+    return report
+
+
+class CancelReportTest(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.staff_user = User.objects.create_user(
+            username="root", email="root@example.com", is_staff=True
+        )
+        for days in range(3):
+            order = create_order(user=self.staff_user)
+            order.date_placed = timezone.now() - timedelta(days=days)
+            order.save()
+        self.report = create_report(self.staff_user)
+
+    def test_cancel_queued_report(self) -> None:
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.report.queue()
+        self.assertTrue(self.report.cancel())
+        self.assertEqual(self.report.status, models.Report.STATUS_CANCELLED)
+        # The task stops as soon as it starts
+        for callback in callbacks:
+            callback()
+        self.report.refresh_from_db()
+        self.assertEqual(self.report.status, models.Report.STATUS_CANCELLED)
+        self.assertIsNone(self.report.started_on)
+        self.assertFalse(self.report.report_file)
+        # Finished reports can't be cancelled
+        self.assertFalse(self.report.cancel())
+
+    @override_settings(OSCAR_REPORTS_PROGRESS_INTERVAL=0)
+    def test_cancel_running_report(self) -> None:
+        save = progress.ProgressTracker.save
+
+        def cancel_after_first_row(tracker: progress.ProgressTracker) -> None:
+            save(tracker)
+            if tracker.rows:
+                models.Report.objects.get(pk=self.report.pk).cancel()
+
+        with mock.patch.object(
+            progress.ProgressTracker, "save", cancel_after_first_row
+        ):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.report.queue()
+        self.report.refresh_from_db()
+        self.assertEqual(self.report.status, models.Report.STATUS_CANCELLED)
+        self.assertIsNotNone(self.report.started_on)
+        self.assertIsNone(self.report.completed_on)
+        self.assertFalse(self.report.report_file)
+
+    @override_settings(OSCAR_REPORTS_SHARDS={"order_report": 3})
+    def test_cancel_sharded_report(self) -> None:
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.report.queue()
+        # Run the first two shards only
+        self.report.generate_shard("CSV", 0)
+        self.report.generate_shard("CSV", 1)
+        storage = self.report.report_file.storage
+        shard_name = self.report.get_shard_filename("CSV", 0)
+        self.assertTrue(storage.exists(shard_name))
+
+        self.report.refresh_from_db()
+        self.assertTrue(self.report.cancel())
+        self.assertFalse(storage.exists(shard_name))
+        # The remaining shard stops, and no merge is queued
+        tasks.generate_report_shard.call(str(self.report.uuid), "CSV", 2)
+        self.assertFalse(storage.exists(self.report.get_shard_filename("CSV", 2)))
+        self.report.refresh_from_db()
+        self.assertEqual(self.report.status, models.Report.STATUS_CANCELLED)
+        self.assertEqual(self.report.shards_completed, 2)
+        self.assertEqual(len(callbacks), 1)
+
+    def test_requeue_cancelled_report(self) -> None:
+        self.report.cancel()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.report.queue()
+        self.report.refresh_from_db()
+        self.assertEqual(self.report.status, models.Report.STATUS_COMPLETED)
+        self.assertIsNone(self.report.cancelled_on)
+
+
+class CancelReportViewTest(WebTestCase):
+    is_staff = True
+    permissions = _permissions
+
+    def setUp(self) -> None:
+        super().setUp()
+        assert self.user is not None
+        self.report = create_report(self.user)
+        with self.captureOnCommitCallbacks():
+            self.report.queue()
+
+    def _get_cancel_form(self) -> Any:
+        url = reverse("dashboard:reports-cancel", args=[self.report.uuid])
+        response = self.get(reverse("dashboard:reports-index"))
+        return next(form for form in response.forms.values() if form.action == url)
+
+    def test_cancel(self) -> None:
+        response = self._get_cancel_form().submit().follow()
+        self.assertContains(response, "Report cancelled")
+        self.report.refresh_from_db()
+        self.assertEqual(self.report.status, models.Report.STATUS_CANCELLED)
+        self.assertFalse(
+            any(form.action.endswith("/cancel/") for form in response.forms.values())
+        )
+
+    def test_cancel_finished(self) -> None:
+        form = self._get_cancel_form()
+        self.report.generate()
+        response = form.submit().follow()
+        self.assertContains(response, "The report has already finished")
+        self.report.refresh_from_db()
+        self.assertEqual(self.report.status, models.Report.STATUS_COMPLETED)
+
+
+class ReaperTest(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.staff_user = User.objects.create_user(
+            username="root", email="root@example.com", is_staff=True
+        )
+        create_order(user=self.staff_user)
+        self.report = create_report(self.staff_user)
+        self.report.queued_on = timezone.now() - timedelta(hours=3)
+        self.report.started_on = timezone.now() - timedelta(hours=2)
+        self.report.task_id = "dead-task"
+        self.report.save()
+        # The backend reports that the report's task has died
+        self.results: dict[str, Any] = {
+            "dead-task": mock.Mock(status=TaskResultStatus.FAILED)
+        }
+        for patcher in [
+            mock.patch.object(tasks, "can_get_results", return_value=True),
+            mock.patch.object(tasks, "get_results", side_effect=self.get_results),
+        ]:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def get_results(self, result_ids: Any) -> dict[str, Any]:
+        return {id: self.results[id] for id in result_ids if id in self.results}
+
+    def test_requeue_then_fail(self) -> None:
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.assertEqual(reaper.reap_stale_reports(), {"requeued": 1, "failed": 0})
+        self.report.refresh_from_db()
+        self.assertEqual(self.report.retries, 1)
+        self.assertEqual(self.report.status, models.Report.STATUS_CREATED)
+        self.assertEqual(len(callbacks), 1)
+
+        # Died again
+        self.report.started_on = timezone.now() - timedelta(hours=2)
+        self.report.task_id = "dead-task"
+        self.report.save()
+        self.assertEqual(reaper.reap_stale_reports(), {"requeued": 0, "failed": 1})
+        self.report.refresh_from_db()
+        self.assertEqual(self.report.status, models.Report.STATUS_FAILED)
+        self.assertEqual(reaper.reap_stale_reports(), {"requeued": 0, "failed": 0})
+
+    def test_running_report_is_kept(self) -> None:
+        running = mock.Mock(status=TaskResultStatus.RUNNING)
+        with mock.patch.object(
+            tasks, "get_results", return_value={"dead-task": running}
+        ):
+            # Even without any progress in the cache
+            self.assertEqual(reaper.reap_stale_reports(), {"requeued": 0, "failed": 0})
+        finished = mock.Mock(status=TaskResultStatus.FAILED)
+        with mock.patch.object(
+            tasks, "get_results", return_value={"dead-task": finished}
+        ):
+            models.Report.prefetch_task_results([self.report])
+            self.assertEqual(reaper.is_dead(self.report), True)
+
+    def test_running_shards_are_kept(self) -> None:
+        self.report.task_id = None
+        self.report.shard_count = 2
+        self.report.shard_task_ids = ["shard-0", "shard-1"]
+        self.report.save()
+        running = mock.Mock(status=TaskResultStatus.RUNNING)
+        finished = mock.Mock(status=TaskResultStatus.SUCCESSFUL)
+        with mock.patch.object(
+            tasks,
+            "get_results",
+            return_value={"shard-0": finished, "shard-1": running},
+        ):
+            self.assertEqual(reaper.reap_stale_reports(), {"requeued": 0, "failed": 0})
+        with mock.patch.object(
+            tasks,
+            "get_results",
+            return_value={"shard-0": finished, "shard-1": finished},
+        ):
+            models.Report.prefetch_task_results([self.report])
+            self.assertEqual(reaper.is_dead(self.report), True)
+
+    def test_unknown_result_is_kept(self) -> None:
+        # E.g. the task's result has expired
+        self.results = {}
+        with self.assertLogs("oscarreports.reaper", "WARNING"):
+            self.assertEqual(reaper.reap_stale_reports(), {"requeued": 0, "failed": 0})
+        # Nor is a sharded report with a shard whose result is missing dead
+        self.report.task_id = None
+        self.report.shard_task_ids = ["shard-0", "shard-1"]
+        self.results = {"shard-0": mock.Mock(status=TaskResultStatus.SUCCESSFUL)}
+        models.Report.prefetch_task_results([self.report])
+        with self.assertLogs("oscarreports.reaper", "WARNING"):
+            self.assertEqual(reaper.is_dead(self.report), False)
+
+    def test_backend_without_results(self) -> None:
+        with (
+            mock.patch.object(tasks, "can_get_results", return_value=False),
+            self.assertLogs("oscarreports.reaper", "WARNING"),
+        ):
+            self.assertEqual(reaper.reap_stale_reports(), {"requeued": 0, "failed": 0})
+        self.report.refresh_from_db()
+        self.assertEqual(self.report.retries, 0)
+
+    @override_settings(OSCAR_REPORTS_TIMEOUTS={"order_report": 3 * 60 * 60})
+    def test_per_type_timeout(self) -> None:
+        self.assertEqual(reaper.reap_stale_reports(), {"requeued": 0, "failed": 0})
+
+    @override_settings(OSCAR_REPORTS_MAX_RETRIES=0)
+    def test_command(self) -> None:
+        stdout = StringIO()
+        call_command("reap_reports", stdout=stdout)
+        self.assertIn("Re-queued 0 and failed 1 stale reports", stdout.getvalue())
+
+    def test_task(self) -> None:
+        kwargs: dict[str, Any] = {}
+        with self.captureOnCommitCallbacks():
+            result = tasks.reap_stale_reports.call(**kwargs)
+        self.assertEqual(result, {"requeued": 1, "failed": 0})
@@ -0,0 +1,141 @@
+from datetime import date, timedelta
+from typing import Any
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.exceptions import ImproperlyConfigured
+from django.http import HttpResponse
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from django_tasks import TaskResultStatus
+from freezegun import freeze_time
+from oscar.test.factories import create_order
+
+from .. import checkpoints, models, reaper, streaming, tasks
+
+try:
+    try:
+        from psycopg.types.range import Range as DateTimeTZRange
+    except ImportError:
+        from psycopg2.extras import DateTimeTZRange
+except ImportError:
+    raise ImproperlyConfigured("Error loading psycopg2 or psycopg module")
+
+
+class SplitByDaysTest(TestCase):
+    def test_split_by_days(self) -> None:
+        self.assertEqual(
+            checkpoints.split_by_days(date(2019, 10, 1), date(2019, 10, 5), 2),
+            [
+                (date(2019, 10, 1), date(2019, 10, 2)),
+                (date(2019, 10, 3), date(2019, 10, 4)),
+                (date(2019, 10, 5), date(2019, 10, 5)),
+            ],
+        )
+        self.assertEqual(
+            checkpoints.split_by_days(date(2019, 10, 1), date(2019, 10, 5), 7),
+            [(date(2019, 10, 1), date(2019, 10, 5))],
+        )
+
+
+@freeze_time("2019-10-03T12:00:00-04:00")
+@override_settings(OSCAR_REPORTS_CHECKPOINT_DAYS={"order_report": 1})
+class CheckpointedReportTest(TestCase):
+    def setUp(self) -> None:
+        self.staff_user = User.objects.create_user(
+            username="root", email="root@example.com", is_staff=True
+        )
+        for days in range(3):
+            order = create_order(user=self.staff_user)
+            order.date_placed = timezone.now() - timedelta(days=days)
+            order.save()
+        self.report = models.Report()
+        self.report.owner = self.staff_user
+        self.report.type_code = "order_report"
+        self.report.date_range = DateTimeTZRange(
+            lower=(timezone.now() - timedelta(days=2)), upper=(timezone.now())
+        )
+        self.report.save()
+        response = self.report.get_generator("CSV").generate()
+        assert isinstance(response, HttpResponse)
+        self.expected = response.content
+
+    def _read_report(self) -> bytes:
+        self.report.refresh_from_db()
+        with self.report.report_file.open("rb") as f:
+            return f.read()
+
+    def test_generate(self) -> None:
+        self.report.generate()
+        self.assertEqual(self._read_report(), self.expected)
+        self.assertEqual(self.report.row_count, 3)
+        self.assertEqual(self.report.mime_type, "text/csv")
+        # Parts are removed once the report is complete
+        self.assertEqual(self.report.checkpoint, {})
+        storage = self.report.report_file.storage
+        self.assertFalse(storage.exists(self.report.get_checkpoint_filename("CSV", 0)))
+
+    def _generate(self, crash_after: int | None = None) -> list[date]:
+        # Generate the report, dying after writing ``crash_after`` parts
+        write_report = models.Report.write_report
+        generated: list[date] = []
+
+        def crashing_write_report(
+            report: models.Report,
+            report_format: str,
+            generator: Any,
+            output: streaming.ReportOutput,
+        ) -> str:
+            if len(generated) == crash_after:
+                raise MemoryError()
+            generated.append(generator.start_date)
+            return write_report(report, report_format, generator, output)
+
+        with mock.patch.object(models.Report, "write_report", crashing_write_report):
+            self.report.generate()
+        return generated
+
+    def test_resume_after_crash(self) -> None:
+        with self.assertRaises(MemoryError):
+            self._generate(crash_after=2)
+        self.report.refresh_from_db()
+        self.assertEqual(self.report.status, models.Report.STATUS_IN_PROGRESS)
+        self.assertEqual(self.report.checkpoint["parts"], 2)
+        self.assertEqual(self.report.checkpoint["rows"], 2)
+        report_progress = self.report.progress
+        assert report_progress is not None
+        self.assertAlmostEqual(report_progress.percent or 0, 200 / 3)
+
+        # The retry only generates the remaining part
+        self.assertEqual(len(self._generate()), 1)
+        self.assertEqual(self._read_report(), self.expected)
+        self.assertEqual(self.report.row_count, 3)
+
+    def test_reaper_resumes(self) -> None:
+        with self.assertRaises(MemoryError):
+            self._generate(crash_after=1)
+        self.report.refresh_from_db()
+        self.report.started_on = timezone.now() - timedelta(hours=2)
+        self.report.task_id = "crashed-task"
+        self.report.save()
+        crashed = mock.Mock(status=TaskResultStatus.FAILED)
+        with (
+            mock.patch.object(tasks, "can_get_results", return_value=True),
+            mock.patch.object(
+                tasks, "get_results", return_value={"crashed-task": crashed}
+            ),
+            self.captureOnCommitCallbacks(execute=True),
+        ):
+            self.assertEqual(reaper.reap_stale_reports(), {"requeued": 1, "failed": 0})
+        self.assertEqual(self._read_report(), self.expected)
+        self.assertEqual(self.report.retries, 1)
+
+    def test_new_run_discards_checkpoint(self) -> None:
+        self.report.checkpoint = checkpoints.new_checkpoint(
+            "CSV", [(date(2019, 1, 1), date(2019, 1, 1))]
+        )
+        self.report.checkpoint["parts"] = 1
+        self.report.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.report.queue()
+        self.assertEqual(self._read_report(), self.expected)
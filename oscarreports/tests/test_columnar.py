@@ -0,0 +1,227 @@
+from datetime import timedelta
+from decimal import Decimal
+from typing import Any
+from unittest import mock, skipIf
+import gzip
+import io
+import json
+
+from django.contrib.auth.models import User
+from django.core.exceptions import ImproperlyConfigured
+from django.test import TestCase
+from django.utils import timezone
+from oscar.test.factories import create_order
+
+from .. import columnar, models, streaming
+
+try:
+    try:
+        from psycopg.types.range import Range as DateTimeTZRange
+    except ImportError:
+        from psycopg2.extras import DateTimeTZRange
+except ImportError:
+    raise ImproperlyConfigured("Error loading psycopg2 or psycopg module")
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:
+    pq = None
+
+
+class NDJSONWriterTest(TestCase):
+    def test_writerow(self) -> None:
+        content = io.BytesIO()
+        with columnar.NDJSONWriter(streaming.ReportOutput(content)) as writer:
+            writer.writerow(["Name", "Total", "Total", "Paid"])
+            writer.writerow(["Ann", Decimal("12.50"), 3, True])
+            writer.writerow(['"Bob"', None, float("inf")])
+        lines = content.getvalue().decode().splitlines()
+        self.assertEqual(
+            lines[0], '{"Name":"Ann","Total":12.50,"Total (2)":3,"Paid":true}'
+        )
+        self.assertEqual(
+            json.loads(lines[1]),
+            {"Name": '"Bob"', "Total": None, "Total (2)": "inf", "Paid": None},
+        )
+
+
+@skipIf(pq is None, "pyarrow isn't installed")
+class ParquetWriterTest(TestCase):
+    def write(self, rows: list[list[Any]], **kwargs: Any) -> Any:
+        content = io.BytesIO()
+        with columnar.ParquetWriter(
+            streaming.ReportOutput(content), **kwargs
+        ) as writer:
+            for row in rows:
+                writer.writerow(row)
+        return pq.ParquetFile(io.BytesIO(content.getvalue()))
+
+    def test_types(self) -> None:
+        parquet_file = self.write(
+            [
+                ["Name", "Total", "Count", "Paid", "Ratio", "Empty"],
+                ["Ann", Decimal("12.50"), 3, True, 0.5, None],
+                ["Bob", Decimal("1.125"), None, False, 1, None],
+            ]
+        )
+        table = parquet_file.read()
+        self.assertEqual(
+            [str(field.type) for field in table.schema],
+            ["string", "decimal128(38, 3)", "int64", "bool", "double", "string"],
+        )
+        self.assertEqual(
+            table.to_pylist()[1],
+            {
+                "Name": "Bob",
+                "Total": Decimal("1.125"),
+                "Count": None,
+                "Paid": False,
+                "Ratio": 1.0,
+                "Empty": None,
+            },
+        )
+
+    def test_row_groups(self) -> None:
+        rows: list[list[Any]] = [
+            ["n", "price", "ratio"],
+            [0, Decimal("1.5"), 0.5],
+            [1, Decimal("2"), 1.5],
+            [2, Decimal("0.5"), 2],
+            [3, 7, Decimal("0.25")],
+            [4, None, None],
+        ]
+        parquet_file = self.write(rows, batch_size=2)
+        self.assertEqual(parquet_file.num_row_groups, 3)
+        table = parquet_file.read()
+        self.assertEqual(table.column("n").to_pylist(), [0, 1, 2, 3, 4])
+        self.assertEqual(
+            table.column("price").to_pylist(),
+            [Decimal("1.5"), Decimal("2.0"), Decimal("0.5"), Decimal("7.0"), None],
+        )
+        self.assertEqual(table.column("ratio").to_pylist(), [0.5, 1.5, 2.0, 0.25, None])
+
+    def test_mixed_types(self) -> None:
+        # Types are widened by values after the first row group, so that every
+        # value is held exactly
+        header = ["n", "price", "paid"]
+        first: list[list[Any]] = [[1, Decimal("1.5"), True], [2, Decimal("2.5"), False]]
+        cases: list[tuple[list[Any], list[str], list[Any]]] = [
+            (
+                [Decimal("3.5"), Decimal("1.25"), None],
+                ["decimal128(38, 1)", "decimal128(38, 2)", "bool"],
+                [Decimal("3.5"), Decimal("1.25"), None],
+            ),
+            ([2.5, 1, True], ["double", "decimal128(38, 1)", "bool"], [2.5, 1, True]),
+            (["3", 1.1, 1], ["string", "double", "string"], ["3", 1.1, "1"]),
+            ([True, Decimal("NaN"), "no"], ["string"] * 3, ["True", "NaN", "no"]),
+            (
+                [2**63, Decimal("0.125"), False],
+                ["decimal128(38, 0)", "decimal128(38, 3)", "bool"],
+                [2**63, Decimal("0.125"), False],
+            ),
+        ]
+        for row, types, values in cases:
+            with self.subTest(row=row):
+                parquet_file = self.write([header, *first, row], batch_size=2)
+                self.assertEqual(
+                    [str(field.type) for field in parquet_file.schema_arrow], types
+                )
+                self.assertEqual(
+                    list(parquet_file.read().to_pylist()[2].values()), values
+                )
+
+    def test_inexact_float(self) -> None:
+        # Numbers which a float can't hold exactly
+        parquet_file = self.write(
+            [["n", "price"], [2**53 + 1, Decimal("0.1")], [0.5, 0.5]], batch_size=1
+        )
+        self.assertEqual(
+            [str(field.type) for field in parquet_file.schema_arrow],
+            ["string", "string"],
+        )
+        self.assertEqual(
+            parquet_file.read().to_pylist(),
+            [{"n": str(2**53 + 1), "price": "0.1"}, {"n": "0.5", "price": "0.5"}],
+        )
+
+    def test_leading_nulls(self) -> None:
+        parquet_file = self.write([["n"], [None], [None], [3], [None]], batch_size=2)
+        self.assertEqual(str(parquet_file.schema_arrow.field("n").type), "int64")
+        self.assertEqual(
+            parquet_file.read().column("n").to_pylist(), [None, None, 3, None]
+        )
+
+    def test_mixed_types_in_first_row_group(self) -> None:
+        parquet_file = self.write(
+            [
+                ["a", "b", "c", "d"],
+                [1, 1, Decimal("1.5"), Decimal("NaN")],
+                ["x", 1.5, 2.25, Decimal("1")],
+            ]
+        )
+        self.assertEqual(
+            [str(field.type) for field in parquet_file.schema_arrow],
+            ["string", "double", "double", "string"],
+        )
+        self.assertEqual(
+            parquet_file.read().to_pylist()[1],
+            {"a": "x", "b": 1.5, "c": 2.25, "d": "1"},
+        )
+
+    def test_empty(self) -> None:
+        parquet_file = self.write([["Name", "Total"]])
+        self.assertEqual(parquet_file.metadata.num_rows, 0)
+        self.assertEqual(parquet_file.schema_arrow.names, ["Name", "Total"])
+
+
+class ColumnarReportTest(TestCase):
+    def setUp(self) -> None:
+        self.staff_user = User.objects.create_user(
+            username="root", email="root@example.com", is_staff=True
+        )
+        self.orders = [create_order(user=self.staff_user) for _ in range(3)]
+        self.report = models.Report()
+        self.report.owner = self.staff_user
+        self.report.type_code = "order_report"
+        self.report.date_range = DateTimeTZRange(
+            lower=(timezone.now() - timedelta(days=2)), upper=(timezone.now())
+        )
+        self.report.save()
+
+    def read_report(self) -> bytes:
+        with self.report.report_file.open("rb") as f:
+            return f.read()
+
+    @skipIf(pq is None, "pyarrow isn't installed")
+    def test_generate_parquet(self) -> None:
+        self.report.generate(columnar.COLUMNAR)
+        self.report.refresh_from_db()
+        self.assertEqual(self.report.status, models.Report.STATUS_COMPLETED)
+        self.assertEqual(self.report.mime_type, columnar.PARQUET_MIME_TYPE)
+        self.assertTrue(str(self.report.report_file.name).endswith(".parquet"))
+        self.assertEqual(self.report.content_encoding, "")
+        self.assertEqual(self.report.row_count, 3)
+        table = pq.read_table(io.BytesIO(self.read_report()))
+        self.assertEqual(table.schema.field("Total incl. tax").type.scale, 2)
+        self.assertEqual(
+            sorted(table.column("Order number").to_pylist()),
+            sorted(str(order.number) for order in self.orders),
+        )
+
+    @mock.patch.object(columnar, "pyarrow", None)
+    def test_generate_ndjson_without_pyarrow(self) -> None:
+        self.report.generate(columnar.COLUMNAR)
+        self.report.refresh_from_db()
+        self.assertEqual(self.report.status, models.Report.STATUS_COMPLETED)
+        self.assertEqual(self.report.mime_type, columnar.NDJSON_MIME_TYPE)
+        self.assertTrue(str(self.report.report_file.name).endswith(".ndjson.gz"))
+        self.assertEqual(self.report.content_encoding, "gzip")
+        rows = [
+            json.loads(line, parse_float=Decimal)
+            for line in gzip.decompress(self.read_report()).splitlines()
+        ]
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(
+            {row["Total incl. tax"] for row in rows},
+            {order.total_incl_tax for order in self.orders},
+        )
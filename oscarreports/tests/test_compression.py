@@ -0,0 +1,118 @@
+from datetime import timedelta
+import gzip
+import hashlib
+import io
+import zipfile
+
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.exceptions import ImproperlyConfigured
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils import timezone
+from freezegun import freeze_time
+from oscar.test.factories import create_order
+
+from .. import downloads, models
+
+try:
+    try:
+        from psycopg.types.range import Range as DateTimeTZRange
+    except ImportError:
+        from psycopg2.extras import DateTimeTZRange
+except ImportError:
+    raise ImproperlyConfigured("Error loading psycopg2 or psycopg module")
+
+
+@freeze_time("2019-10-03T12:00:00-04:00")
+class CompressedReportTest(TestCase):
+    def setUp(self) -> None:
+        self.staff_user = User.objects.create_user(
+            username="root", email="root@example.com", is_staff=True
+        )
+        for days in range(3):
+            order = create_order(user=self.staff_user)
+            order.date_placed = timezone.now() - timedelta(days=days)
+            order.save()
+        self.report = models.Report()
+        self.report.owner = self.staff_user
+        self.report.type_code = "order_report"
+        self.report.date_range = DateTimeTZRange(
+            lower=(timezone.now() - timedelta(days=2)), upper=(timezone.now())
+        )
+        self.report.save()
+        response = self.report.get_generator("CSV").generate()
+        assert isinstance(response, HttpResponse)
+        self.expected = response.content
+
+    def _read_stored(self) -> bytes:
+        with self.report.report_file.open("rb") as f:
+            stored = f.read()
+        self.assertEqual(self.report.file_size, len(stored))
+        self.assertEqual(self.report.sha256, hashlib.sha256(stored).hexdigest())
+        return stored
+
+    @override_settings(OSCAR_REPORTS_COMPRESSION={"order_report": "gzip"})
+    def test_generate_gzip(self) -> None:
+        self.report.generate()
+        self.report.refresh_from_db()
+        self.assertTrue(str(self.report.report_file.name).endswith(".csv.gz"))
+        self.assertEqual(self.report.mime_type, "text/csv")
+        self.assertEqual(self.report.content_encoding, "gzip")
+        self.assertEqual(self.report.row_count, 3)
+        self.assertEqual(gzip.decompress(self._read_stored()), self.expected)
+
+    @override_settings(OSCAR_REPORTS_COMPRESSION={"order_report": "zip"})
+    def test_generate_zip(self) -> None:
+        self.report.generate()
+        self.report.refresh_from_db()
+        self.assertTrue(str(self.report.report_file.name).endswith(".zip"))
+        self.assertEqual(self.report.mime_type, "application/zip")
+        self.assertEqual(self.report.content_encoding, "")
+        self.assertEqual(self.report.row_count, 3)
+        with zipfile.ZipFile(io.BytesIO(self._read_stored())) as zf:
+            self.assertEqual(zf.namelist(), [f"{self.report.uuid}.csv"])
+            self.assertEqual(zf.read(f"{self.report.uuid}.csv"), self.expected)
+
+    @override_settings(
+        OSCAR_REPORTS_COMPRESSION={"order_report": "gzip"},
+        OSCAR_REPORTS_SHARDS={"order_report": 3},
+    )
+    def test_generate_sharded_gzip(self) -> None:
+        with self.captureOnCommitCallbacks(execute=True):
+            self.report.queue()
+        self.report.refresh_from_db()
+        self.assertEqual(self.report.content_encoding, "gzip")
+        self.assertEqual(gzip.decompress(self._read_stored()), self.expected)
+        self.assertEqual(len(mail.outbox), 1)
+
+    @override_settings(OSCAR_REPORTS_COMPRESSION={"order_report": "rar"})
+    def test_unsupported_compression(self) -> None:
+        with self.assertRaises(ValueError):
+            self.report.generate()
+
+    @override_settings(OSCAR_REPORTS_COMPRESSION={"order_report": "gzip"})
+    def test_download_gzip(self) -> None:
+        self.report.generate()
+        stored = self._read_stored()
+        factory = RequestFactory()
+        strategy = downloads.StreamingDownload()
+
+        request = factory.get("/", headers={"Accept-Encoding": "gzip, deflate"})
+        response = strategy.serve(request, self.report, "report.csv")
+        assert isinstance(response, StreamingHttpResponse)
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(response["Vary"], "Accept-Encoding")
+        self.assertEqual(response["ETag"], f'"{self.report.sha256}"')
+        self.assertEqual(b"".join(response.streaming_content), stored)  # type:ignore[arg-type]
+
+        request = factory.get("/")
+        response = strategy.serve(request, self.report, "report.csv")
+        assert isinstance(response, StreamingHttpResponse)
+        self.assertFalse(response.has_header("Content-Encoding"))
+        self.assertEqual(response["Vary"], "Accept-Encoding")
+        self.assertEqual(response["ETag"], f'"{self.report.sha256}-identity"')
+        self.assertEqual(
+            b"".join(response.streaming_content),  # type:ignore[arg-type]
+            self.expected,
+        )
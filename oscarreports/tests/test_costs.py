@@ -0,0 +1,178 @@
+from datetime import datetime, timedelta
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from freezegun import freeze_time
+from oscar.test.factories import create_order
+from oscar.test.testcases import WebTestCase
+
+from .. import costs, forms, models, queueing, tasks
+
+try:
+    # For Oscar >=4.0
+    from oscar.apps.dashboard.permissions import DashboardPermission
+
+    _permissions = DashboardPermission.get("user_record")
+except ImportError:
+    _permissions = WebTestCase.permissions
+
+
+def local_datetime(hour: int, minute: int = 0) -> datetime:
+    return timezone.make_aware(datetime(2019, 10, 3, hour, minute))
+
+
+class OffPeakTest(TestCase):
+    def test_no_off_peak_hours(self) -> None:
+        self.assertIsNone(costs.get_off_peak_start(local_datetime(12)))
+
+    @override_settings(OSCAR_REPORTS_OFF_PEAK_HOURS=(1, 6))
+    def test_off_peak_hours(self) -> None:
+        self.assertIsNone(costs.get_off_peak_start(local_datetime(3)))
+        self.assertEqual(
+            costs.get_off_peak_start(local_datetime(0, 30)), local_datetime(1)
+        )
+        self.assertEqual(
+            costs.get_off_peak_start(local_datetime(12)),
+            local_datetime(1) + timedelta(days=1),
+        )
+
+    @override_settings(OSCAR_REPORTS_OFF_PEAK_HOURS=(22, 6))
+    def test_off_peak_hours_span_midnight(self) -> None:
+        self.assertIsNone(costs.get_off_peak_start(local_datetime(23)))
+        self.assertIsNone(costs.get_off_peak_start(local_datetime(5)))
+        self.assertEqual(
+            costs.get_off_peak_start(local_datetime(12)), local_datetime(22)
+        )
+
+    @override_settings(
+        TASKS={"default": {"BACKEND": "django_tasks.backends.dummy.DummyBackend"}}
+    )
+    def test_route_defers_task(self) -> None:
+        run_after = local_datetime(22)
+        task = queueing.route(tasks.generate_report, queueing.BULK, run_after)
+        self.assertEqual(task.run_after, run_after)
+
+    def test_route_without_defer_support(self) -> None:
+        task = queueing.route(tasks.generate_report, queueing.BULK, local_datetime(22))
+        self.assertIsNone(task.run_after)
+
+
+@freeze_time("2019-10-03T12:00:00")
+@override_settings(OSCAR_REPORTS_PROGRESS_ESTIMATE="count")
+class ReportFormCostTest(TestCase):
+    def setUp(self) -> None:
+        self.staff_user = User.objects.create_user(
+            username="root", email="root@example.com", is_staff=True
+        )
+        for _ in range(3):
+            create_order(user=self.staff_user)
+
+    def _get_form(self) -> forms.ReportForm:
+        form = forms.ReportForm(
+            {
+                "report_type": "order_report",
+                "date_from": timezone.now() - timedelta(days=1),
+                "date_to": timezone.now() + timedelta(days=1),
+            }
+        )
+        form.is_valid()
+        return form
+
+    def test_estimate(self) -> None:
+        form = self._get_form()
+        self.assertTrue(form.is_valid())
+        self.assertEqual(form.estimated_rows, 3)
+        self.assertIsNone(form.run_after)
+
+    @override_settings(OSCAR_REPORTS_HARD_ROW_LIMITS={"order_report": 3})
+    def test_hard_limit(self) -> None:
+        form = self._get_form()
+        self.assertFalse(form.is_valid())
+        self.assertIn("about 3 rows, over the limit of 3", form.non_field_errors()[0])
+
+    @override_settings(
+        OSCAR_REPORTS_SOFT_ROW_LIMITS={"order_report": 3},
+        OSCAR_REPORTS_OFF_PEAK_HOURS=(1, 6),
+    )
+    def test_soft_limit(self) -> None:
+        form = self._get_form()
+        self.assertTrue(form.is_valid())
+        self.assertEqual(form.run_after, local_datetime(1) + timedelta(days=1))
+
+    def test_generator_estimate(self) -> None:
+        generator = models.Report(type_code="order_report").get_generator("CSV")
+        generator.estimate_rows = lambda: 42  # type:ignore[attr-defined]
+        self.assertEqual(costs.estimate_rows(generator), 42)
+
+
+@override_settings(OSCAR_REPORTS_PROGRESS_ESTIMATE="count")
+class ReportCostViewTest(WebTestCase):
+    is_staff = True
+    permissions = _permissions
+
+    def setUp(self) -> None:
+        super().setUp()
+        create_order(user=self.user)
+
+    def test_estimate(self) -> None:
+        url = reverse("dashboard:reports-estimate")
+        data = self.get(url, params={"report_type": "order_report"}).json
+        self.assertEqual(data, {"rows": 1, "run_after": None, "errors": []})
+
+    @override_settings(OSCAR_REPORTS_HARD_ROW_LIMITS={"order_report": 1})
+    def test_estimate_over_hard_limit(self) -> None:
+        url = reverse("dashboard:reports-estimate")
+        response = self.get(url, params={"report_type": "order_report"}, status=400)
+        self.assertEqual(response.json["rows"], 1)
+        self.assertEqual(len(response.json["errors"]), 1)
+
+    @override_settings(OSCAR_REPORTS_HARD_ROW_LIMITS={"order_report": 1})
+    def test_preview_over_hard_limit(self) -> None:
+        form = self.get(reverse("dashboard:reports-index")).forms[
+            "generate_report_form"
+        ]
+        form["report_type"] = "order_report"
+        response = form.submit("preview")
+        self.assertContains(response, 'id="report_preview"')
+        self.assertNotContains(response, "over the limit")
+        # Generating it is still refused
+        response = form.submit()
+        self.assertContains(response, "over the limit")
+        self.assertFalse(models.Report.objects.exists())
+
+    @freeze_time("2019-10-03T12:00:00")
+    @override_settings(
+        OSCAR_REPORTS_SOFT_ROW_LIMITS={"order_report": 1},
+        OSCAR_REPORTS_OFF_PEAK_HOURS=(1, 6),
+        TASKS={"default": {"BACKEND": "django_tasks.backends.dummy.DummyBackend"}},
+    )
+    def test_large_report_is_scheduled(self) -> None:
+        form = self.get(reverse("dashboard:reports-index")).forms[
+            "generate_report_form"
+        ]
+        form["report_type"] = "order_report"
+        response = form.submit().follow()
+        self.assertContains(response, "it has been scheduled to run after")
+        report = models.Report.objects.get()
+        self.assertEqual(
+            report.run_after,
+            timezone.make_aware(datetime(2019, 10, 4, 1)),
+        )
+
+    @freeze_time("2019-10-03T12:00:00")
+    @override_settings(
+        OSCAR_REPORTS_SOFT_ROW_LIMITS={"order_report": 1},
+        OSCAR_REPORTS_OFF_PEAK_HOURS=(1, 6),
+    )
+    def test_large_report_without_defer_support(self) -> None:
+        # The immediate backend can't defer tasks, so the report runs now
+        form = self.get(reverse("dashboard:reports-index")).forms[
+            "generate_report_form"
+        ]
+        form["report_type"] = "order_report"
+        response = form.submit().follow()
+        self.assertNotContains(response, "it has been scheduled to run after")
+        self.assertContains(response, "Successfully queued report for generation")
+        self.assertIsNone(models.Report.objects.get().run_after)
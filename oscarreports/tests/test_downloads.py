@@ -0,0 +1,131 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.exceptions import ImproperlyConfigured
+from django.http import HttpResponseRedirect, StreamingHttpResponse
+from django.http.response import HttpResponseBase
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils import timezone
+from django.utils.http import http_date
+from oscar.test.factories import create_order
+
+from .. import downloads, models
+
+try:
+    try:
+        from psycopg.types.range import Range as DateTimeTZRange
+    except ImportError:
+        from psycopg2.extras import DateTimeTZRange
+except ImportError:
+    raise ImproperlyConfigured("Error loading psycopg2 or psycopg module")
+
+
+class ParseRangeTest(TestCase):
+    def test_parse_range(self) -> None:
+        self.assertEqual(downloads.parse_range("bytes=0-9", 100), (0, 9))
+        self.assertEqual(downloads.parse_range("bytes=90-", 100), (90, 99))
+        self.assertEqual(downloads.parse_range("bytes=90-200", 100), (90, 99))
+        self.assertEqual(downloads.parse_range("bytes=-10", 100), (90, 99))
+        self.assertEqual(downloads.parse_range("bytes=-200", 100), (0, 99))
+        self.assertIsNone(downloads.parse_range("bytes=100-", 100))
+        self.assertIsNone(downloads.parse_range("bytes=9-0", 100))
+        self.assertIsNone(downloads.parse_range("bytes=-", 100))
+        self.assertIsNone(downloads.parse_range("bytes=0-1,5-6", 100))
+        self.assertIsNone(downloads.parse_range("items=0-9", 100))
+
+
+class DownloadStrategyTest(TestCase):
+    def setUp(self) -> None:
+        self.staff_user = User.objects.create_user(
+            username="root", email="root@example.com", is_staff=True
+        )
+        create_order(user=self.staff_user)
+        self.report = models.Report()
+        self.report.owner = self.staff_user
+        self.report.type_code = "order_report"
+        self.report.date_range = DateTimeTZRange(
+            lower=(timezone.now() - timedelta(days=1)), upper=(timezone.now())
+        )
+        self.report.save()
+        self.report.generate()
+        with self.report.report_file.open("rb") as f:
+            self.content = f.read()
+        self.factory = RequestFactory()
+
+    def _serve(
+        self,
+        strategy: downloads.DownloadStrategy | None = None,
+        **headers: str,
+    ) -> HttpResponseBase:
+        request = self.factory.get("/", headers=headers)
+        strategy = strategy or downloads.get_download_strategy()
+        return strategy.serve(request, self.report, "report.csv")
+
+    def _get_content(self, response: HttpResponseBase) -> bytes:
+        assert isinstance(response, StreamingHttpResponse)
+        return b"".join(response.streaming_content)  # type:ignore[arg-type]
+
+    def test_full_download(self) -> None:
+        response = self._serve()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self._get_content(response), self.content)
+        self.assertEqual(response["Content-Length"], str(len(self.content)))
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+        self.assertEqual(response["ETag"], f'"{self.report.sha256}"')
+        self.assertEqual(response["Content-Type"], "text/csv")
+        self.assertEqual(
+            response["Content-Disposition"], 'attachment; filename="report.csv"'
+        )
+
+    def test_range_download(self) -> None:
+        response = self._serve(Range="bytes=5-14")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(self._get_content(response), self.content[5:15])
+        self.assertEqual(response["Content-Range"], f"bytes 5-14/{len(self.content)}")
+        self.assertEqual(response["Content-Length"], "10")
+
+    def test_range_not_satisfiable(self) -> None:
+        response = self._serve(Range=f"bytes={len(self.content)}-")
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response["Content-Range"], f"bytes */{len(self.content)}")
+
+    def test_if_range(self) -> None:
+        etag = f'"{self.report.sha256}"'
+        response = self._serve(Range="bytes=5-14", If_Range=etag)
+        self.assertEqual(response.status_code, 206)
+        response = self._serve(Range="bytes=5-14", If_Range='"stale"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self._get_content(response), self.content)
+        assert self.report.completed_on is not None
+        last_modified = http_date(self.report.completed_on.timestamp())
+        response = self._serve(Range="bytes=5-14", If_Range=last_modified)
+        self.assertEqual(response.status_code, 206)
+
+    def test_not_modified(self) -> None:
+        response = self._serve(If_None_Match=f'"{self.report.sha256}"')
+        self.assertEqual(response.status_code, 304)
+        response = self._serve(If_Modified_Since=self._serve()["Last-Modified"])
+        self.assertEqual(response.status_code, 304)
+
+    @override_settings(
+        OSCAR_REPORTS_DOWNLOAD_STRATEGY="oscarreports.downloads.XAccelRedirectDownload",
+        OSCAR_REPORTS_X_ACCEL_REDIRECT_PREFIX="/internal-media/",
+    )
+    def test_x_accel_redirect(self) -> None:
+        response = self._serve()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response["X-Accel-Redirect"],
+            f"/internal-media/{self.report.report_file.name}",
+        )
+        self.assertEqual(response["Content-Type"], "text/csv")
+        self.assertEqual(response["ETag"], f'"{self.report.sha256}"')
+
+    def test_x_sendfile(self) -> None:
+        response = self._serve(downloads.XSendfileDownload())
+        self.assertEqual(response["X-Sendfile"], self.report.report_file.path)
+
+    def test_signed_url(self) -> None:
+        response = self._serve(downloads.SignedURLDownload())
+        assert isinstance(response, HttpResponseRedirect)
+        self.assertEqual(response.url, self.report.report_file.url)
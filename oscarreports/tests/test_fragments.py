@@ -0,0 +1,110 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.storage import default_storage
+from django.http import HttpResponse
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from freezegun import freeze_time
+from oscar.test.factories import create_order
+
+from .. import models, streaming
+
+try:
+    try:
+        from psycopg.types.range import Range as DateTimeTZRange
+    except ImportError:
+        from psycopg2.extras import DateTimeTZRange
+except ImportError:
+    raise ImproperlyConfigured("Error loading psycopg2 or psycopg module")
+
+
+@freeze_time("2019-10-03T12:00:00-04:00")
+@override_settings(
+    OSCAR_REPORTS_FRAGMENT_CACHE=["order_report"],
+    STORAGES={
+        "default": {"BACKEND": "django.core.files.storage.InMemoryStorage"},
+        "staticfiles": {
+            "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"
+        },
+    },
+)
+class FragmentCacheTest(TestCase):
+    def setUp(self) -> None:
+        self.staff_user = User.objects.create_user(
+            username="root", email="root@example.com", is_staff=True
+        )
+        for days in range(4):
+            self._create_order(days)
+
+    def _create_order(self, days_ago: int, minutes_ago: int = 0) -> None:
+        order = create_order(user=self.staff_user)
+        order.date_placed = timezone.now() - timedelta(
+            days=days_ago, minutes=minutes_ago
+        )
+        order.save()
+
+    def _create_report(self) -> models.Report:
+        report = models.Report()
+        report.content_type = None
+        report.owner = self.staff_user
+        report.type_code = "order_report"
+        report.date_range = DateTimeTZRange(
+            lower=(timezone.now() - timedelta(days=3)), upper=(timezone.now())
+        )
+        report.save()
+        return report
+
+    def _generate(self) -> tuple[bytes, bytes, int]:
+        report = self._create_report()
+        response = report.get_generator("CSV").generate()
+        assert isinstance(response, HttpResponse)
+        with mock.patch(
+            "oscarreports.fragments.streaming.write_report",
+            wraps=streaming.write_report,
+        ) as write_report:
+            report.generate()
+        with report.report_file.open("rb") as f:
+            return f.read(), response.content, write_report.call_count
+
+    def test_generate_reuses_fragments(self) -> None:
+        content, expected, num_days_generated = self._generate()
+        self.assertEqual(content, expected)
+        self.assertEqual(num_days_generated, 4)
+        fragment_dirs, _ = default_storage.listdir(
+            "oscar-reports/fragments/order_report/1/csv"
+        )
+        # Today's rows are still changing, so aren't cached
+        self.assertEqual(
+            sorted(fragment_dirs), ["2019-09-30", "2019-10-01", "2019-10-02"]
+        )
+
+        content, expected, num_days_generated = self._generate()
+        self.assertEqual(content, expected)
+        self.assertEqual(num_days_generated, 1)
+        report = models.Report.objects.latest("created_on")
+        self.assertEqual(report.row_count, 4)
+
+    def test_generate_recomputes_changed_days(self) -> None:
+        self._generate()
+        # Placed apart from the day's other order, so their rows are in the same
+        # order in both renderings
+        self._create_order(2, minutes_ago=1)
+
+        content, expected, num_days_generated = self._generate()
+        self.assertEqual(content, expected)
+        self.assertEqual(num_days_generated, 2)
+        _, filenames = default_storage.listdir(
+            "oscar-reports/fragments/order_report/1/csv/2019-10-01"
+        )
+        self.assertEqual(len(filenames), 1)
+
+    def test_generate_invalidated_by_version(self) -> None:
+        self._generate()
+        generator_class = models.Report(type_code="order_report").generator_class
+        with mock.patch.object(generator_class, "report_version", "2", create=True):
+            content, expected, num_days_generated = self._generate()
+        self.assertEqual(content, expected)
+        self.assertEqual(num_days_generated, 4)
@@ -0,0 +1,72 @@
+from datetime import timedelta
+from typing import Any
+import io
+
+from django.contrib.auth.models import User
+from django.core.exceptions import ImproperlyConfigured
+from django.test import TestCase
+from django.utils import timezone
+from oscar.test.factories import create_order
+
+from .. import models, signals, streaming
+from ..metrics import ReportMetrics
+
+try:
+    try:
+        from psycopg.types.range import Range as DateTimeTZRange
+    except ImportError:
+        from psycopg2.extras import DateTimeTZRange
+except ImportError:
+    raise ImproperlyConfigured("Error loading psycopg2 or psycopg module")
+
+
+class ReportMetricsTest(TestCase):
+    def test_generation_phases(self) -> None:
+        report_metrics = ReportMetrics()
+        output = streaming.ReportOutput(io.BytesIO())
+        with report_metrics.generation(output):
+            for _ in output.count_rows(User.objects.all()):
+                output.write(b"row\n")
+        phases = report_metrics.as_dict()["phases"]
+        self.assertEqual(sorted(phases), ["format", "query", "write"])
+        self.assertGreater(phases["query"], 0)
+        self.assertGreaterEqual(phases["format"], 0)
+        self.assertEqual(report_metrics.queries, 1)
+
+    def test_generate_records_metrics(self) -> None:
+        staff_user = User.objects.create_user(
+            username="root", email="root@example.com", is_staff=True
+        )
+        create_order(user=staff_user)
+        create_order(user=staff_user)
+        report = models.Report()
+        report.owner = staff_user
+        report.type_code = "order_report"
+        report.date_range = DateTimeTZRange(
+            lower=(timezone.now() - timedelta(days=1)), upper=(timezone.now())
+        )
+        report.save()
+
+        received: list[dict[str, Any]] = []
+
+        def receiver(sender: type[models.Report], **kwargs: Any) -> None:
+            received.append(kwargs)
+
+        signals.report_generated.connect(receiver)
+        try:
+            report.generate()
+        finally:
+            signals.report_generated.disconnect(receiver)
+
+        report.refresh_from_db()
+        self.assertEqual(
+            sorted(report.metrics["phases"]),
+            ["format", "notify", "query", "upload", "write"],
+        )
+        self.assertGreater(report.metrics["queries"], 0)
+        self.assertEqual(report.metrics["rows"], 2)
+        self.assertEqual(report.metrics["bytes_written"], report.file_size)
+        self.assertGreater(report.metrics["peak_rss"], 0)
+        self.assertEqual(len(received), 1)
+        self.assertEqual(received[0]["report"], report)
+        self.assertEqual(received[0]["metrics"], report.metrics)
@@ -1,12 +1,16 @@
 from datetime import timedelta
 from unittest import mock
+import hashlib
 
 from django.contrib.auth.models import User
 from django.core import mail
 from django.core.exceptions import ImproperlyConfigured
-from django.test import TestCase
+from django.core.files.base import ContentFile
+from django.http import HttpResponse
+from django.test import TestCase, override_settings
 from django.utils import timezone
 from freezegun import freeze_time
+from oscar.test.factories import create_order
 
 from .. import models
 
@@ -36,6 +40,11 @@ class ReportTest(TestCase):
         )
         self.report.save()
 
+    def _get_buffered_content(self) -> bytes:
+        response = self.report.get_generator("CSV").generate()
+        assert isinstance(response, HttpResponse)
+        return response.content
+
     def test_str(self) -> None:
         self.assertEqual(str(self.report), "d3c74a8b-e7ae-4482-bd9c-bee69fde5c5c")
 
@@ -66,6 +75,17 @@ class ReportTest(TestCase):
         self.assertEqual(self.report.status_name, "Completed")
         self.assertTrue(self.report.is_complete)
 
+    def test_status_is_stored(self) -> None:
+        self.report.queued_on = timezone.now()
+        self.report.save(update_fields=["queued_on"])
+        self.assertEqual(
+            models.Report.objects.filter(status="queued").get(), self.report
+        )
+        self.report.generate()
+        self.assertEqual(
+            models.Report.objects.filter(status="completed").get(), self.report
+        )
+
     def test_generator_class(self) -> None:
         self.assertEqual(self.report.generator_class.description, "Orders placed")
 
@@ -78,9 +98,10 @@ class ReportTest(TestCase):
     def test_queue(self, mock_generate_report: mock.MagicMock) -> None:
         task = mock.MagicMock()
         task.id = "f3a0b0a0-148a-4ba1-9ed4-dd5543e77d73"
-        mock_generate_report.enqueue.return_value = task
+        routed_task = mock_generate_report.using.return_value
+        routed_task.enqueue.return_value = task
 
-        self.assertEqual(mock_generate_report.enqueue.call_count, 0)
+        self.assertEqual(routed_task.enqueue.call_count, 0)
 
         self.assertEqual(self.report.description, "")
         self.assertIsNone(self.report.queued_on)
@@ -91,11 +112,13 @@ class ReportTest(TestCase):
         with self.captureOnCommitCallbacks(execute=True):
             self.report.queue()
 
-        self.assertEqual(mock_generate_report.enqueue.call_count, 1)
-        mock_generate_report.enqueue.assert_called_once_with(
+        self.assertEqual(routed_task.enqueue.call_count, 1)
+        routed_task.enqueue.assert_called_once_with(
             "d3c74a8b-e7ae-4482-bd9c-bee69fde5c5c",
             "CSV",
         )
+        mock_generate_report.using.assert_called_once_with(priority=10)
+        self.assertEqual(self.report.lane, "fast")
 
         self.assertTrue(self.report.description.startswith("Orders placed between"))
         self.assertIsNotNone(self.report.queued_on)
@@ -121,6 +144,96 @@ class ReportTest(TestCase):
         self.assertTrue(self.report.report_file.name.endswith(".csv"))
         self.assertIsNotNone(self.report.completed_on)
 
+    def test_generate_streams_generator_output(self) -> None:
+        create_order(user=self.staff_user)
+        expected = self._get_buffered_content()
+
+        self.report.generate()
+
+        with self.report.report_file.open("rb") as f:
+            self.assertEqual(f.read(), expected)
+        self.assertIn(b"root@example.com", expected)
+
+    def test_generate_records_output_metadata(self) -> None:
+        # Distinct times, so the rows are in the same order in both renderings
+        for minutes in range(2):
+            order = create_order(user=self.staff_user)
+            order.date_placed = timezone.now() - timedelta(minutes=minutes)
+            order.save()
+        expected = self._get_buffered_content()
+
+        self.report.generate()
+
+        self.report.refresh_from_db()
+        self.assertEqual(self.report.file_size, len(expected))
+        self.assertEqual(self.report.row_count, 2)
+        self.assertEqual(self.report.sha256, hashlib.sha256(expected).hexdigest())
+
+    @mock.patch("oscarreports.streaming.get_spool_size")
+    def test_generate_spools_to_disk(self, get_spool_size: mock.MagicMock) -> None:
+        get_spool_size.return_value = 1
+        create_order(user=self.staff_user)
+        expected = self._get_buffered_content()
+
+        self.report.generate()
+
+        with self.report.report_file.open("rb") as f:
+            self.assertEqual(f.read(), expected)
+
+    @override_settings(OSCAR_REPORTS_SHARDS={"order_report": 3})
+    def test_queue_sharded_integration(self) -> None:
+        self.report.date_range = DateTimeTZRange(
+            lower=(timezone.now() - timedelta(days=5)), upper=(timezone.now())
+        )
+        self.report.save()
+        for days in range(6):
+            order = create_order(user=self.staff_user)
+            order.date_placed = timezone.now() - timedelta(days=days)
+            order.save()
+        expected = self._get_buffered_content()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.report.queue()
+
+        self.report.refresh_from_db()
+        self.assertEqual(self.report.shard_count, 3)
+        self.assertEqual(self.report.shards_completed, 3)
+        self.assertEqual(len(self.report.shard_task_ids), 3)
+        self.assertEqual(self.report.status, "completed")
+        self.assertIsNotNone(self.report.started_on)
+        self.assertIsNotNone(self.report.completed_on)
+        self.assertIsNotNone(self.report.task_id)
+        self.assertEqual(self.report.mime_type, "text/csv")
+        with self.report.report_file.open("rb") as f:
+            self.assertEqual(f.read(), expected)
+        self.assertEqual(self.report.file_size, len(expected))
+        self.assertEqual(self.report.row_count, 6)
+        self.assertEqual(self.report.sha256, hashlib.sha256(expected).hexdigest())
+        self.assertEqual(len(mail.outbox), 1)
+        storage = self.report.report_file.storage
+        for shard_index in range(3):
+            self.assertFalse(
+                storage.exists(self.report.get_shard_filename("CSV", shard_index))
+            )
+
+    @override_settings(OSCAR_REPORTS_SHARDS={"order_report": 3})
+    @mock.patch("oscarreports.tasks.generate_report")
+    def test_queue_sharded_without_date_range(
+        self, mock_generate_report: mock.MagicMock
+    ) -> None:
+        routed_task = mock_generate_report.using.return_value
+        routed_task.enqueue.return_value.id = "some-task-id"
+        self.report.date_range = None
+        self.report.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.report.queue()
+        self.assertEqual(self.report.shard_count, 1)
+        self.assertEqual(routed_task.enqueue.call_count, 1)
+
+    def test_generate_unsupported_response(self) -> None:
+        with self.assertRaises(TypeError):
+            self.report.generate("HTML")
+
     def test_queue_integration(self) -> None:
         self.assertEqual(self.report.description, "")
         self.assertIsNone(self.report.queued_on)
@@ -141,6 +254,7 @@ class ReportTest(TestCase):
         self.assertIsNotNone(self.report.started_on)
         self.assertIsNotNone(self.report.completed_on)
         self.assertIsNotNone(self.report.task_id)
+        self.assertEqual(self.report.status, "completed")
         self.assertEqual(self.report.mime_type, "text/csv")
         self.assertTrue(
             self.report.report_file.name.startswith(
@@ -155,6 +269,45 @@ class ReportTest(TestCase):
             "Your report is ready to download | Orders placed between Oct. 2, 2019 and Oct. 3, 2019",
         )
 
+    def test_completed_alert_notifies_requesters(self) -> None:
+        self.report.requesters.add(
+            User.objects.create_user(username="ann", email="ann@example.com"),
+            User.objects.create_user(username="bob", email="root@example.com"),
+            User.objects.create_user(username="cat", email=""),
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.report.queue()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ["root@example.com", "ann@example.com"])
+
+    def test_get_duplicate(self) -> None:
+        date_range = self.report.date_range
+        get_duplicate = models.Report.objects.get_duplicate
+        # Not queued yet, but recently created
+        self.assertEqual(get_duplicate("order_report", date_range, "CSV"), self.report)
+        self.assertIsNone(get_duplicate("order_report", date_range, "XLSX"))
+        self.assertIsNone(get_duplicate("vouchers", date_range, "CSV"))
+        self.assertIsNone(get_duplicate("order_report", None, "CSV"))
+
+        # Completed recently
+        self.report.completed_on = timezone.now()
+        self.report.save()
+        self.assertEqual(get_duplicate("order_report", date_range, "CSV"), self.report)
+
+        # Completed too long ago
+        with freeze_time(timezone.now() + timedelta(minutes=6)):
+            self.assertIsNone(get_duplicate("order_report", date_range, "CSV"))
+
+    def test_get_duplicate_stuck(self) -> None:
+        date_range = self.report.date_range
+        get_duplicate = models.Report.objects.get_duplicate
+        with freeze_time(timezone.now() + timedelta(minutes=59)):
+            self.assertEqual(
+                get_duplicate("order_report", date_range, "CSV"), self.report
+            )
+        with freeze_time(timezone.now() + timedelta(minutes=61)):
+            self.assertIsNone(get_duplicate("order_report", date_range, "CSV"))
+
     def test_delete(self) -> None:
         self.report.generate()
         self.report.report_file.delete = mock.MagicMock()
@@ -165,3 +318,21 @@ class ReportTest(TestCase):
 
         self.assertEqual(self.report.report_file.delete.call_count, 1)
         self.report.report_file.delete.assert_called_once_with(save=False)
+
+    def test_delete_removes_partial_files(self) -> None:
+        storage = self.report.report_file.storage
+        self.report.shard_count = 2
+        self.report.checkpoint = {"report_format": "CSV", "date_ranges": [[], []]}
+        self.report.save()
+        names = [
+            self.report.get_shard_filename("CSV", 0),
+            self.report.get_shard_filename("CSV", 1),
+            self.report.get_checkpoint_filename("CSV", 0),
+        ]
+        for name in names:
+            storage.save(name, ContentFile(b"partial"))
+
+        self.report.delete()
+
+        for name in names:
+            self.assertFalse(storage.exists(name))
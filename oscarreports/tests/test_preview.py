@@ -0,0 +1,80 @@
+from datetime import timedelta
+from typing import Any
+
+from django.contrib.auth.models import User
+from django.db import OperationalError, connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from oscar.apps.order.reports import OrderReportGenerator
+from oscar.test.factories import create_order
+
+from .. import preview
+
+
+class SlowOrderReportGenerator(OrderReportGenerator):
+    def generate(self) -> Any:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_sleep(1)")
+        return super().generate()
+
+
+def get_statement_timeout() -> str:
+    with connection.cursor() as cursor:
+        cursor.execute("SHOW statement_timeout")
+        return cursor.fetchone()[0]
+
+
+class PreviewTest(TestCase):
+    def setUp(self) -> None:
+        user = User.objects.create_user(username="root", is_staff=True)
+        self.orders = [create_order(user=user) for _ in range(3)]
+
+    def get_generator(
+        self, generator_class: type[OrderReportGenerator] = OrderReportGenerator
+    ) -> OrderReportGenerator:
+        return generator_class(
+            start_date=timezone.now() - timedelta(days=1),
+            end_date=timezone.now(),
+            formatter="CSV",
+        )
+
+    def test_preview(self) -> None:
+        with CaptureQueriesContext(connection) as queries:
+            result = preview.preview_report(self.get_generator(), limit=2)
+        self.assertEqual(result.header[0], "Order number")
+        self.assertEqual(len(result.rows), 2)
+        self.assertTrue(result.truncated)
+        # Only the rows needed are read
+        order_queries = [q["sql"] for q in queries if 'FROM "order_order"' in q["sql"]]
+        self.assertEqual(len(order_queries), 1)
+        self.assertIn("LIMIT 3", order_queries[0])
+
+    def test_preview_all_rows(self) -> None:
+        result = preview.preview_report(self.get_generator())
+        self.assertEqual(len(result.rows), 3)
+        self.assertFalse(result.truncated)
+        self.assertEqual(
+            sorted(row[0] for row in result.rows),
+            sorted(str(order.number) for order in self.orders),
+        )
+
+    @override_settings(OSCAR_REPORTS_PREVIEW_TIMEOUT=10)
+    def test_timeout(self) -> None:
+        before = get_statement_timeout()
+        with self.assertRaises(preview.PreviewTimeout):
+            preview.preview_report(self.get_generator(SlowOrderReportGenerator))
+        # The timeout only applied to the preview
+        self.assertEqual(get_statement_timeout(), before)
+
+    def test_statement_timeout(self) -> None:
+        before = get_statement_timeout()
+        with preview.statement_timeout("default", 1500):
+            self.assertEqual(get_statement_timeout(), "1500ms")
+        self.assertEqual(get_statement_timeout(), before)
+        with self.assertRaises(OperationalError) as cm:
+            with preview.statement_timeout("default", 10):
+                with connection.cursor() as cursor:
+                    cursor.execute("SELECT pg_sleep(1)")
+        self.assertTrue(preview.is_query_canceled(cm.exception))
+        self.assertEqual(get_statement_timeout(), before)
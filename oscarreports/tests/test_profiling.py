@@ -0,0 +1,131 @@
+from datetime import timedelta
+import io
+import marshal
+import zipfile
+
+from django.contrib.auth.models import User
+from django.core.exceptions import ImproperlyConfigured
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from oscar.test.factories import create_order
+
+from .. import models, profiling
+
+try:
+    try:
+        from psycopg.types.range import Range as DateTimeTZRange
+    except ImportError:
+        from psycopg2.extras import DateTimeTZRange
+except ImportError:
+    raise ImproperlyConfigured("Error loading psycopg2 or psycopg module")
+
+
+class ReportProfilingTest(TestCase):
+    def setUp(self) -> None:
+        self.staff_user = User.objects.create_user(
+            username="root",
+            email="root@example.com",
+            is_staff=True,
+            is_superuser=True,
+        )
+        create_order(user=self.staff_user)
+        self.report = models.Report()
+        self.report.owner = self.staff_user
+        self.report.type_code = "order_report"
+        self.report.date_range = DateTimeTZRange(
+            lower=(timezone.now() - timedelta(days=1)), upper=(timezone.now())
+        )
+        self.report.save()
+
+    def _read_profile(self) -> zipfile.ZipFile:
+        self.report.refresh_from_db()
+        with self.report.profile_file.open("rb") as f:
+            return zipfile.ZipFile(io.BytesIO(f.read()))
+
+    def test_not_profiled_by_default(self) -> None:
+        with self.captureOnCommitCallbacks(execute=True):
+            self.report.queue()
+        self.report.refresh_from_db()
+        self.assertTrue(self.report.is_complete)
+        self.assertFalse(self.report.profile_file)
+
+    def test_profile_mode_on_report(self) -> None:
+        self.report.profile_mode = profiling.ALL
+        self.report.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.report.queue()
+        archive = self._read_profile()
+        self.assertTrue(
+            str(self.report.profile_file.name).endswith(
+                f"{self.report.uuid}.profile.zip"
+            )
+        )
+        self.assertEqual(
+            sorted(archive.namelist()),
+            [
+                "profile.prof",
+                "profile.txt",
+                "tracemalloc.snapshot",
+                "tracemalloc.txt",
+            ],
+        )
+        stats = marshal.loads(archive.read("profile.prof"))
+        self.assertTrue(any(func[2] == "generate" for func in stats))
+        self.assertIn(b"cumulative", archive.read("profile.txt"))
+
+    @override_settings(
+        OSCAR_REPORTS_PROFILE={"order_report": "tracemalloc"},
+        OSCAR_REPORTS_SHARDS={"order_report": 3},
+    )
+    def test_profile_mode_setting(self) -> None:
+        with self.captureOnCommitCallbacks(execute=True):
+            self.report.queue()
+        archive = self._read_profile()
+        # Profiled reports aren't split into shards
+        self.assertEqual(self.report.shard_count, 1)
+        self.assertEqual(
+            sorted(archive.namelist()),
+            ["tracemalloc.snapshot", "tracemalloc.txt"],
+        )
+
+    def test_profile_kept_on_failure(self) -> None:
+        self.report.profile_mode = profiling.CPROFILE
+        self.report.save()
+        with self.assertRaises(ValueError):
+            with profiling.profile_report(self.report):
+                raise ValueError("Generation failed")
+        self.assertEqual(self._read_profile().namelist()[0], "profile.prof")
+
+    def test_admin_download(self) -> None:
+        self.client.force_login(self.staff_user)
+        url = reverse("admin:reports_dashboard_report_profile", args=[self.report.pk])
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+        self.report.profile_mode = profiling.CPROFILE
+        self.report.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.report.queue()
+        response = self.client.get(
+            reverse("admin:reports_dashboard_report_change", args=[self.report.pk])
+        )
+        self.assertContains(response, url)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/zip")
+        content = b"".join(response.streaming_content)  # type:ignore[attr-defined]
+        with zipfile.ZipFile(io.BytesIO(content)) as zf:
+            self.assertIn("profile.prof", zf.namelist())
+
+    def test_delete_removes_profile(self) -> None:
+        self.report.profile_mode = profiling.CPROFILE
+        self.report.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.report.queue()
+        self.report.refresh_from_db()
+        storage = self.report.profile_file.storage
+        name = self.report.profile_file.name
+        assert name is not None
+        self.assertTrue(storage.exists(name))
+        self.report.delete()
+        self.assertFalse(storage.exists(name))
@@ -0,0 +1,193 @@
+from datetime import timedelta
+import io
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from oscar.test.factories import create_order
+from oscar.test.testcases import WebTestCase
+
+from .. import checks, models, progress, streaming
+
+try:
+    # For Oscar >=4.0
+    from oscar.apps.dashboard.permissions import DashboardPermission
+
+    _permissions = DashboardPermission.get("user_record")
+except ImportError:
+    _permissions = WebTestCase.permissions
+
+try:
+    try:
+        from psycopg.types.range import Range as DateTimeTZRange
+    except ImportError:
+        from psycopg2.extras import DateTimeTZRange
+except ImportError:
+    raise ImproperlyConfigured("Error loading psycopg2 or psycopg module")
+
+
+class ProgressTest(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.staff_user = User.objects.create_user(
+            username="root", email="root@example.com", is_staff=True
+        )
+        for _ in range(3):
+            create_order(user=self.staff_user)
+        self.report = models.Report()
+        self.report.owner = self.staff_user
+        self.report.type_code = "order_report"
+        self.report.date_range = DateTimeTZRange(
+            lower=(timezone.now() - timedelta(days=1)), upper=(timezone.now())
+        )
+        self.report.save()
+
+    def test_estimate_count(self) -> None:
+        estimate = progress.estimate_count(User.objects.all())
+        self.assertIsInstance(estimate, int)
+        with override_settings(OSCAR_REPORTS_PROGRESS_ESTIMATE="count"):
+            self.assertEqual(progress.estimate_count(User.objects.all()), 1)
+        with override_settings(OSCAR_REPORTS_PROGRESS_ESTIMATE=None):
+            self.assertIsNone(progress.estimate_count(User.objects.all()))
+
+    def test_percent_and_eta(self) -> None:
+        started = timezone.now()
+        report_progress = progress.Progress(
+            rows=25,
+            total=100,
+            started=started,
+            updated=started + timedelta(seconds=10),
+        )
+        self.assertEqual(report_progress.percent, 25.0)
+        self.assertEqual(report_progress.eta, started + timedelta(seconds=40))
+        # Planner estimates can be exceeded
+        report_progress.rows = 150
+        self.assertEqual(report_progress.percent, 100.0)
+        self.assertIsNone(report_progress.eta)
+        report_progress.total = None
+        self.assertIsNone(report_progress.percent)
+
+    def test_tracker_throttles_writes(self) -> None:
+        tracker = progress.ProgressTracker(self.report.uuid, interval=60)
+        tracker.update(1)
+        tracker.update(2)
+        saved = progress.get_progress([self.report.uuid])[str(self.report.uuid)]
+        self.assertEqual(saved.rows, 1)
+        tracker.save()
+        saved = progress.get_progress([self.report.uuid])[str(self.report.uuid)]
+        self.assertEqual(saved.rows, 2)
+        tracker.clear()
+        self.assertEqual(progress.get_progress([self.report.uuid]), {})
+
+    @override_settings(
+        OSCAR_REPORTS_PROGRESS_INTERVAL=0,
+        OSCAR_REPORTS_PROGRESS_ESTIMATE="count",
+    )
+    def test_write_report_tracks_rows(self) -> None:
+        output = streaming.ReportOutput(io.BytesIO())
+        output.progress = progress.ProgressTracker(self.report.uuid)
+        streaming.write_report(self.report.get_generator("CSV"), output)
+        saved = progress.get_progress([self.report.uuid])[str(self.report.uuid)]
+        self.assertEqual(saved.rows, 3)
+        self.assertEqual(saved.total, 3)
+        self.assertEqual(saved.percent, 100.0)
+
+    def test_report_progress(self) -> None:
+        self.assertIsNone(self.report.progress)
+        self.report.started_on = timezone.now()
+        self.report.save()
+        tracker = progress.ProgressTracker(self.report.uuid)
+        tracker.total = 10
+        tracker.update(4)
+        self.assertEqual(self.report.status, models.Report.STATUS_IN_PROGRESS)
+        report_progress = self.report.progress
+        assert report_progress is not None
+        self.assertEqual(report_progress.percent, 40.0)
+
+        models.Report.prefetch_progress([self.report])
+        self.assertEqual(self.report._progress_cache.rows, 4)  # type:ignore[union-attr]
+
+        # Generation clears its progress once complete
+        self.report.generate()
+        self.assertIsNone(self.report.progress)
+        self.assertEqual(progress.get_progress([self.report.uuid]), {})
+
+    def test_sharded_report_progress(self) -> None:
+        self.report.started_on = timezone.now()
+        self.report.shard_count = 4
+        self.report.shards_completed = 1
+        self.report.save()
+        report_progress = self.report.progress
+        assert report_progress is not None
+        self.assertEqual(report_progress.percent, 25.0)
+
+
+class ReportStatusViewTest(WebTestCase):
+    is_staff = True
+    permissions = _permissions
+
+    def setUp(self) -> None:
+        super().setUp()
+        cache.clear()
+        self.report = models.Report()
+        self.report.owner = self.user
+        self.report.type_code = "order_report"
+        self.report.date_range = DateTimeTZRange(
+            lower=(timezone.now() - timedelta(days=1)), upper=(timezone.now())
+        )
+        self.report.started_on = timezone.now()
+        self.report.save()
+        tracker = progress.ProgressTracker(self.report.uuid)
+        tracker.total = 200
+        tracker.update(50)
+
+    def test_status(self) -> None:
+        url = reverse("dashboard:reports-status", kwargs={"uuid": self.report.uuid})
+        data = self.get(url).json
+        self.assertEqual(data["uuid"], str(self.report.uuid))
+        self.assertEqual(data["status"], models.Report.STATUS_IN_PROGRESS)
+        self.assertEqual(data["progress"]["rows"], 50)
+        self.assertEqual(data["progress"]["total"], 200)
+        self.assertEqual(data["progress"]["percent"], 25.0)
+        self.assertIsNone(data["download_url"])
+
+        self.report.generate()
+        data = self.get(url).json
+        self.assertEqual(data["status"], models.Report.STATUS_COMPLETED)
+        self.assertIsNone(data["progress"])
+        self.assertEqual(
+            data["download_url"],
+            reverse("dashboard:reports-download", kwargs={"uuid": self.report.uuid}),
+        )
+
+    def test_index_shows_progress(self) -> None:
+        response = self.get(reverse("dashboard:reports-index"))
+        self.assertContains(response, 'aria-valuenow="25"')
+
+
+class ProgressCacheCheckTest(TestCase):
+    WORKER_TASKS = {"default": {"BACKEND": "django_tasks.backends.dummy.DummyBackend"}}
+
+    @override_settings(TASKS=WORKER_TASKS)
+    def test_per_process_cache(self) -> None:
+        messages = checks.check_progress_cache(None)
+        self.assertEqual([message.id for message in messages], ["oscarreports.W001"])
+
+    @override_settings(
+        TASKS=WORKER_TASKS,
+        CACHES={
+            "default": {
+                "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+                "LOCATION": "oscarreports_cache",
+            }
+        },
+    )
+    def test_shared_cache(self) -> None:
+        self.assertEqual(checks.check_progress_cache(None), [])
+
+    def test_immediate_tasks(self) -> None:
+        # The sandbox runs tasks in the web process, so shares its cache
+        self.assertEqual(checks.check_progress_cache(None), [])
@@ -0,0 +1,65 @@
+from typing import Any
+
+from django.contrib.auth.models import User
+from django.db.models.query import QuerySet
+from django.test import TestCase
+from oscar.apps.dashboard.reports.reports import ReportGenerator
+from oscar.apps.offer.reports import OfferReportGenerator
+from oscar.apps.order.reports import OrderReportGenerator
+from oscar.test.factories import create_order
+
+from .. import querysets
+
+
+def _get_queryset(generator: ReportGenerator) -> QuerySet[Any, Any]:
+    assert generator.queryset is not None
+    return generator.queryset
+
+
+class IterateQuerysetTest(TestCase):
+    def setUp(self) -> None:
+        for i in range(3):
+            user = User.objects.create_user(
+                username=f"user{i}", email=f"user{i}@example.com"
+            )
+            create_order(user=user)
+
+    def test_iterate_report_objects_selects_related(self) -> None:
+        generator = OrderReportGenerator(formatter="CSV")
+        with self.assertNumQueries(1):
+            orders = list(
+                querysets.iterate_report_objects(generator, _get_queryset(generator))
+            )
+            emails = sorted(order.user.email for order in orders)
+        self.assertEqual(
+            emails, ["user0@example.com", "user1@example.com", "user2@example.com"]
+        )
+
+    def test_iterate_queryset_prefetches_per_chunk(self) -> None:
+        generator = OrderReportGenerator(formatter="CSV")
+        # One cursor for the orders, plus one query per chunk for the lines
+        with self.assertNumQueries(3):
+            orders = list(
+                querysets.iterate_queryset(
+                    _get_queryset(generator),
+                    prefetch_related=["lines"],
+                    chunk_size=2,
+                )
+            )
+            num_lines = sum(len(order.lines.all()) for order in orders)
+        self.assertEqual(len(orders), 3)
+        self.assertEqual(num_lines, 3)
+
+    def test_iterate_values_queryset(self) -> None:
+        generator = OfferReportGenerator(formatter="CSV")
+        rows = list(
+            querysets.iterate_queryset(
+                _get_queryset(generator), select_related=["offer"]
+            )
+        )
+        self.assertEqual(rows, list(_get_queryset(generator)))
+
+    def test_iterate_non_queryset(self) -> None:
+        generator = OrderReportGenerator(formatter="CSV")
+        objects = [1, 2, 3]
+        self.assertIs(querysets.iterate_report_objects(generator, objects), objects)
@@ -0,0 +1,166 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.exceptions import ImproperlyConfigured
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from django_tasks import TaskResultStatus
+from oscar.test.factories import create_order
+from oscar.test.testcases import WebTestCase
+
+from .. import models, queueing, reaper, tasks
+
+try:
+    # For Oscar >=4.0
+    from oscar.apps.dashboard.permissions import DashboardPermission
+
+    _permissions = DashboardPermission.get("user_record")
+except ImportError:
+    _permissions = WebTestCase.permissions
+
+try:
+    try:
+        from psycopg.types.range import Range as DateTimeTZRange
+    except ImportError:
+        from psycopg2.extras import DateTimeTZRange
+except ImportError:
+    raise ImproperlyConfigured("Error loading psycopg2 or psycopg module")
+
+
+def create_report(owner: User | None, type_code: str = "order_report") -> models.Report:
+    report = models.Report()
+    report.owner = owner
+    report.type_code = type_code
+    report.date_range = DateTimeTZRange(
+        lower=(timezone.now() - timedelta(days=1)), upper=(timezone.now())
+    )
+    report.save()
+    return report
+
+
+class LaneTest(TestCase):
+    def setUp(self) -> None:
+        self.staff_user = User.objects.create_user(
+            username="root", email="root@example.com", is_staff=True
+        )
+        create_order(user=self.staff_user)
+        self.report = create_report(self.staff_user)
+
+    def test_small_report_is_fast(self) -> None:
+        generator = self.report.get_generator("CSV")
+        self.assertEqual(queueing.get_lane(generator), queueing.FAST)
+
+    @override_settings(OSCAR_REPORTS_BULK_LANE_ROWS=0)
+    def test_large_report_is_bulk(self) -> None:
+        generator = self.report.get_generator("CSV")
+        self.assertEqual(queueing.get_lane(generator), queueing.BULK)
+
+    @override_settings(OSCAR_REPORTS_TYPE_LANES={"order_report": "bulk"})
+    def test_lane_by_type(self) -> None:
+        with self.captureOnCommitCallbacks(execute=True):
+            self.report.queue()
+        self.report.refresh_from_db()
+        self.assertEqual(self.report.lane, queueing.BULK)
+        self.assertEqual(self.report.status, models.Report.STATUS_COMPLETED)
+
+    def test_route(self) -> None:
+        task = queueing.route(tasks.generate_report, queueing.BULK)
+        self.assertEqual(task.priority, -10)
+        self.assertEqual(task.queue_name, tasks.generate_report.queue_name)
+        # Unknown lanes leave the task as it is
+        self.assertIs(
+            queueing.route(tasks.generate_report, "other"), tasks.generate_report
+        )
+
+    @override_settings(OSCAR_REPORTS_LANES={"fast": {"priority": 50}})
+    def test_lane_settings(self) -> None:
+        task = queueing.route(tasks.generate_report, queueing.FAST)
+        self.assertEqual(task.priority, 50)
+
+
+class LimitTest(TestCase):
+    def setUp(self) -> None:
+        self.staff_user = User.objects.create_user(
+            username="root", email="root@example.com", is_staff=True
+        )
+        self.other_user = User.objects.create_user(
+            username="other", email="other@example.com", is_staff=True
+        )
+        self.running = create_report(self.staff_user)
+        with self.captureOnCommitCallbacks():
+            self.running.queue()
+
+    @override_settings(OSCAR_REPORTS_MAX_CONCURRENT_PER_OWNER=1)
+    def test_owner_limit(self) -> None:
+        report = create_report(self.staff_user, "conditional-offers")
+        with self.assertRaises(queueing.ReportLimitExceeded):
+            report.queue()
+        report.refresh_from_db()
+        self.assertEqual(report.status, models.Report.STATUS_CREATED)
+        # The dashboard discards refused reports
+        report.delete()
+        # Other owners aren't limited
+        with self.captureOnCommitCallbacks():
+            create_report(self.other_user).queue()
+        # Nor is queueing the running report again
+        with self.captureOnCommitCallbacks():
+            self.running.queue()
+
+    @override_settings(OSCAR_REPORTS_MAX_CONCURRENT_PER_TYPE={"order_report": 1})
+    def test_type_limit(self) -> None:
+        with self.assertRaises(queueing.ReportLimitExceeded):
+            create_report(self.other_user).queue()
+        with self.captureOnCommitCallbacks():
+            create_report(self.other_user, "conditional-offers").queue()
+
+    @override_settings(OSCAR_REPORTS_MAX_CONCURRENT_PER_OWNER=1)
+    def test_long_running_reports_are_counted(self) -> None:
+        # Deferred, or queued behind other reports, for longer than the in
+        # flight timeout
+        models.Report.objects.filter(pk=self.running.pk).update(
+            created_on=timezone.now() - timedelta(days=1),
+            queued_on=timezone.now() - timedelta(days=1),
+            status=models.Report.STATUS_QUEUED,
+        )
+        with self.assertRaises(queueing.ReportLimitExceeded):
+            create_report(self.staff_user, "conditional-offers").queue()
+
+    @override_settings(OSCAR_REPORTS_MAX_CONCURRENT_PER_OWNER=1)
+    def test_finished_reports_are_not_counted(self) -> None:
+        self.running.cancel()
+        with self.captureOnCommitCallbacks():
+            create_report(self.staff_user).queue()
+
+    @override_settings(OSCAR_REPORTS_MAX_CONCURRENT_PER_TYPE={"order_report": 1})
+    def test_reaper_waits_for_limit(self) -> None:
+        dead = create_report(self.other_user)
+        dead.started_on = timezone.now() - timedelta(hours=2)
+        dead.task_id = "dead-task"
+        dead.save()
+        died = mock.Mock(status=TaskResultStatus.FAILED)
+        with (
+            mock.patch.object(tasks, "can_get_results", return_value=True),
+            mock.patch.object(tasks, "get_results", return_value={"dead-task": died}),
+        ):
+            self.assertEqual(reaper.reap_stale_reports(), {"requeued": 0, "failed": 0})
+        dead.refresh_from_db()
+        self.assertEqual(dead.retries, 0)
+
+
+class LimitViewTest(WebTestCase):
+    is_staff = True
+    permissions = _permissions
+
+    @override_settings(OSCAR_REPORTS_MAX_CONCURRENT_PER_OWNER=1)
+    def test_limit_message(self) -> None:
+        with self.captureOnCommitCallbacks():
+            create_report(self.user).queue()
+        form = self.get(reverse("dashboard:reports-index")).forms[
+            "generate_report_form"
+        ]
+        form["report_type"] = "conditional-offers"
+        response = form.submit().follow()
+        self.assertContains(response, "You can&#x27;t generate more than 1 reports")
+        self.assertEqual(models.Report.objects.count(), 1)
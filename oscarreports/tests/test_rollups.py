@@ -0,0 +1,214 @@
+from datetime import date, timedelta
+from decimal import Decimal
+from io import StringIO
+from typing import Any
+
+from django.contrib.auth.models import User
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from oscar.apps.order.models import Order, OrderDiscount
+from oscar.test.factories import create_order
+
+from .. import models, rollups, tasks
+from ..utils import GeneratorRepository
+
+try:
+    try:
+        from psycopg.types.range import Range as DateTimeTZRange
+    except ImportError:
+        from psycopg2.extras import DateTimeTZRange
+except ImportError:
+    raise ImproperlyConfigured("Error loading psycopg2 or psycopg module")
+
+
+class RollupTest(TestCase):
+    def setUp(self) -> None:
+        self.user = User.objects.create_user(username="root", is_staff=True)
+        self.today = timezone.localdate()
+
+    def place_order(self, discount: Decimal | None = None) -> Order:
+        with self.captureOnCommitCallbacks(execute=True):
+            order = Order.objects.get(pk=create_order(user=self.user).pk)
+            if discount is not None:
+                # Applied before the order is committed, as at checkout
+                OrderDiscount.objects.create(
+                    order=order, offer_id=7, offer_name="Sale", amount=discount
+                )
+        return order
+
+    def test_order_placed(self) -> None:
+        first = self.place_order(discount=Decimal("1.00"))
+        second = self.place_order(discount=Decimal("2.50"))
+        rollup = models.OrderDailyRollup.objects.get()
+        self.assertEqual(rollup.day, self.today)
+        self.assertEqual(rollup.currency, first.currency)
+        self.assertEqual(rollup.num_orders, 2)
+        self.assertEqual(
+            rollup.total_incl_tax, first.total_incl_tax + second.total_incl_tax
+        )
+        offer_rollup = models.OfferDailyRollup.objects.get()
+        self.assertEqual(offer_rollup.offer_id, 7)
+        self.assertEqual(offer_rollup.offer_name, "Sale")
+        self.assertEqual(offer_rollup.num_orders, 2)
+        self.assertEqual(offer_rollup.total_discount, Decimal("3.50"))
+
+    @override_settings(OSCAR_REPORTS_ROLLUPS=False)
+    def test_disabled(self) -> None:
+        self.place_order()
+        self.assertFalse(models.OrderDailyRollup.objects.exists())
+
+    def test_refresh_matches_orders_placed(self) -> None:
+        self.place_order(discount=Decimal("1.00"))
+        self.place_order()
+        # Orders placed before the rollups were enabled
+        old = create_order(user=self.user)
+        Order.objects.filter(pk=old.pk).update(
+            date_placed=timezone.now() - timedelta(days=1)
+        )
+        incremental = list(
+            models.OrderDailyRollup.objects.values(
+                "day", "currency", "num_orders", "total_incl_tax", "total_excl_tax"
+            )
+        )
+        written = rollups.refresh(self.today - timedelta(days=1), self.today)
+        self.assertEqual(written, {"orders": 2, "offers": 1})
+        self.assertEqual(
+            list(
+                models.OrderDailyRollup.objects.filter(day=self.today).values(
+                    "day", "currency", "num_orders", "total_incl_tax", "total_excl_tax"
+                )
+            ),
+            incremental,
+        )
+        self.assertEqual(
+            models.OrderDailyRollup.objects.get(
+                day=self.today - timedelta(days=1)
+            ).num_orders,
+            1,
+        )
+        self.assertEqual(
+            models.OfferDailyRollup.objects.get().total_discount, Decimal("1.00")
+        )
+
+    def test_order_placed_queries(self) -> None:
+        for _ in range(3):
+            self.place_order(discount=Decimal("1.00"))
+        with self.captureOnCommitCallbacks() as callbacks:
+            order = Order.objects.get(pk=create_order(user=self.user).pk)
+            OrderDiscount.objects.create(
+                order=order, offer_id=7, offer_name="Sale", amount=Decimal("1.00")
+            )
+        # The day's totals are incremented, without reading its other orders
+        with self.assertNumQueries(7):
+            for callback in callbacks:
+                callback()
+        self.assertEqual(models.OrderDailyRollup.objects.get().num_orders, 4)
+        self.assertEqual(
+            models.OfferDailyRollup.objects.get().total_discount, Decimal("4.00")
+        )
+
+    def test_refresh_corrects_overlapping_order_placed(self) -> None:
+        # The order's committed, and counted by a rebuild of its day, before its
+        # own on commit callback runs
+        with self.captureOnCommitCallbacks() as callbacks:
+            create_order(user=self.user)
+        rollups.refresh_recent()
+        for callback in callbacks:
+            callback()
+        rollups.refresh_recent()
+        self.assertEqual(models.OrderDailyRollup.objects.get().num_orders, 1)
+
+    def test_refresh_removes_stale_days(self) -> None:
+        models.OrderDailyRollup.objects.create(
+            day=self.today, currency="GBP", num_orders=3
+        )
+        models.OrderDailyRollup.objects.create(
+            day=date(2019, 1, 1), currency="GBP", num_orders=3
+        )
+        self.assertEqual(rollups.refresh_recent(), {"orders": 0, "offers": 0})
+        self.assertEqual(
+            list(models.OrderDailyRollup.objects.values_list("day", flat=True)),
+            [date(2019, 1, 1)],
+        )
+
+    def test_command(self) -> None:
+        create_order(user=self.user)
+        stdout = StringIO()
+        call_command("refresh_report_rollups", "--days", "0", stdout=stdout)
+        self.assertIn("Rebuilt 1 order rollups and 0 offer rollups", stdout.getvalue())
+        since = (self.today - timedelta(days=7)).isoformat()
+        call_command("refresh_report_rollups", "--since", since, stdout=stdout)
+        self.assertEqual(models.OrderDailyRollup.objects.get().num_orders, 1)
+
+    def test_task(self) -> None:
+        create_order(user=self.user)
+        kwargs: dict[str, Any] = {}
+        result = tasks.refresh_report_rollups.call(**kwargs)
+        self.assertEqual(result, {"orders": 1, "offers": 0})
+
+
+class SummaryReportTest(TestCase):
+    def setUp(self) -> None:
+        self.user = User.objects.create_user(username="root", is_staff=True)
+        self.today = timezone.localdate()
+        yesterday = self.today - timedelta(days=1)
+        for day in [yesterday, self.today]:
+            models.OrderDailyRollup.objects.create(
+                day=day,
+                currency="USD",
+                num_orders=2,
+                total_incl_tax=Decimal("24.00"),
+                total_excl_tax=Decimal("20.00"),
+            )
+            models.OfferDailyRollup.objects.create(
+                day=day,
+                offer_id=1,
+                offer_name="Sale",
+                num_orders=2,
+                total_discount=Decimal("3.00"),
+            )
+        models.OfferDailyRollup.objects.create(
+            day=self.today,
+            offer_id=2,
+            offer_name="Clearance",
+            num_orders=1,
+            total_discount=Decimal("10.00"),
+        )
+
+    def generate(self, type_code: str, days: int) -> str:
+        report = models.Report.objects.create(
+            owner=self.user,
+            type_code=type_code,
+            date_range=DateTimeTZRange(
+                lower=timezone.now() - timedelta(days=days),
+                upper=timezone.now(),
+            ),
+        )
+        report.generate()
+        report.refresh_from_db()
+        self.assertEqual(report.status, models.Report.STATUS_COMPLETED)
+        with report.report_file.open() as report_file:
+            return report_file.read().decode()
+
+    def test_registered(self) -> None:
+        repository = GeneratorRepository()
+        self.assertIsNotNone(repository.get_generator("order_summary"))
+        self.assertIsNotNone(repository.get_generator("offer_summary"))
+
+    def test_order_summary(self) -> None:
+        lines = self.generate("order_summary", 1).splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertIn("USD,2,20.00,24.00", lines[1])
+        lines = self.generate("order_summary", 0).splitlines()
+        self.assertEqual(len(lines), 2)
+
+    def test_offer_summary(self) -> None:
+        lines = self.generate("offer_summary", 1).splitlines()
+        self.assertEqual(
+            lines[1:],
+            ["Clearance,1,10.00", "Sale,4,6.00"],
+        )
+        lines = self.generate("offer_summary", 0).splitlines()
+        self.assertEqual(lines[1:], ["Clearance,1,10.00", "Sale,2,3.00"])
@@ -0,0 +1,73 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connections
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from oscar.apps.order.models import Order
+
+from .. import models, routing
+
+try:
+    try:
+        from psycopg.types.range import Range as DateTimeTZRange
+    except ImportError:
+        from psycopg2.extras import DateTimeTZRange
+except ImportError:
+    raise ImproperlyConfigured("Error loading psycopg2 or psycopg module")
+
+
+class ReportDatabaseRouterTest(TestCase):
+    databases = {"default", "replica"}
+
+    def setUp(self) -> None:
+        self.router = routing.ReportDatabaseRouter()
+
+    def test_reads_outside_generation(self) -> None:
+        with override_settings(OSCAR_REPORTS_DATABASE="replica"):
+            self.assertIsNone(self.router.db_for_read(Order))
+
+    def test_no_report_database(self) -> None:
+        with routing.report_database():
+            self.assertIsNone(self.router.db_for_read(Order))
+
+    @override_settings(OSCAR_REPORTS_DATABASE="replica")
+    def test_reads_during_generation(self) -> None:
+        with routing.report_database() as alias:
+            self.assertEqual(alias, "replica")
+            self.assertEqual(self.router.db_for_read(Order), "replica")
+            self.assertIsNone(self.router.db_for_read(models.Report))
+            self.assertEqual(Order.objects.all().db, "replica")
+        self.assertEqual(Order.objects.all().db, "default")
+
+    @override_settings(OSCAR_REPORTS_DATABASE="replica")
+    def test_writes_go_to_primary(self) -> None:
+        # As if read from the replica
+        user = User(username="root")
+        user._state.db = "replica"
+        self.assertIsNone(self.router.db_for_write(User))
+        self.assertEqual(self.router.db_for_write(User, instance=user), "default")
+        report = models.Report.objects.create(type_code="order_report")
+        self.assertTrue(self.router.allow_relation(user, report))
+
+    @override_settings(OSCAR_REPORTS_DATABASE="replica")
+    def test_generate_reads_from_replica(self) -> None:
+        report = models.Report()
+        report.owner = User.objects.create_user(username="root")
+        report.type_code = "order_report"
+        report.date_range = DateTimeTZRange(
+            lower=(timezone.now() - timedelta(days=1)), upper=(timezone.now())
+        )
+        report.save()
+        with CaptureQueriesContext(connections["replica"]) as replica_queries:
+            report.generate()
+        self.assertTrue(
+            any('FROM "order_order"' in query["sql"] for query in replica_queries)
+        )
+        self.assertFalse(
+            any("reports_dashboard_report" in query["sql"] for query in replica_queries)
+        )
+        report.refresh_from_db()
+        self.assertEqual(report.status, models.Report.STATUS_COMPLETED)
@@ -0,0 +1,210 @@
+from datetime import datetime, timedelta
+from io import StringIO
+from typing import Any
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from oscar.test.factories import create_order
+
+from .. import cron, models, scheduler, tasks
+
+
+def local_datetime(
+    year: int, month: int, day: int, hour: int = 0, minute: int = 0
+) -> datetime:
+    return timezone.make_aware(datetime(year, month, day, hour, minute))
+
+
+class CronScheduleTest(TestCase):
+    def test_matches(self) -> None:
+        schedule = cron.CronSchedule("*/15 5 * * 1-5")
+        # Thursday
+        self.assertTrue(schedule.matches(local_datetime(2019, 10, 3, 5, 30)))
+        self.assertFalse(schedule.matches(local_datetime(2019, 10, 3, 5, 31)))
+        self.assertFalse(schedule.matches(local_datetime(2019, 10, 3, 6, 0)))
+        # Saturday
+        self.assertFalse(schedule.matches(local_datetime(2019, 10, 5, 5, 0)))
+
+    def test_sunday(self) -> None:
+        for expression in ["0 0 * * 0", "0 0 * * 7"]:
+            schedule = cron.CronSchedule(expression)
+            self.assertTrue(schedule.matches(local_datetime(2019, 10, 6)))
+            self.assertFalse(schedule.matches(local_datetime(2019, 10, 7)))
+
+    def test_day_of_month_or_week(self) -> None:
+        # The 1st of the month, and every Monday
+        schedule = cron.CronSchedule("0 0 1 * 1")
+        self.assertTrue(schedule.matches(local_datetime(2019, 10, 1)))
+        self.assertTrue(schedule.matches(local_datetime(2019, 10, 7)))
+        self.assertFalse(schedule.matches(local_datetime(2019, 10, 8)))
+
+    def test_next_after(self) -> None:
+        schedule = cron.CronSchedule("0,30 5 * * 1-5")
+        self.assertEqual(
+            schedule.next_after(local_datetime(2019, 10, 3, 5, 0)),
+            local_datetime(2019, 10, 3, 5, 30),
+        )
+        # Friday's last run is followed by Monday's first
+        self.assertEqual(
+            schedule.next_after(local_datetime(2019, 10, 4, 5, 30)),
+            local_datetime(2019, 10, 7, 5, 0),
+        )
+        self.assertIsNone(cron.CronSchedule("0 0 31 2 *").next_after(timezone.now()))
+
+    def test_invalid(self) -> None:
+        for expression in [
+            "",
+            "* * * *",
+            "60 * * * *",
+            "* * 0 * *",
+            "*/0 * * * *",
+            "a * * * *",
+        ]:
+            with self.assertRaises(cron.InvalidCronExpression):
+                cron.CronSchedule(expression)
+        with self.assertRaises(ValidationError):
+            cron.validate_cron_expression("* * *")
+
+
+class ReportScheduleTest(TestCase):
+    def setUp(self) -> None:
+        self.staff_user = User.objects.create_user(
+            username="root", email="root@example.com", is_staff=True
+        )
+        self.schedule = models.ReportSchedule.objects.create(
+            name="Weekly orders",
+            owner=self.staff_user,
+            type_code="order_report",
+            window_days=7,
+            cadence="0 5 * * 1",
+            recipients="sales@example.com,\nroot@example.com",
+        )
+
+    def test_next_run_on(self) -> None:
+        next_run_on = self.schedule.next_run_on
+        assert next_run_on is not None
+        self.assertGreater(next_run_on, timezone.now())
+        self.assertEqual(timezone.localtime(next_run_on).weekday(), 0)
+
+    def test_date_range(self) -> None:
+        date_range = self.schedule.get_date_range(local_datetime(2019, 10, 7, 5))
+        assert date_range is not None
+        self.assertEqual(date_range.lower, local_datetime(2019, 9, 30))
+        self.assertEqual(date_range.upper, local_datetime(2019, 10, 6))
+        self.schedule.window_days = 0
+        self.assertIsNone(self.schedule.get_date_range())
+
+    def test_clean(self) -> None:
+        self.schedule.full_clean()
+        self.schedule.type_code = "foo_bar_baz"
+        with self.assertRaises(ValidationError):
+            self.schedule.full_clean()
+        self.schedule.type_code = "order_report"
+        self.schedule.recipients = "not an email"
+        with self.assertRaises(ValidationError):
+            self.schedule.full_clean()
+
+    def test_run_due_schedules(self) -> None:
+        create_order(user=self.staff_user)
+        self.schedule.schedule_next(local_datetime(2019, 10, 3))
+        self.schedule.save()
+        now = local_datetime(2019, 10, 7, 5)
+        self.assertEqual(self.schedule.next_run_on, now)
+        self.assertEqual(
+            scheduler.run_due_schedules(now - timedelta(minutes=1)),
+            {"queued": 0, "skipped": 0, "failed": 0},
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(
+                scheduler.run_due_schedules(now),
+                {"queued": 1, "skipped": 0, "failed": 0},
+            )
+        report = self.schedule.reports.get()
+        self.assertEqual(report.status, models.Report.STATUS_COMPLETED)
+        self.assertEqual(report.owner, self.staff_user)
+        self.assertEqual(report.date_range, self.schedule.get_date_range(now))
+
+        self.schedule.refresh_from_db()
+        self.assertEqual(self.schedule.last_run_on, now)
+        self.assertEqual(self.schedule.next_run_on, local_datetime(2019, 10, 14, 5))
+
+        # The owner and the recipients are told once it's ready
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ["root@example.com", "sales@example.com"])
+
+    def test_inactive_schedule(self) -> None:
+        self.schedule.is_active = False
+        self.schedule.save()
+        self.assertEqual(
+            scheduler.run_due_schedules(self.schedule.next_run_on),
+            {"queued": 0, "skipped": 0, "failed": 0},
+        )
+
+    @override_settings(OSCAR_REPORTS_MAX_CONCURRENT_PER_OWNER=0)
+    def test_limit_skips_schedule(self) -> None:
+        now = self.schedule.next_run_on
+        self.assertEqual(
+            scheduler.run_due_schedules(now), {"queued": 0, "skipped": 1, "failed": 0}
+        )
+        self.assertFalse(self.schedule.reports.exists())
+        self.schedule.refresh_from_db()
+        self.assertEqual(self.schedule.next_run_on, now)
+
+    def test_failed_schedule(self) -> None:
+        now = self.schedule.next_run_on
+        assert now is not None
+        broken = models.ReportSchedule.objects.create(
+            name="Broken",
+            owner=self.staff_user,
+            type_code="order_report",
+            window_days=7,
+            cadence="0 5 * * 1",
+        )
+        create_report = models.ReportSchedule.create_report
+
+        def create_or_fail(
+            schedule: models.ReportSchedule, *args: Any
+        ) -> models.Report:
+            if schedule.pk == broken.pk:
+                raise RuntimeError("Broken")
+            return create_report(schedule, *args)
+
+        with (
+            mock.patch.object(
+                models.ReportSchedule,
+                "create_report",
+                autospec=True,
+                side_effect=create_or_fail,
+            ),
+            self.assertLogs("oscarreports.scheduler", "ERROR") as logs,
+        ):
+            self.assertEqual(
+                scheduler.run_due_schedules(now),
+                {"queued": 1, "skipped": 0, "failed": 1},
+            )
+        self.assertIn(f"Failed to run report schedule {broken.pk}", logs.output[0])
+        # The other schedule still ran, and the failed one moves on too
+        self.assertTrue(self.schedule.reports.exists())
+        self.assertFalse(broken.reports.exists())
+        broken.refresh_from_db()
+        self.assertIsNone(broken.last_run_on)
+        assert broken.next_run_on is not None
+        self.assertGreater(broken.next_run_on, now)
+
+    def test_command(self) -> None:
+        stdout = StringIO()
+        call_command("run_report_schedules", stdout=stdout)
+        self.assertIn(
+            "Queued 0 scheduled reports, skipped 0 and 0 failed", stdout.getvalue()
+        )
+
+    def test_task(self) -> None:
+        kwargs: dict[str, Any] = {}
+        result = tasks.run_report_schedules.call(**kwargs)
+        self.assertEqual(result, {"queued": 0, "skipped": 0, "failed": 0})
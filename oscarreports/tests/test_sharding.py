@@ -0,0 +1,61 @@
+from datetime import date
+import hashlib
+import io
+
+from django.test import TestCase
+from oscar.apps.offer.reports import OfferReportGenerator
+from oscar.apps.order.reports import OrderReportGenerator
+
+from .. import sharding, streaming
+
+
+class ShardingTest(TestCase):
+    def test_split_date_range(self) -> None:
+        self.assertEqual(
+            sharding.split_date_range(date(2019, 1, 1), date(2019, 1, 10), 3),
+            [
+                (date(2019, 1, 1), date(2019, 1, 4)),
+                (date(2019, 1, 5), date(2019, 1, 7)),
+                (date(2019, 1, 8), date(2019, 1, 10)),
+            ],
+        )
+
+    def test_split_date_range_more_shards_than_days(self) -> None:
+        self.assertEqual(
+            sharding.split_date_range(date(2019, 1, 1), date(2019, 1, 2), 8),
+            [
+                (date(2019, 1, 1), date(2019, 1, 1)),
+                (date(2019, 1, 2), date(2019, 1, 2)),
+            ],
+        )
+
+    def test_split_date_range_empty(self) -> None:
+        self.assertEqual(
+            sharding.split_date_range(date(2019, 1, 2), date(2019, 1, 1), 2), []
+        )
+
+    def test_is_ordered_by_date_descending(self) -> None:
+        self.assertTrue(
+            sharding.is_ordered_by_date_descending(
+                OrderReportGenerator(formatter="CSV")
+            )
+        )
+        self.assertFalse(
+            sharding.is_ordered_by_date_descending(
+                OfferReportGenerator(formatter="CSV")
+            )
+        )
+
+    def test_concatenate(self) -> None:
+        parts = [
+            io.BytesIO(b"a,b\r\n1,2\r\n"),
+            io.BytesIO(b"a,b\r\n"),
+            io.BytesIO(b"a,b\r\n3,4\r\n5,6\r\n"),
+        ]
+        content = io.BytesIO()
+        output = streaming.ReportOutput(content)
+        sharding.concatenate(parts, output)
+        expected = b"a,b\r\n1,2\r\n3,4\r\n5,6\r\n"
+        self.assertEqual(content.getvalue(), expected)
+        self.assertEqual(output.size, len(expected))
+        self.assertEqual(output.sha256, hashlib.sha256(expected).hexdigest())
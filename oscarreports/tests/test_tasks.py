@@ -1,9 +1,11 @@
 from datetime import timedelta
+from unittest import mock
 
 from django.contrib.auth.models import User
 from django.core.exceptions import ImproperlyConfigured
 from django.test import TestCase
 from django.utils import timezone
+from django_tasks.exceptions import TaskResultDoesNotExist
 from freezegun import freeze_time
 
 from .. import models, tasks
@@ -51,3 +53,17 @@ class ReportTest(TestCase):
         )
         self.assertTrue(self.report.report_file.name.endswith(".csv"))
         self.assertIsNotNone(self.report.completed_on)
+
+
+class GetResultsTest(TestCase):
+    def test_unsupported_backend(self) -> None:
+        self.assertEqual(tasks.get_results(["a", "b"]), {})
+
+    @mock.patch("oscarreports.tasks.generate_report")
+    def test_get_results(self, generate_report: mock.MagicMock) -> None:
+        backend = generate_report.get_backend.return_value
+        backend.supports_get_result = True
+        result_a = mock.MagicMock()
+        backend.get_result.side_effect = [result_a, TaskResultDoesNotExist()]
+        self.assertEqual(tasks.get_results(["a", "", "b"]), {"a": result_a})
+        self.assertEqual(backend.get_result.call_count, 2)
@@ -1,13 +1,19 @@
 from datetime import timedelta
+from typing import Any
+from unittest import mock
+from uuid import UUID
 
 from django.contrib.auth.models import User
 from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils import timezone
 from oscar.test.testcases import WebTestCase
 from webtest.app import AppError
 
-from .. import models
+from .. import models, views
 
 try:
     # For Oscar >=4.0
@@ -55,6 +61,57 @@ class ReportsDashboardTests(WebTestCase):
         form.submit()
         self.assertIsOk(response)
 
+    def test_identical_report_is_reused(self) -> None:
+        url = reverse("dashboard:reports-index")
+        for _ in range(2):
+            response = self.get(url)
+            form = response.forms["generate_report_form"]
+            form["report_type"] = "order_report"
+            form["date_from"] = "2017-01-01"
+            form["date_to"] = "2017-12-31"
+            response = form.submit().follow()
+        self.assertEqual(models.Report.objects.count(), 1)
+        self.assertContains(response, "An identical report is already being generated")
+        # The owner isn't also a requester
+        self.assertFalse(models.Report.objects.get().requesters.exists())
+
+    def test_identical_report_adds_requester(self) -> None:
+        url = reverse("dashboard:reports-index")
+        other_user = User.objects.create_user(username="other", is_staff=True)
+        for _ in range(2):
+            response = self.get(url)
+            form = response.forms["generate_report_form"]
+            form["report_type"] = "order_report"
+            form["date_from"] = "2017-01-01"
+            form["date_to"] = "2017-12-31"
+            response = form.submit().follow()
+            # Someone else asked for the report first
+            models.Report.objects.update(owner=other_user)
+        report = models.Report.objects.get()
+        self.assertEqual(list(report.requesters.all()), [self.user])
+        self.assertContains(response, "be notified when it&#x27;s ready")
+
+    def test_report_format(self) -> None:
+        url = reverse("dashboard:reports-index")
+        response = self.get(url)
+        form = response.forms["generate_report_form"]
+        form["report_type"] = "order_report"
+        form["report_format"] = "XLSX"
+        form.submit().follow()
+        report = models.Report.objects.get()
+        self.assertEqual(report.report_format, "XLSX")
+
+    def test_preview(self) -> None:
+        url = reverse("dashboard:reports-index")
+        response = self.get(url)
+        form = response.forms["generate_report_form"]
+        form["report_type"] = "order_report"
+        response = form.submit("preview")
+        self.assertIsOk(response)
+        self.assertContains(response, 'id="report_preview"')
+        self.assertContains(response, "Order number")
+        self.assertFalse(models.Report.objects.exists())
+
     def test_conditional_offers_with_invalid_date_range(self) -> None:
         url = reverse("dashboard:reports-index")
         response = self.get(url)
@@ -67,6 +124,98 @@ class ReportsDashboardTests(WebTestCase):
         self.assertIsOk(response)
 
 
+class ReportListDashboardTests(WebTestCase):
+    is_staff = True
+    permissions = _permissions
+
+    def _create_reports(self, count: int) -> None:
+        for i in range(models.Report.objects.count(), count):
+            owner = User.objects.create_user(
+                username=f"owner{i}", first_name="Report", last_name=f"Owner {i}"
+            )
+            report = models.Report()
+            report.owner = owner
+            report.type_code = "order_report"
+            report.task_id = f"task-{i}"
+            report.queued_on = timezone.now()
+            report.completed_on = timezone.now()
+            report.report_file.name = f"oscar-reports/{report.uuid}.csv"
+            report.file_size = 2048
+            report.save()
+
+    def _count_index_queries(self) -> int:
+        url = reverse("dashboard:reports-index")
+        with CaptureQueriesContext(connection) as queries:
+            response = self.get(url)
+        self.assertIsOk(response)
+        self.assertContains(response, "2.0\xa0KB")
+        return len(queries)
+
+    @mock.patch("oscarreports.tasks.get_results")
+    @mock.patch("django.core.files.storage.FileSystemStorage.size")
+    def test_index_query_count_is_constant(
+        self,
+        storage_size: mock.MagicMock,
+        get_results: mock.MagicMock,
+    ) -> None:
+        get_results.return_value = {}
+        self._create_reports(2)
+        # Warm up per-process caches (sites, content types, etc)
+        self._count_index_queries()
+        num_queries = self._count_index_queries()
+        self._create_reports(7)
+        self.assertEqual(self._count_index_queries(), num_queries)
+        self.assertEqual(storage_size.call_count, 0)
+        self.assertEqual(get_results.call_count, 3)
+
+    @mock.patch("oscarreports.tasks.get_results")
+    def test_index_keyset_pagination(self, get_results: mock.MagicMock) -> None:
+        get_results.return_value = {}
+        self._create_reports(25)
+        reports = list(models.Report.objects.order_by("-created_on", "-id"))
+        url = reverse("dashboard:reports-index")
+        with CaptureQueriesContext(connection) as queries:
+            response = self.get(url)
+        report_counts = [
+            q["sql"]
+            for q in queries.captured_queries
+            if "COUNT(" in q["sql"] and "reports_dashboard_report" in q["sql"]
+        ]
+        self.assertEqual(report_counts, [])
+        rows = response.html.select("table tbody tr")
+        self.assertEqual(len(rows), 20)
+        self.assertIn(str(reports[0].uuid), str(rows[0]))
+        self.assertIn(str(reports[19].uuid), str(rows[19]))
+
+        response = response.click(description="next")
+        rows = response.html.select("table tbody tr")
+        self.assertEqual(len(rows), 5)
+        self.assertIn(str(reports[20].uuid), str(rows[0]))
+        pagination = response.html.select_one("ul.pagination")
+        self.assertIn("newest", pagination.text)
+        self.assertNotIn("next", pagination.text)
+
+        # An invalid cursor starts from the newest report
+        response = self.get(url, params={"cursor": "invalid"})
+        self.assertEqual(len(response.html.select("table tbody tr")), 20)
+
+    @mock.patch("oscarreports.tasks.get_results")
+    def test_index_status_filter(self, get_results: mock.MagicMock) -> None:
+        get_results.return_value = {}
+        self._create_reports(3)
+        queued = models.Report.objects.order_by("pk").first()
+        assert queued is not None
+        queued.completed_on = None
+        queued.save()
+        url = reverse("dashboard:reports-index")
+        response = self.get(url, params={"status": "queued"})
+        rows = response.html.select("table tbody tr")
+        self.assertEqual(len(rows), 1)
+        self.assertIn(str(queued.uuid), str(rows[0]))
+        response = self.get(url, params={"status": "completed"})
+        self.assertEqual(len(response.html.select("table tbody tr")), 2)
+
+
 class DownloadReportDashboardTests(WebTestCase):
     is_staff = True
     permissions = _permissions
@@ -96,6 +245,14 @@ class DownloadReportDashboardTests(WebTestCase):
         url = reverse("dashboard:reports-download", args=[self.report.uuid])
         response = self.get(url)
         self.assertIsOk(response)
+        self.assertEqual(response.headers["ETag"], f'"{self.report.sha256}"')
+
+    def test_download_report_range(self) -> None:
+        self.report.generate()
+        url = reverse("dashboard:reports-download", args=[self.report.uuid])
+        response = self.get(url, headers={"Range": "bytes=0-4"}, status=206)
+        with self.report.report_file.open("rb") as f:
+            self.assertEqual(response.body, f.read(5))
 
 
 class DeleteReportDashboardTests(WebTestCase):
@@ -130,3 +287,82 @@ class DeleteReportDashboardTests(WebTestCase):
         form.submit()
         self.assertIsOk(response)
         self.assertEqual(models.Report.objects.count(), 0)
+
+
+class ReportStatusListTests(WebTestCase):
+    is_staff = True
+    permissions = _permissions
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.reports = []
+        for _ in range(2):
+            report = models.Report()
+            report.owner = self.user
+            report.type_code = "order_report"
+            report.date_range = DateTimeTZRange(
+                lower=(timezone.now() - timedelta(days=1)), upper=(timezone.now())
+            )
+            report.save()
+            self.reports.append(report)
+        self.url = "{}?uuid={}&uuid={}".format(
+            reverse("dashboard:reports-status-list"),
+            self.reports[0].uuid,
+            self.reports[1].uuid,
+        )
+
+    def test_status_list(self) -> None:
+        response = self.get(self.url)
+        self.assertEqual(
+            [report["uuid"] for report in response.json["reports"]],
+            [str(report.uuid) for report in self.reports],
+        )
+        self.assertEqual(
+            response.json["reports"][0]["status"], models.Report.STATUS_CREATED
+        )
+
+    def test_invalid_uuid(self) -> None:
+        url = reverse("dashboard:reports-status-list") + "?uuid=nope"
+        self.get(url, status=400)
+
+    def test_conditional_get(self) -> None:
+        etag = self.get(self.url).headers["ETag"]
+        self.get(self.url, headers={"If-None-Match": etag}, status=304)
+        # Status changes produce a new ETag
+        self.reports[0].generate()
+        response = self.get(self.url, headers={"If-None-Match": etag})
+        self.assertNotEqual(response.headers["ETag"], etag)
+        self.assertEqual(
+            response.json["reports"][0]["status"], models.Report.STATUS_COMPLETED
+        )
+
+    def test_long_poll_disabled(self) -> None:
+        etag = self.get(self.url).headers["ETag"]
+        with mock.patch("time.sleep") as sleep:
+            self.get(self.url + "&wait=10", headers={"If-None-Match": etag}, status=304)
+        sleep.assert_not_called()
+
+    @override_settings(OSCAR_REPORTS_STATUS_MAX_WAIT=25)
+    @mock.patch.object(views.ReportStatusListView, "poll_interval", 0.01)
+    def test_long_poll(self) -> None:
+        etag = self.get(self.url).headers["ETag"]
+        # Nothing changes before the wait is up
+        self.get(self.url + "&wait=0.05", headers={"If-None-Match": etag}, status=304)
+        # Respond as soon as something changes
+        get_data = views.ReportStatusListView.get_data
+        calls = []
+
+        def changing_data(
+            view: views.ReportStatusListView, uuids: list[UUID]
+        ) -> dict[str, Any]:
+            calls.append(uuids)
+            if len(calls) == 3:
+                self.reports[1].generate()
+            return get_data(view, uuids)
+
+        with mock.patch.object(views.ReportStatusListView, "get_data", changing_data):
+            response = self.get(self.url + "&wait=10", headers={"If-None-Match": etag})
+        self.assertEqual(len(calls), 3)
+        self.assertEqual(
+            response.json["reports"][1]["status"], models.Report.STATUS_COMPLETED
+        )
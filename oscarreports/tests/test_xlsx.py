@@ -0,0 +1,156 @@
+from datetime import timedelta
+from decimal import Decimal
+from typing import Any
+from xml.etree import ElementTree
+import io
+import zipfile
+
+from django.contrib.auth.models import User
+from django.core.exceptions import ImproperlyConfigured
+from django.http import HttpResponse
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from oscar.test.factories import create_order
+
+from .. import models, streaming, xlsx
+
+try:
+    try:
+        from psycopg.types.range import Range as DateTimeTZRange
+    except ImportError:
+        from psycopg2.extras import DateTimeTZRange
+except ImportError:
+    raise ImproperlyConfigured("Error loading psycopg2 or psycopg module")
+
+NS = {"x": xlsx.SPREADSHEET_NS}
+
+
+def read_workbook(content: bytes) -> list[list[list[Any]]]:
+    # The rows of each worksheet, with numbers as Decimals
+    sheets = []
+    with zipfile.ZipFile(io.BytesIO(content)) as zf:
+        names = sorted(
+            name for name in zf.namelist() if name.startswith("xl/worksheets/")
+        )
+        for name in names:
+            rows = []
+            root = ElementTree.fromstring(zf.read(name))
+            for row in root.iterfind("x:sheetData/x:row", NS):
+                values: list[Any] = []
+                for cell in row.iterfind("x:c", NS):
+                    if cell.get("t") == "inlineStr":
+                        values.append(cell.findtext("x:is/x:t", "", NS))
+                    elif cell.get("t") == "b":
+                        values.append(cell.findtext("x:v", "", NS) == "1")
+                    elif cell.find("x:v", NS) is not None:
+                        values.append(Decimal(cell.findtext("x:v", "", NS)))
+                    else:
+                        values.append(None)
+                rows.append(values)
+            sheets.append(rows)
+    return sheets
+
+
+class WorkbookTest(TestCase):
+    def write(self, rows: list[list[Any]], **kwargs: Any) -> bytes:
+        content = io.BytesIO()
+        with xlsx.Workbook(streaming.ReportOutput(content), **kwargs) as workbook:
+            workbook.writerows(rows)
+        return content.getvalue()
+
+    def test_cells(self) -> None:
+        content = self.write(
+            [
+                ["Name", "Total", "Paid"],
+                ["<Alice & Bob>", Decimal("12.50"), True],
+                [" padded ", 3, None],
+                ["bell\x07", float("nan"), False],
+            ]
+        )
+        self.assertEqual(
+            read_workbook(content),
+            [
+                [
+                    ["Name", "Total", "Paid"],
+                    ["<Alice & Bob>", Decimal("12.50"), True],
+                    [" padded ", Decimal(3), None],
+                    ["bell", "nan", False],
+                ]
+            ],
+        )
+        with zipfile.ZipFile(io.BytesIO(content)) as zf:
+            self.assertIsNone(zf.testzip())
+            self.assertNotIn("xl/sharedStrings.xml", zf.namelist())
+            self.assertIn("[Content_Types].xml", zf.namelist())
+
+    def test_empty(self) -> None:
+        self.assertEqual(read_workbook(self.write([])), [[]])
+
+    def test_rows_continue_on_next_sheet(self) -> None:
+        rows: list[list[Any]] = [["n"], [1], [2], [3], [4]]
+        sheets = read_workbook(self.write(rows, max_rows=3))
+        self.assertEqual(
+            sheets,
+            [
+                [["n"], [Decimal(1)], [Decimal(2)]],
+                [["n"], [Decimal(3)], [Decimal(4)]],
+            ],
+        )
+
+    def test_identical_content(self) -> None:
+        rows: list[list[Any]] = [["n"], [1]]
+        self.assertEqual(self.write(rows), self.write(rows))
+
+
+class XLSXReportTest(TestCase):
+    def setUp(self) -> None:
+        self.staff_user = User.objects.create_user(
+            username="root", email="root@example.com", is_staff=True
+        )
+        self.orders = [create_order(user=self.staff_user) for _ in range(3)]
+        self.report = models.Report()
+        self.report.owner = self.staff_user
+        self.report.type_code = "order_report"
+        self.report.date_range = DateTimeTZRange(
+            lower=(timezone.now() - timedelta(days=2)), upper=(timezone.now())
+        )
+        self.report.save()
+
+    def read_report(self) -> list[list[list[Any]]]:
+        with self.report.report_file.open("rb") as f:
+            return read_workbook(f.read())
+
+    def test_generate(self) -> None:
+        self.report.generate("XLSX")
+        self.report.refresh_from_db()
+        self.assertEqual(self.report.status, models.Report.STATUS_COMPLETED)
+        self.assertEqual(self.report.mime_type, xlsx.XLSX_MIME_TYPE)
+        self.assertTrue(str(self.report.report_file.name).endswith(".xlsx"))
+        self.assertEqual(self.report.row_count, 3)
+        [rows] = self.read_report()
+        self.assertEqual(rows[0][0], "Order number")
+        self.assertEqual(
+            sorted(row[0] for row in rows[1:]),
+            sorted(str(order.number) for order in self.orders),
+        )
+
+    @override_settings(
+        OSCAR_REPORTS_COMPRESSION={"order_report": "gzip"},
+        OSCAR_REPORTS_SHARDS={"order_report": 2},
+    )
+    def test_generate_is_never_compressed_or_split(self) -> None:
+        generator = self.report.get_generator("XLSX")
+        self.assertIsNone(self.report.get_splittable_date_range(generator))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.report.queue("XLSX")
+        self.report.refresh_from_db()
+        self.assertEqual(self.report.shard_count, 1)
+        self.assertEqual(self.report.content_encoding, "")
+        self.assertEqual(len(self.read_report()[0]), 4)
+
+    def test_synchronous_response(self) -> None:
+        response = self.report.get_generator("XLSX").generate()
+        assert isinstance(response, HttpResponse)
+        self.assertEqual(response["Content-Type"], xlsx.XLSX_MIME_TYPE)
+        self.assertIn(".xlsx", response["Content-Disposition"])
+        self.assertEqual(len(read_workbook(response.content)[0]), 4)
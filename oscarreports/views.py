@@ -1,28 +1,47 @@
 from __future__ import annotations
 
+from datetime import datetime
 from typing import Any
+from uuid import UUID
+import hashlib
+import json
 import os.path
+import time
 
+from django.conf import settings
 from django.contrib import messages
 from django.core.exceptions import ImproperlyConfigured
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
 from django.db.models.query import QuerySet
 from django.forms.models import BaseModelForm
 from django.http import (
-    FileResponse,
     Http404,
     HttpRequest,
     HttpResponse,
+    HttpResponseBadRequest,
     HttpResponseBase,
+    HttpResponseNotModified,
+    JsonResponse,
 )
 from django.shortcuts import redirect
-from django.urls import reverse_lazy
+from django.urls import reverse, reverse_lazy
+from django.utils.formats import date_format
+from django.utils.http import parse_etags, quote_etag
+from django.utils.timezone import localtime
 from django.utils.translation import gettext_lazy as _
-from django.views.generic.detail import BaseDetailView
+from django.views.generic import View
+from django.views.generic.detail import BaseDetailView, SingleObjectMixin
 from django.views.generic.edit import DeleteView, FormMixin
 from django_tables2 import SingleTableView
 
+from . import compression, formats
+from .downloads import get_download_strategy
 from .forms import ReportForm
 from .models import Report
+from .pagination import ORDERING, KeysetPage
+from .preview import PreviewTimeout, PreviewUnavailable, preview_report
+from .queueing import ReportLimitExceeded
 from .tables import ReportTable
 
 try:
@@ -34,9 +53,43 @@ except ImportError:
     raise ImproperlyConfigured("Error loading psycopg2 or psycopg module")
 
 
+def get_report_status(report: Report) -> dict[str, Any]:
+    progress = report.progress
+    return {
+        "uuid": str(report.uuid),
+        "status": report.status,
+        "status_name": str(report.status_name),
+        "row_count": report.row_count,
+        "progress": (
+            {
+                "rows": progress.rows,
+                "total": progress.total,
+                "percent": progress.percent,
+                "eta": progress.eta.isoformat() if progress.eta else None,
+            }
+            if progress is not None
+            else None
+        ),
+        "download_url": (
+            reverse("dashboard:reports-download", kwargs={"uuid": report.uuid})
+            if report.is_complete
+            else None
+        ),
+    }
+
+
+def get_status_max_wait() -> float:
+    # Longest a status request may be held open waiting for a change. Off by
+    # default, since each waiting request holds a worker, e.g.
+    # OSCAR_REPORTS_STATUS_MAX_WAIT = 25 when served by an async server
+    return getattr(settings, "OSCAR_REPORTS_STATUS_MAX_WAIT", 0)
+
+
 class IndexView(FormMixin[ReportForm], SingleTableView):
     template_name = "oscar/dashboard/reports/index.html"
-    table_pagination = True  # type:ignore[assignment]
+    # Reports are paged with ``KeysetPage`` instead
+    table_pagination = False  # type:ignore[assignment]
+    per_page = 20
     model = Report
     table_class = ReportTable  # type:ignore[assignment]
     context_table_name = "reports"
@@ -55,12 +108,29 @@ class IndexView(FormMixin[ReportForm], SingleTableView):
         self.form = self.get_form(form_class)
         return super().dispatch(request, *args, **kwargs)
 
+    def get_form_kwargs(self) -> dict[str, Any]:
+        kwargs = super().get_form_kwargs()
+        kwargs["preview"] = "preview" in self.request.POST
+        return kwargs
+
     def get_queryset(self) -> QuerySet[Report]:
-        queryset = self.model.objects.all().order_by("-queued_on")
-        return queryset
+        queryset = self.model.objects.select_related("owner")
+        status = self.get_status_filter()
+        if status:
+            queryset = queryset.filter(status=status)
+        return queryset.order_by(*ORDERING)
+
+    def get_status_filter(self) -> str | None:
+        status = self.request.GET.get("status")
+        return status if status in Report.STATUS_NAMES else None
 
-    def get_table_pagination(self, table: ReportTable) -> dict[str, int]:
-        return dict(per_page=20)
+    def get_table_data(self) -> list[Report]:
+        self.page = KeysetPage(
+            self.get_queryset(),
+            self.request.GET.get("cursor"),
+            per_page=self.per_page,
+        )
+        return self.page.object_list
 
     def post(
         self,
@@ -68,35 +138,155 @@ class IndexView(FormMixin[ReportForm], SingleTableView):
         *args: Any,
         **kwargs: Any,
     ) -> HttpResponse:
+        if self.form.is_valid() and "preview" in request.POST:
+            return self.preview(request, *args, **kwargs)
         if self.form.is_valid():
+            type_code = self.form.cleaned_data["report_type"]
+            date_range = DateTimeTZRange(
+                lower=self.form.cleaned_data["date_from"],
+                upper=self.form.cleaned_data["date_to"],
+            )
+            report_format = self.form.cleaned_data["report_format"] or formats.CSV
+            try:
+                report = self.create_report(
+                    type_code, date_range, report_format, self.form.run_after
+                )
+            except ReportLimitExceeded as e:
+                messages.error(request, str(e))
+            else:
+                # Deferred only if the task backend supports it
+                run_after = report.run_after if report is not None else None
+                if report is not None and run_after is not None:
+                    messages.info(
+                        request,
+                        _(
+                            "This is a large report, so it has been scheduled "
+                            "to run after %(run_after)s"
+                        )
+                        % {
+                            "run_after": date_format(
+                                localtime(run_after), "DATETIME_FORMAT"
+                            )
+                        },
+                    )
+                elif report is not None:
+                    messages.info(
+                        request, _("Successfully queued report for generation")
+                    )
+            return redirect("dashboard:reports-index")
+        return self.get(request, *args, **kwargs)
+
+    def preview(
+        self,
+        request: HttpRequest,
+        *args: Any,
+        **kwargs: Any,
+    ) -> HttpResponse:
+        # Show the first rows of the report inline, without queueing it
+        generator = self.form.get_generator(
+            self.form.cleaned_data["report_type"],
+            self.form.cleaned_data["date_from"],
+            self.form.cleaned_data["date_to"],
+        )
+        try:
+            if generator is None:
+                raise PreviewUnavailable()
+            self.report_preview = preview_report(generator)
+        except PreviewTimeout:
+            messages.error(
+                request,
+                _(
+                    "The preview took too long. Generate the report, or choose "
+                    "a shorter date range."
+                ),
+            )
+        except PreviewUnavailable:
+            messages.error(request, _("This report can't be previewed"))
+        return self.get(request, *args, **kwargs)
+
+    def create_report(
+        self,
+        type_code: str,
+        date_range: DateTimeTZRange,
+        report_format: str,
+        run_after: datetime | None = None,
+    ) -> Report | None:
+        request = self.request
+        with transaction.atomic():
+            # Reuse an identical report rather than generating it twice
+            duplicate = Report.objects.get_duplicate(
+                type_code, date_range, report_format
+            )
+            if duplicate is not None:
+                if duplicate.is_complete:
+                    msg = _(
+                        "An identical report was generated recently and is "
+                        "ready to download"
+                    )
+                else:
+                    msg = _(
+                        "An identical report is already being generated. "
+                        "You'll be notified when it's ready."
+                    )
+                    # Notify the requester too when it completes
+                    if (
+                        request.user.is_authenticated
+                        and request.user.pk != duplicate.owner_id
+                    ):
+                        duplicate.requesters.add(request.user)
+                messages.info(request, msg)
+                return None
             # Create report
             report = Report()
             report.content_type = None
             report.owner = request.user if request.user.is_authenticated else None
-            report.type_code = self.form.cleaned_data["report_type"]
-            report.date_range = DateTimeTZRange(
-                lower=self.form.cleaned_data["date_from"],
-                upper=self.form.cleaned_data["date_to"],
-            )
+            report.type_code = type_code
+            report.date_range = date_range
             report.save()
             # Queue report
-            report.queue()
-            # Message user
-            messages.info(request, _("Successfully queued report for generation"))
-            return redirect("dashboard:reports-index")
-        return self.get(request, *args, **kwargs)
+            report.queue(report_format, run_after=run_after)
+        return report
 
     def get_table(self, **kwargs: Any) -> ReportTable:
         table = super().get_table(**kwargs)
         table.caption = _("Reports")
+        table.keyset_page = self.page
+        # Look up the task status of every report on the page in one go
+        Report.prefetch_task_results(row.record for row in table.paginated_rows)
+        Report.prefetch_progress(row.record for row in table.paginated_rows)
         return table
 
     def get_context_data(self, **kwargs: Any) -> dict[str, Any]:
         context = super().get_context_data(**kwargs)
         context["form"] = self.form
+        context["status_choices"] = Report.STATUS_NAMES.items()
+        context["status_filter"] = self.get_status_filter()
+        context["preview"] = getattr(self, "report_preview", None)
+        context["status_wait"] = get_status_max_wait()
         return context
 
 
+class ReportEstimateView(View):
+    """
+    Cost estimate of the report described by the query string (with the same
+    fields as ``ReportForm``) as JSON, shown before the report is queued.
+    """
+
+    form_class = ReportForm
+
+    def get(self, request: HttpRequest, *args: Any, **kwargs: Any) -> HttpResponse:
+        form = self.form_class(request.GET)
+        valid = form.is_valid()
+        return JsonResponse(
+            {
+                "rows": form.estimated_rows,
+                "run_after": form.run_after,
+                "errors": [str(error) for error in form.non_field_errors()],
+            },
+            status=200 if valid else 400,
+        )
+
+
 class ReportDownloadView(BaseDetailView[Report]):
     model = Report
     slug_field = "uuid"
@@ -106,12 +296,16 @@ class ReportDownloadView(BaseDetailView[Report]):
         self,
         context: dict[str, Any],
         **response_kwargs: Any,
-    ) -> FileResponse:
+    ) -> HttpResponseBase:
         report = context["object"]
         if not report.report_file.name:
             raise Http404()
-        # Build filename
-        extension = os.path.splitext(report.report_file.name)[1].replace(".", "")
+        # Build filename. Gzipped files are decompressed on download, either by
+        # the browser or for it.
+        name = report.report_file.name
+        if report.content_encoding == compression.GZIP:
+            name = name.removesuffix(".gz")
+        extension = os.path.splitext(name)[1].replace(".", "")
         filename = "{date}_{type_code}_{uuid}.{ext}".format(
             date=report.created_on.strftime("%Y-%m-%d"),
             type_code=report.type_code,
@@ -119,9 +313,102 @@ class ReportDownloadView(BaseDetailView[Report]):
             ext=extension,
         )
         # Send file to client
-        resp = FileResponse(report.report_file, as_attachment=True, filename=filename)
-        resp["Content-Type"] = report.mime_type
-        return resp
+        return get_download_strategy().serve(self.request, report, filename)
+
+
+class ReportStatusView(BaseDetailView[Report]):
+    """
+    Status and progress of a single report as JSON, for polling instead of
+    reloading the report list.
+    """
+
+    model = Report
+    slug_field = "uuid"
+    slug_url_kwarg = "uuid"
+
+    def render_to_response(
+        self,
+        context: dict[str, Any],
+        **response_kwargs: Any,
+    ) -> HttpResponseBase:
+        return JsonResponse(get_report_status(context["object"]))
+
+
+class ReportStatusListView(View):
+    """
+    Status and progress of the reports given by ``?uuid=`` as JSON.
+
+    Responses carry an ``ETag``, and a matching ``If-None-Match`` gets a 304.
+    With ``?wait=<seconds>``, up to ``OSCAR_REPORTS_STATUS_MAX_WAIT``, the
+    request is held open until the response would no longer match
+    ``If-None-Match`` (i.e. a report's status or progress has changed), or
+    until the wait is up.
+    """
+
+    # Longest list of reports which can be requested at once
+    max_reports = 100
+    # Seconds between checks for changes while long-polling
+    poll_interval = 1.0
+
+    def get(self, request: HttpRequest, *args: Any, **kwargs: Any) -> HttpResponse:
+        try:
+            uuids = [UUID(value) for value in request.GET.getlist("uuid")]
+            wait = min(float(request.GET.get("wait", 0)), get_status_max_wait())
+        except ValueError:
+            return HttpResponseBadRequest()
+        if len(uuids) > self.max_reports:
+            return HttpResponseBadRequest()
+        # Compare weakly, since e.g. ``GZipMiddleware`` weakens ETags
+        if_none_match = {
+            tag.removeprefix("W/")
+            for tag in parse_etags(request.headers.get("If-None-Match", ""))
+        }
+        deadline = time.monotonic() + wait
+        while True:
+            data = self.get_data(uuids)
+            content = json.dumps(data, cls=DjangoJSONEncoder)
+            etag = quote_etag(hashlib.sha256(content.encode()).hexdigest())
+            if etag not in if_none_match:
+                response = HttpResponse(content, content_type="application/json")
+                break
+            if time.monotonic() + self.poll_interval > deadline:
+                response = HttpResponseNotModified()
+                break
+            time.sleep(self.poll_interval)
+        response["ETag"] = etag
+        response["Cache-Control"] = "private, no-cache"
+        return response
+
+    def get_data(self, uuids: list[UUID]) -> dict[str, Any]:
+        reports = list(
+            Report.objects.filter(uuid__in=uuids)
+            .only(
+                "uuid",
+                "status",
+                "row_count",
+                "started_on",
+                "shard_count",
+                "shards_completed",
+                "checkpoint",
+            )
+            .order_by("pk")
+        )
+        Report.prefetch_progress(reports)
+        return {"reports": [get_report_status(report) for report in reports]}
+
+
+class ReportCancelView(SingleObjectMixin[Report], View):
+    model = Report
+    slug_field = "uuid"
+    slug_url_kwarg = "uuid"
+
+    def post(self, request: HttpRequest, *args: Any, **kwargs: Any) -> HttpResponse:
+        report = self.get_object()
+        if report.cancel():
+            messages.info(request, _("Report cancelled"))
+        else:
+            messages.warning(request, _("The report has already finished"))
+        return redirect("dashboard:reports-index")
 
 
 class ReportDeleteView(DeleteView[Report, BaseModelForm[Report]]):
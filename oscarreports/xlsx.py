@@ -0,0 +1,228 @@
+from __future__ import annotations
+
+from collections.abc import Iterable
+from decimal import Decimal
+from types import TracebackType
+from typing import IO, Any
+from xml.sax.saxutils import escape
+import math
+import re
+import zipfile
+
+from .streaming import FileFormatter, ReportOutput
+
+XLSX = "XLSX"
+XLSX_MIME_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+# Excel's own limits. Rows past the end of a worksheet continue on the next
+# one, under a copy of the first (header) row.
+MAX_ROWS = 1048576
+MAX_CELL_CHARS = 32767
+
+# Number of rows held in memory before they're passed on to the zip file
+BUFFER_ROWS = 500
+
+# Fixed timestamp of every part, so that identical reports have identical
+# checksums
+ZIP_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+
+# Characters which can't appear in an XML document, even escaped
+ILLEGAL_XML_CHARS = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]")
+
+XML_DECLARATION = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+SPREADSHEET_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+RELATIONSHIPS_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+PACKAGE_RELATIONSHIPS_NS = (
+    "http://schemas.openxmlformats.org/package/2006/relationships"
+)
+
+SHEET_START = (
+    f'{XML_DECLARATION}<worksheet xmlns="{SPREADSHEET_NS}"><sheetData>'
+).encode()
+SHEET_END = b"</sheetData></worksheet>"
+
+ROOT_RELS = (
+    f'{XML_DECLARATION}<Relationships xmlns="{PACKAGE_RELATIONSHIPS_NS}">'
+    '<Relationship Id="rId1" Target="xl/workbook.xml" '
+    f'Type="{RELATIONSHIPS_NS}/officeDocument"/>'
+    "</Relationships>"
+)
+
+STYLES = (
+    f'{XML_DECLARATION}<styleSheet xmlns="{SPREADSHEET_NS}">'
+    '<fonts count="1"><font><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="1"><fill><patternFill patternType="none"/></fill></fills>'
+    '<borders count="1"><border/></borders>'
+    '<cellStyleXfs count="1"><xf/></cellStyleXfs>'
+    '<cellXfs count="1"><xf/></cellXfs>'
+    "</styleSheet>"
+)
+
+
+def format_cell(value: Any) -> str:
+    # Numbers are written as numbers and everything else as an inline string,
+    # so there's no shared strings table to hold in memory
+    if value is None:
+        return "<c/>"
+    if isinstance(value, bool):
+        return f'<c t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (int, float, Decimal)) and math.isfinite(value):
+        return f"<c><v>{value}</v></c>"
+    text = ILLEGAL_XML_CHARS.sub("", str(value))[:MAX_CELL_CHARS]
+    space = ' xml:space="preserve"' if text != text.strip() else ""
+    return f'<c t="inlineStr"><is><t{space}>{escape(text)}</t></is></c>'
+
+
+def format_row(row: Iterable[Any]) -> str:
+    return "<row>{}</row>".format("".join(format_cell(value) for value in row))
+
+
+class Workbook:
+    """
+    Writes an XLSX workbook into ``fileobj`` a row at a time, through the same
+    ``writerow()`` / ``writerows()`` interface as a CSV writer.
+
+    Rows are compressed and passed on to ``fileobj`` as they're written, so
+    memory use doesn't grow with the size of the report. The workbook is
+    complete once ``close()`` is called.
+    """
+
+    def __init__(self, fileobj: ReportOutput, max_rows: int = MAX_ROWS) -> None:
+        self.zip_file = zipfile.ZipFile(
+            fileobj,
+            mode="w",
+            compression=zipfile.ZIP_DEFLATED,
+        )
+        self.max_rows = max_rows
+        self.sheet_count = 0
+        self.sheet: IO[bytes] | None = None
+        self.sheet_rows = 0
+        self.header: str | None = None
+        self.buffer: list[str] = []
+
+    def __enter__(self) -> Workbook:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        self.close()
+
+    def writerow(self, row: Iterable[Any]) -> None:
+        if self.sheet is None or self.sheet_rows >= self.max_rows:
+            self.start_sheet()
+        xml = format_row(row)
+        if self.header is None:
+            self.header = xml
+        self.buffer.append(xml)
+        self.sheet_rows += 1
+        if len(self.buffer) >= BUFFER_ROWS:
+            self.flush()
+
+    def writerows(self, rows: Iterable[Iterable[Any]]) -> None:
+        for row in rows:
+            self.writerow(row)
+
+    def flush(self) -> None:
+        if self.sheet is not None and self.buffer:
+            self.sheet.write("".join(self.buffer).encode())
+        self.buffer = []
+
+    def start_sheet(self) -> None:
+        self.finish_sheet()
+        self.sheet_count += 1
+        self.sheet = self.zip_file.open(
+            self.get_zip_info(f"xl/worksheets/sheet{self.sheet_count}.xml"),
+            mode="w",
+            force_zip64=True,
+        )
+        self.sheet.write(SHEET_START)
+        self.sheet_rows = 0
+        if self.header is not None:
+            self.buffer.append(self.header)
+            self.sheet_rows += 1
+
+    def finish_sheet(self) -> None:
+        if self.sheet is None:
+            return
+        self.flush()
+        self.sheet.write(SHEET_END)
+        self.sheet.close()
+        self.sheet = None
+
+    def close(self) -> None:
+        # A workbook needs at least one worksheet, even if it's empty
+        if self.sheet_count == 0:
+            self.start_sheet()
+        self.finish_sheet()
+        for name, content in self.get_package_parts().items():
+            self.zip_file.writestr(self.get_zip_info(name), content)
+        self.zip_file.close()
+
+    def get_zip_info(self, name: str) -> zipfile.ZipInfo:
+        info = zipfile.ZipInfo(name, date_time=ZIP_DATE_TIME)
+        info.compress_type = zipfile.ZIP_DEFLATED
+        return info
+
+    def get_package_parts(self) -> dict[str, str]:
+        sheet_numbers = range(1, self.sheet_count + 1)
+        overrides = "".join(
+            f'<Override PartName="/xl/worksheets/sheet{n}.xml" ContentType='
+            '"application/vnd.openxmlformats-officedocument.spreadsheetml.'
+            'worksheet+xml"/>'
+            for n in sheet_numbers
+        )
+        sheets = "".join(
+            f'<sheet name="Sheet{n}" sheetId="{n}" r:id="rId{n}"/>'
+            for n in sheet_numbers
+        )
+        sheet_rels = "".join(
+            f'<Relationship Id="rId{n}" Target="worksheets/sheet{n}.xml" '
+            f'Type="{RELATIONSHIPS_NS}/worksheet"/>'
+            for n in sheet_numbers
+        )
+        styles_id = self.sheet_count + 1
+        return {
+            "[Content_Types].xml": (
+                f"{XML_DECLARATION}<Types xmlns="
+                '"http://schemas.openxmlformats.org/package/2006/content-types">'
+                '<Default Extension="rels" ContentType='
+                '"application/vnd.openxmlformats-package.relationships+xml"/>'
+                '<Default Extension="xml" ContentType="application/xml"/>'
+                '<Override PartName="/xl/workbook.xml" ContentType='
+                '"application/vnd.openxmlformats-officedocument.spreadsheetml.'
+                'sheet.main+xml"/>'
+                '<Override PartName="/xl/styles.xml" ContentType='
+                '"application/vnd.openxmlformats-officedocument.spreadsheetml.'
+                'styles+xml"/>'
+                f"{overrides}</Types>"
+            ),
+            "_rels/.rels": ROOT_RELS,
+            "xl/workbook.xml": (
+                f'{XML_DECLARATION}<workbook xmlns="{SPREADSHEET_NS}" '
+                f'xmlns:r="{RELATIONSHIPS_NS}"><sheets>{sheets}</sheets></workbook>'
+            ),
+            "xl/_rels/workbook.xml.rels": (
+                f'{XML_DECLARATION}<Relationships xmlns="{PACKAGE_RELATIONSHIPS_NS}">'
+                f"{sheet_rels}"
+                f'<Relationship Id="rId{styles_id}" Target="styles.xml" '
+                f'Type="{RELATIONSHIPS_NS}/styles"/>'
+                "</Relationships>"
+            ),
+            "xl/styles.xml": STYLES,
+        }
+
+
+class XLSXFormatter(FileFormatter):
+    """
+    Writes the rows of a generator's CSV formatter into an XLSX workbook.
+    """
+
+    content_type = XLSX_MIME_TYPE
+    extension = "xlsx"
+
+    def open_writer(self, output: ReportOutput) -> Workbook:
+        return Workbook(output)
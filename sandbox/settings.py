@@ -145,8 +145,19 @@ DATABASES = {
         "PASSWORD": "",
         "HOST": "postgres",
         "PORT": 5432,
-    }
+    },
+    # Stands in for a read replica, for testing OSCAR_REPORTS_DATABASE
+    "replica": {
+        "ENGINE": "django.db.backends.postgresql",
+        "NAME": "postgres",
+        "USER": "postgres",
+        "PASSWORD": "",
+        "HOST": "postgres",
+        "PORT": 5432,
+        "TEST": {"MIRROR": "default"},
+    },
 }
+DATABASE_ROUTERS = ["oscarreports.routing.ReportDatabaseRouter"]
 
 HAYSTACK_CONNECTIONS = {
     "default": {
@@ -210,6 +221,9 @@ OSCAR_ALLOW_ANON_CHECKOUT = True
 OSCAR_DEFAULT_CURRENCY = "USD"
 OSCARAPI_BLOCK_ADMIN_API_ACCESS = False
 
+# Oscar Reports
+OSCAR_REPORTS_ROLLUPS = True
+
 # Disable real emails
 EMAIL_BACKEND = "django.core.mail.backends.locmem.EmailBackend"
 